@@ -104,7 +104,6 @@ def fetch_eleves_with_syntheses(classe_id: str, trimestre: int) -> list[dict]:
         classe_id=classe_id,
         trimestre=trimestre,
         eleve_repo=get_eleve_repo(),
-        synthese_repo=get_synthese_repo(),
         pseudonymizer=get_pseudonymizer(),
     )
 
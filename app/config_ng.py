@@ -5,7 +5,7 @@ from __future__ import annotations
 from pydantic_settings import BaseSettings
 
 from src.llm.config import settings as llm_settings
-from src.llm.pricing import PricingCalculator
+from src.llm.pricing import get_pricing_calculator
 
 # Estimation tokens par bulletin (basé sur ground truth)
 TOKENS_INPUT_PER_BULLETIN = 2000
@@ -52,7 +52,7 @@ LLM_PROVIDERS = get_llm_providers()
 
 def estimate_cost_per_bulletin(provider: str, model: str) -> float:
     """Estime le coût par bulletin pour un modèle donné."""
-    calc = PricingCalculator(provider, llm_settings.get_pricing(provider))
+    calc = get_pricing_calculator(provider)
     return calc.calculate(model, TOKENS_INPUT_PER_BULLETIN, TOKENS_OUTPUT_PER_BULLETIN)
 
 
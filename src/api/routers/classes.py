@@ -160,7 +160,6 @@ def get_classe_eleves_with_syntheses(
     trimestre: int,
     classe_repo: ClasseRepository = Depends(get_classe_repo),
     eleve_repo: EleveRepository = Depends(get_eleve_repo),
-    synthese_repo: SyntheseRepository = Depends(get_synthese_repo),
     pseudonymizer: Pseudonymizer = Depends(get_pseudonymizer),
 ):
     """Récupérer les élèves avec leurs synthèses en un seul appel.
@@ -173,7 +172,6 @@ def get_classe_eleves_with_syntheses(
         classe_id=classe_id,
         trimestre=trimestre,
         eleve_repo=eleve_repo,
-        synthese_repo=synthese_repo,
         pseudonymizer=pseudonymizer,
     )
 
@@ -48,6 +48,12 @@ class GenerationError(ChironError):
     pass
 
 
+class PromptTooLargeError(GenerationError):
+    """Prompt estimé trop grand pour la fenêtre de contexte du modèle (rejet local)."""
+
+    pass
+
+
 class ConfigurationError(ChironError):
     """Erreur de configuration (variable d'environnement, clé API manquante)."""
 
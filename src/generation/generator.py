@@ -1,12 +1,13 @@
 """Générateur de synthèses avec orchestration LLM."""
 
 import asyncio
+import json
 import logging
 from dataclasses import dataclass
 
 from src.core.models import EleveExtraction, EleveGroundTruth, SyntheseGeneree
 from src.generation.prompt_builder import PromptBuilder
-from src.llm.config import settings as llm_settings
+from src.llm.config import get_settings
 from src.llm.manager import LLMManager, get_shared_llm_manager
 
 logger = logging.getLogger(__name__)
@@ -42,7 +43,7 @@ class SyntheseGenerator:
 
     def __init__(
         self,
-        provider: str = llm_settings.default_provider,
+        provider: str | None = None,
         model: str | None = None,
         *,
         llm_manager: LLMManager | None = None,
@@ -51,12 +52,12 @@ class SyntheseGenerator:
         """Initialise le générateur.
 
         Args:
-            provider: Provider LLM (openai, anthropic, mistral).
+            provider: Provider LLM (openai, anthropic, mistral). None = défaut.
             model: Modèle spécifique (None = défaut du provider).
             llm_manager: LLMManager à utiliser (optionnel, pour tests/DI).
             prompt_builder: PromptBuilder à utiliser (optionnel, pour tests/DI).
         """
-        self.provider = provider
+        self.provider = provider or get_settings().default_provider
         self.model = model
         self._llm = llm_manager or get_shared_llm_manager()
         self._prompt_builder = prompt_builder or PromptBuilder()
@@ -64,9 +65,14 @@ class SyntheseGenerator:
     def set_exemples(self, exemples: list[EleveGroundTruth]) -> None:
         """Définit les exemples few-shot.
 
+        Sans effet si les exemples sont inchangés : le PromptBuilder courant
+        et son préfixe déjà rendu (system + few-shot) sont conservés.
+
         Args:
             exemples: Liste d'élèves avec synthèses de référence.
         """
+        if exemples == self._prompt_builder.exemples:
+            return
         self._prompt_builder = PromptBuilder(exemples=exemples)
         logger.info(f"Few-shot configuré avec {len(exemples)} exemple(s)")
 
@@ -109,7 +115,7 @@ class SyntheseGenerator:
             GenerationResult avec synthèse et métadonnées.
         """
         if max_tokens is None:
-            max_tokens = llm_settings.synthese_max_tokens
+            max_tokens = get_settings().synthese_max_tokens
 
         messages = self._prompt_builder.build_messages(eleve, classe_info)
 
@@ -214,7 +220,7 @@ class SyntheseGenerator:
         Utilise le chemin async natif du LLMManager (pas de wrapper sync).
         """
         if max_tokens is None:
-            max_tokens = llm_settings.synthese_max_tokens
+            max_tokens = get_settings().synthese_max_tokens
 
         messages = self._prompt_builder.build_messages(eleve, classe_info)
 
@@ -252,6 +258,77 @@ class SyntheseGenerator:
 
         return GenerationResult(synthese=synthese, metadata=metadata)
 
+    async def generate_group_async(
+        self,
+        eleves: list[EleveExtraction],
+        classe_info: str | None = None,
+        max_tokens: int | None = None,
+    ) -> list[GenerationResult]:
+        """Génère les synthèses de plusieurs élèves en un seul appel LLM.
+
+        Le préfixe (system + few-shot) n'est envoyé qu'une fois pour le groupe.
+        Tokens et coût de l'appel sont répartis à parts égales entre élèves.
+
+        Args:
+            eleves: Élèves du groupe.
+            classe_info: Contexte classe optionnel.
+            max_tokens: Limite de tokens (pour tout le groupe).
+
+        Returns:
+            Liste de GenerationResult, même ordre que eleves.
+
+        Raises:
+            ValueError: Si la réponse ne contient pas une synthèse par élève.
+        """
+        if max_tokens is None:
+            max_tokens = get_settings().synthese_max_tokens
+
+        messages = self._prompt_builder.build_group_messages(eleves, classe_info)
+
+        logger.info(
+            f"Génération async groupée ({len(eleves)} élèves) "
+            f"via {self.provider}/{self.model or 'default'}"
+        )
+
+        parsed_json, llm_metadata = await self._llm.call_with_json_parsing(
+            provider=self.provider,
+            messages=messages,
+            model=self.model,
+            max_tokens=max_tokens,
+            context_name=f"synthese_groupe_{eleves[0].eleve_id or 'eleve'}",
+        )
+
+        items = parsed_json.get("syntheses")
+        if not isinstance(items, list) or len(items) != len(eleves):
+            raise ValueError(
+                f"Réponse groupée invalide: {len(eleves)} synthèses attendues"
+            )
+
+        count = len(eleves)
+
+        def _share(key: str) -> int | float | None:
+            value = llm_metadata.get(key)
+            if value is None:
+                return None
+            return value / count if isinstance(value, float) else value // count
+
+        results = []
+        for item in items:
+            synthese = SyntheseGeneree(**item)
+            metadata = {
+                "llm_provider": self.provider,
+                "llm_model": llm_metadata.get("model", self.model),
+                "llm_response_raw": json.dumps(item, ensure_ascii=False),
+                "tokens_input": _share("input_tokens"),
+                "tokens_output": _share("output_tokens"),
+                "tokens_total": _share("total_tokens"),
+                "cost_usd": _share("cost_usd"),
+                "retry_count": llm_metadata.get("retry_count", 1),
+            }
+            results.append(GenerationResult(synthese=synthese, metadata=metadata))
+
+        return results
+
     async def generate_batch_async(
         self,
         eleves: list[EleveExtraction],
@@ -259,7 +336,10 @@ class SyntheseGenerator:
         max_tokens: int | None = None,
         max_concurrent: int = 3,
     ) -> list[GenerationResult | None]:
-        """Génère des synthèses en parallèle avec semaphore.
+        """Génère des synthèses en parallèle avec un pool de workers.
+
+        Si synthese_group_size > 1, les élèves sont regroupés par appel LLM
+        (generate_group_async) ; un groupe en échec est rejoué élève par élève.
 
         Args:
             eleves: Liste d'élèves.
@@ -270,25 +350,49 @@ class SyntheseGenerator:
         Returns:
             Liste de GenerationResult (None si erreur), même ordre que eleves.
         """
+        group_size = get_settings().synthese_group_size
         logger.info(
-            f"Batch async: {len(eleves)} élèves, max_concurrent={max_concurrent}"
+            f"Batch async: {len(eleves)} élèves, max_concurrent={max_concurrent}, "
+            f"group_size={group_size}"
         )
 
-        semaphore = asyncio.Semaphore(max_concurrent)
+        # Résultats pré-alloués, écrits par index dès qu'un élève est terminé
+        results: list[GenerationResult | None] = [None] * len(eleves)
+        pending = iter(range(0, len(eleves), group_size))
 
-        async def _generate_one(eleve: EleveExtraction) -> GenerationResult | None:
-            async with semaphore:
+        async def _generate_one(idx: int) -> None:
+            eleve = eleves[idx]
+            try:
+                results[idx] = await self.generate_with_metadata_async(
+                    eleve, classe_info, max_tokens
+                )
+            except Exception as e:
+                logger.error(f"Erreur batch async pour {eleve.eleve_id}: {e}")
+
+        async def _worker() -> None:
+            for start in pending:
+                group = eleves[start : start + group_size]
+                if len(group) == 1:
+                    await _generate_one(start)
+                    continue
                 try:
-                    return await self.generate_with_metadata_async(
-                        eleve, classe_info, max_tokens
+                    group_results = await self.generate_group_async(
+                        group, classe_info, max_tokens
                     )
                 except Exception as e:
-                    logger.error(f"Erreur batch async pour {eleve.eleve_id}: {e}")
-                    return None
+                    logger.warning(
+                        f"Groupe {start}-{start + len(group) - 1} en échec ({e}), "
+                        "repli élève par élève"
+                    )
+                    for idx in range(start, start + len(group)):
+                        await _generate_one(idx)
+                    continue
+                results[start : start + len(group)] = group_results
 
-        results = await asyncio.gather(*[_generate_one(e) for e in eleves])
+        nb_workers = min(max_concurrent, -(-len(eleves) // group_size))
+        await asyncio.gather(*(_worker() for _ in range(nb_workers)))
 
         success_count = sum(1 for r in results if r is not None)
         logger.info(f"Batch async terminé: {success_count}/{len(eleves)} succès")
 
-        return list(results)
+        return results
@@ -140,6 +140,10 @@ class PromptBuilder:
             exemples: Liste d'élèves avec synthèses de référence pour few-shot.
         """
         self.exemples = exemples or []
+        # Préfixe (system + few-shot) rendu une fois par (system, classe_info) :
+        # identique octet pour octet d'un appel à l'autre, pour le cache de
+        # prompt côté provider
+        self._prefix_cache: dict[tuple[str, str | None], tuple[dict, ...]] = {}
 
     def build_messages(
         self,
@@ -155,17 +159,79 @@ class PromptBuilder:
         Returns:
             Liste de messages au format OpenAI/Anthropic.
         """
-        messages = []
+        prompt_template = get_prompt(CURRENT_PROMPT)
+        messages = self._build_prefix(prompt_template, classe_info)
+
+        # Élève cible
+        messages.append(
+            {
+                "role": "user",
+                "content": prompt_template["user"].format(
+                    eleve_data=format_eleve_data(eleve)
+                ),
+            }
+        )
+
+        return messages
 
-        # Get prompts from centralized prompts.py
+    def build_group_messages(
+        self,
+        eleves: list[EleveExtraction],
+        classe_info: str | None = None,
+    ) -> list[dict[str, str]]:
+        """Construit les messages pour générer plusieurs synthèses en un appel.
+
+        Même préfixe (system + exemples few-shot) que build_messages, puis un
+        seul message listant les élèves numérotés [1]..[n]. La réponse
+        attendue est {"syntheses": [...]} dans le même ordre.
+
+        Args:
+            eleves: Élèves du groupe.
+            classe_info: Info contextuelle sur la classe (optionnel).
+
+        Returns:
+            Liste de messages au format OpenAI/Anthropic.
+        """
         prompt_template = get_prompt(CURRENT_PROMPT)
-        system_content = prompt_template["system"]
+        messages = self._build_prefix(prompt_template, classe_info)
+
+        eleves_data = "\n\n".join(
+            f"[{i}]\n<ELEVE_DATA>\n{format_eleve_data(eleve)}\n</ELEVE_DATA>"
+            for i, eleve in enumerate(eleves, start=1)
+        )
+        messages.append(
+            {
+                "role": "user",
+                "content": prompt_template["user_group"].format(
+                    count=len(eleves), eleves_data=eleves_data
+                ),
+            }
+        )
+
+        return messages
+
+    def _build_prefix(
+        self, prompt_template: dict, classe_info: str | None
+    ) -> list[dict[str, str]]:
+        """Retourne le message system et les paires few-shot (mémoïsés)."""
+        key = (prompt_template["system"], classe_info)
+        prefix = self._prefix_cache.get(key)
+        if prefix is None:
+            prefix = tuple(self._render_prefix(prompt_template, classe_info))
+            self._prefix_cache[key] = prefix
+        return list(prefix)
+
+    def _render_prefix(
+        self, prompt_template: dict, classe_info: str | None
+    ) -> list[dict[str, str]]:
+        """Construit le message system et les paires few-shot."""
+        system_content = prompt_template["system"].rstrip()
         user_template = prompt_template["user"]
 
         if classe_info:
             system_content += f"\n\nCONTEXTE CLASSE :\n{classe_info}"
 
-        messages.append({"role": "system", "content": system_content})
+        messages = [{"role": "system", "content": system_content}]
 
         # Few-shot examples — wrap in JSON format matching the expected output
         for exemple in self.exemples:
@@ -196,12 +262,4 @@ class PromptBuilder:
                 }
             )
 
-        # Élève cible
-        messages.append(
-            {
-                "role": "user",
-                "content": user_template.format(eleve_data=format_eleve_data(eleve)),
-            }
-        )
-
         return messages
@@ -234,6 +234,15 @@ _USER_TEMPLATE = """Rédige une synthèse pour cet élève :
 {eleve_data}
 </ELEVE_DATA>"""
 
+# Variante groupée (plusieurs élèves par appel, cf. synthese_group_size)
+_GROUP_USER_TEMPLATE = """Rédige une synthèse pour chacun des {count} élèves ci-dessous, \
+indépendamment les uns des autres :
+
+{eleves_data}
+
+Réponds avec un JSON {{"syntheses": [...]}} contenant exactement {count} objets \
+au format de réponse décrit, dans l'ordre des élèves ([1] en premier)."""
+
 
 # ============================================================================
 # GESTION DU PROMPT SYSTÈME PERSONNALISABLE
@@ -293,6 +302,7 @@ PROMPT_TEMPLATES = {
         "description": "Prompt ancré en sciences de l'éducation : growth mindset (Dweck), feedforward (Hattie & Timperley), stratégies actionnables, détection biais de genre (PSE). v3.1 : calibration longueur/matières sur corpus réel, gradient de ton souple, pattern oral/écrit.",
         "system": _get_default_system_prompt(),
         "user": _USER_TEMPLATE,
+        "user_group": _GROUP_USER_TEMPLATE,
     },
 }
 
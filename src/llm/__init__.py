@@ -1,14 +1,15 @@
 """Module LLM - Clients, manager et métriques pour appels LLM."""
 
-from src.llm.config import LLMSettings, settings
-from src.llm.manager import LLMManager, get_shared_llm_manager
+from src.llm.config import LLMSettings, get_settings
+from src.llm.manager import BatchRequest, LLMManager, get_shared_llm_manager
 from src.llm.metrics import LLMCallMetrics, MetricsCollector, metrics_collector
 
 __all__ = [
+    "BatchRequest",
     "LLMManager",
     "get_shared_llm_manager",
     "LLMSettings",
-    "settings",
+    "get_settings",
     "LLMCallMetrics",
     "MetricsCollector",
     "metrics_collector",
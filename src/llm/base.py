@@ -10,20 +10,34 @@ import time
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
+from src.core.exceptions import PromptTooLargeError
+from src.llm.config import get_settings
 from src.llm.metrics import LLMCallMetrics, metrics_collector
 
 logger = logging.getLogger(__name__)
 
+# Estimation locale : ~4 caractères par token (borne basse pour du français,
+# pour ne jamais rejeter à tort un prompt qui tiendrait dans le contexte).
+_CHARS_PER_TOKEN = 4
+# Surcoût par message (rôle + délimiteurs du format chat)
+_TOKENS_PER_MESSAGE = 4
+
 
 @dataclass
 class LLMRawResponse:
-    """Résultat brut d'un appel API LLM, retourné par _do_call()."""
+    """Résultat brut d'un appel API LLM, retourné par _do_call().
+
+    prompt_tokens ne compte que les tokens d'input facturés au tarif normal :
+    les tokens lus ou écrits dans le cache de prompt sont comptés à part.
+    """
 
     content: str
     prompt_tokens: int
     completion_tokens: int
     total_tokens: int
     model: str
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
 
 
 class LLMClient(ABC):
@@ -71,6 +85,53 @@ class LLMClient(ABC):
         """
         pass
 
+    def estimate_tokens(self, messages: list[dict[str, str]]) -> int:
+        """Estime localement le nombre de tokens d'input d'une liste de messages.
+
+        Estimation volontairement basse (pas de tokenizer BPE embarqué) :
+        elle sert uniquement à rejeter sans appel API les prompts
+        manifestement trop grands.
+
+        Args:
+            messages: Liste de messages au format standard.
+
+        Returns:
+            Nombre de tokens estimé.
+        """
+        chars = sum(len(m.get("content") or "") for m in messages)
+        return chars // _CHARS_PER_TOKEN + _TOKENS_PER_MESSAGE * len(messages)
+
+    def _check_prompt_size(
+        self, messages: list[dict[str, str]], model: str, max_tokens: int
+    ) -> None:
+        """Lève PromptTooLargeError si le prompt dépasse la fenêtre du modèle.
+
+        Args:
+            messages: Messages à envoyer.
+            model: Modèle ciblé.
+            max_tokens: Tokens de sortie réservés.
+
+        Raises:
+            PromptTooLargeError: Si input estimé + max_tokens > fenêtre de contexte.
+        """
+        context_window = get_settings().get_context_window(model)
+        if context_window is None:
+            return
+
+        estimated = self.estimate_tokens(messages)
+        if estimated > context_window - max_tokens:
+            raise PromptTooLargeError(
+                f"Prompt trop grand pour {model}: ~{estimated} tokens estimés "
+                f"+ {max_tokens} tokens de sortie > fenêtre de {context_window}",
+                details={
+                    "provider": self.provider_name,
+                    "model": model,
+                    "estimated_tokens": estimated,
+                    "max_tokens": max_tokens,
+                    "context_window": context_window,
+                },
+            )
+
     async def call(
         self,
         messages: list[dict[str, str]],
@@ -89,10 +150,17 @@ class LLMClient(ABC):
                 - prompt_tokens: int - Tokens du prompt
                 - completion_tokens: int - Tokens de la complétion
                 - total_tokens: int - Total des tokens
+                - cache_read_tokens: int - Tokens d'input lus dans le cache
+                - cache_write_tokens: int - Tokens d'input écrits dans le cache
                 - model: str - Modèle utilisé
                 - cost_usd: float - Coût estimé en USD
+
+        Raises:
+            PromptTooLargeError: Si le prompt ne tient pas dans le contexte
+                du modèle (détecté localement, sans appel API).
         """
         model = kwargs.pop("model", self.model_name)
+        self._check_prompt_size(messages, model, kwargs.get("max_tokens", 0))
         start_time = time.time()
 
         try:
@@ -100,12 +168,20 @@ class LLMClient(ABC):
             latency_ms = (time.time() - start_time) * 1000
 
             cost_usd = self.pricing_calc.calculate(
-                raw.model, raw.prompt_tokens, raw.completion_tokens
+                raw.model,
+                raw.prompt_tokens,
+                raw.completion_tokens,
+                cache_read_tokens=raw.cache_read_tokens,
+                cache_write_tokens=raw.cache_write_tokens,
             )
 
             logger.info(
-                f"{self.provider_name} call réussi: {raw.model} - {raw.total_tokens} tokens - "
-                f"{latency_ms:.0f}ms - Content length: {len(raw.content)} chars"
+                "%s call réussi: %s - %d tokens - %.0fms - Content length: %d chars",
+                self.provider_name,
+                raw.model,
+                raw.total_tokens,
+                latency_ms,
+                len(raw.content),
             )
 
             metrics_collector.collect(
@@ -127,6 +203,8 @@ class LLMClient(ABC):
                 "prompt_tokens": raw.prompt_tokens,
                 "completion_tokens": raw.completion_tokens,
                 "total_tokens": raw.total_tokens,
+                "cache_read_tokens": raw.cache_read_tokens,
+                "cache_write_tokens": raw.cache_write_tokens,
                 "model": raw.model,
                 "cost_usd": cost_usd,
             }
@@ -134,7 +212,7 @@ class LLMClient(ABC):
         except Exception as e:
             latency_ms = (time.time() - start_time) * 1000
             error_type = type(e).__name__
-            logger.error(f"Erreur {self.provider_name} call: {error_type} - {str(e)}")
+            logger.error("Erreur %s call: %s - %s", self.provider_name, error_type, e)
 
             metrics_collector.collect(
                 LLMCallMetrics(
@@ -8,11 +8,14 @@ import logging
 from anthropic import AsyncAnthropic
 
 from src.llm.base import LLMClient, LLMRawResponse
-from src.llm.config import settings
-from src.llm.pricing import PricingCalculator
+from src.llm.config import get_settings
+from src.llm.pricing import get_pricing_calculator
 
 logger = logging.getLogger(__name__)
 
+# Marqueur de cache de prompt (durée de vie courte, renouvelée à chaque lecture)
+_CACHE_CONTROL = {"type": "ephemeral"}
+
 
 class AnthropicClient(LLMClient):
     """Client pour les modèles Anthropic (Claude Sonnet 4.5, Haiku 3.5)."""
@@ -28,11 +31,14 @@ class AnthropicClient(LLMClient):
             api_key: Clé API Anthropic. Si None, utilise settings.anthropic_api_key
             model: Nom du modèle. Si None, utilise settings.get_model("anthropic")
         """
+        settings = get_settings()
         self._api_key = api_key or settings.anthropic_api_key
         self._model = model or settings.get_model("anthropic")
         self._client = AsyncAnthropic(api_key=self._api_key)
-        self.pricing_calc = PricingCalculator("anthropic", settings.anthropic_pricing)
-        logger.info(f"AnthropicClient initialisé avec modèle: {self._model}")
+        self.pricing_calc = get_pricing_calculator("anthropic")
+        # Défauts lus à chaque appel : copiés une fois depuis les settings
+        self._default_temperature = settings.default_temperature
+        logger.info("AnthropicClient initialisé avec modèle: %s", self._model)
 
     @property
     def provider_name(self) -> str:
@@ -61,23 +67,50 @@ class AnthropicClient(LLMClient):
 
     def _prepare_messages(
         self, messages: list[dict[str, str]]
-    ) -> tuple[str | None, list[dict[str, str]]]:
+    ) -> tuple[list[dict] | None, list[dict]]:
         """Sépare les messages system des autres pour l'API Anthropic.
 
         L'API Anthropic requiert que les messages system soient passés
         dans un paramètre séparé au lieu d'être dans la liste des messages.
 
+        Le préfixe commun aux appels (system + exemples few-shot, soit tout
+        sauf le dernier message) est marqué `cache_control` : les appels
+        suivants relisent ce préfixe depuis le cache de prompt Anthropic.
+
         Args:
             messages: Liste de messages au format standard
 
         Returns:
-            Tuple (system_prompt, filtered_messages)
+            Tuple (system_blocks, filtered_messages)
         """
         system_messages = [m["content"] for m in messages if m["role"] == "system"]
         other_messages = [m for m in messages if m["role"] != "system"]
 
-        system_prompt = "\n\n".join(system_messages) if system_messages else None
-        return system_prompt, other_messages
+        system_blocks = None
+        if system_messages:
+            system_blocks = [
+                {
+                    "type": "text",
+                    "text": "\n\n".join(system_messages),
+                    "cache_control": _CACHE_CONTROL,
+                }
+            ]
+
+        # Dernier message du préfixe (réponse few-shot) : point de cache
+        if len(other_messages) > 1:
+            last_prefix = other_messages[-2]
+            other_messages[-2] = {
+                "role": last_prefix["role"],
+                "content": [
+                    {
+                        "type": "text",
+                        "text": last_prefix["content"],
+                        "cache_control": _CACHE_CONTROL,
+                    }
+                ],
+            }
+
+        return system_blocks, other_messages
 
     async def _do_call(
         self,
@@ -90,11 +123,11 @@ class AnthropicClient(LLMClient):
         Gère la séparation des messages system et l'extraction des content blocks.
         """
         # Séparer les messages system
-        system_prompt, filtered_messages = self._prepare_messages(messages)
+        system_blocks, filtered_messages = self._prepare_messages(messages)
 
         # Paramètres par défaut
         if "temperature" not in kwargs:
-            kwargs["temperature"] = settings.default_temperature
+            kwargs["temperature"] = self._default_temperature
 
         if "max_tokens" not in kwargs:
             kwargs["max_tokens"] = self._get_max_tokens_for_model(model)
@@ -107,8 +140,8 @@ class AnthropicClient(LLMClient):
         }
 
         # Ajouter system prompt si présent
-        if system_prompt:
-            call_params["system"] = system_prompt
+        if system_blocks:
+            call_params["system"] = system_blocks
 
         # Appel API
         response = await self._client.messages.create(**call_params)
@@ -125,20 +158,30 @@ class AnthropicClient(LLMClient):
         # Debug: vérifier si content est vide
         if not content or content.strip() == "":
             logger.warning(
-                f"[WARNING] Anthropic retourné content vide pour {model}\n"
-                f"   Content blocks: {content_blocks}\n"
-                f"   Stop reason: {response.stop_reason}"
+                "[WARNING] Anthropic retourné content vide pour %s\n"
+                "   Content blocks: %s\n"
+                "   Stop reason: %s",
+                model,
+                content_blocks,
+                response.stop_reason,
             )
             content = content or ""
 
-        # Extraire les tokens (noms différents chez Anthropic)
-        prompt_tokens = response.usage.input_tokens
-        completion_tokens = response.usage.output_tokens
+        # Extraire les tokens (noms différents chez Anthropic). input_tokens
+        # exclut les tokens lus/écrits dans le cache de prompt, facturés à
+        # d'autres tarifs : ils sont remontés séparément
+        usage = response.usage
+        prompt_tokens = usage.input_tokens
+        completion_tokens = usage.output_tokens
 
         return LLMRawResponse(
             content=content,
             prompt_tokens=prompt_tokens,
             completion_tokens=completion_tokens,
             total_tokens=prompt_tokens + completion_tokens,
+            cache_read_tokens=getattr(usage, "cache_read_input_tokens", None) or 0,
+            cache_write_tokens=(
+                getattr(usage, "cache_creation_input_tokens", None) or 0
+            ),
             model=response.model,  # Modèle réel retourné par l'API
         )
@@ -9,8 +9,8 @@ import logging
 from mistralai import Mistral, SDKError
 
 from src.llm.base import LLMClient, LLMRawResponse
-from src.llm.config import settings
-from src.llm.pricing import PricingCalculator
+from src.llm.config import get_settings
+from src.llm.pricing import get_pricing_calculator
 
 logger = logging.getLogger(__name__)
 
@@ -42,12 +42,16 @@ class MistralClient(LLMClient):
             api_key: Clé API Mistral. Si None, utilise settings.mistral_api_key
             model: Nom du modèle. Si None, utilise settings.get_model("mistral")
         """
+        settings = get_settings()
         self._api_key = api_key or settings.mistral_api_key
         self._model = model or settings.get_model("mistral")
         self._client = Mistral(api_key=self._api_key)
         self._last_loop = None  # Pour détecter les changements d'event loop
-        self.pricing_calc = PricingCalculator("mistral", settings.mistral_pricing)
-        logger.info(f"MistralClient initialisé avec modèle: {self._model}")
+        self.pricing_calc = get_pricing_calculator("mistral")
+        # Défauts lus à chaque appel : copiés une fois depuis les settings
+        self._default_temperature = settings.default_temperature
+        self._default_max_tokens = settings.default_max_tokens
+        logger.info("MistralClient initialisé avec modèle: %s", self._model)
 
     @property
     def provider_name(self) -> str:
@@ -71,10 +75,10 @@ class MistralClient(LLMClient):
         """
         # Paramètres par défaut
         if "temperature" not in kwargs:
-            kwargs["temperature"] = settings.default_temperature
+            kwargs["temperature"] = self._default_temperature
 
         if "max_tokens" not in kwargs:
-            kwargs["max_tokens"] = settings.default_max_tokens
+            kwargs["max_tokens"] = self._default_max_tokens
 
         # Protection proactive : vérifier si l'event loop a changé
         try:
@@ -98,7 +102,7 @@ class MistralClient(LLMClient):
         except SDKError as e:
             friendly = _ERROR_MESSAGES.get(e.status_code)
             if friendly:
-                logger.error(f"Erreur API Mistral ({e.status_code}): {friendly}")
+                logger.error("Erreur API Mistral (%s): %s", e.status_code, friendly)
                 raise SDKError(friendly, e.raw_response, e.body) from e
             raise
         except RuntimeError as e:
@@ -113,8 +117,9 @@ class MistralClient(LLMClient):
                 ]
             ):
                 logger.warning(
-                    f"Problème d'event loop détecté, recréation du client Mistral... "
-                    f"(erreur: {str(e)[:100]})"
+                    "Problème d'event loop détecté, recréation du client Mistral... "
+                    "(erreur: %.100s)",
+                    e,
                 )
                 self._client = Mistral(api_key=self._api_key)
                 response = await self._client.chat.complete_async(
@@ -132,9 +137,12 @@ class MistralClient(LLMClient):
         # Debug: vérifier si content est None ou vide
         if content is None or content.strip() == "":
             logger.warning(
-                f"[WARNING] Mistral retourné content vide/None pour {model}\n"
-                f"   Message object: {message}\n"
-                f"   Finish reason: {response.choices[0].finish_reason}"
+                "[WARNING] Mistral retourné content vide/None pour %s\n"
+                "   Message object: %s\n"
+                "   Finish reason: %s",
+                model,
+                message,
+                response.choices[0].finish_reason,
             )
             content = content or ""
 
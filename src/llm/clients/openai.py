@@ -8,8 +8,8 @@ import logging
 from openai import AsyncOpenAI
 
 from src.llm.base import LLMClient, LLMRawResponse
-from src.llm.config import settings
-from src.llm.pricing import PricingCalculator
+from src.llm.config import get_settings
+from src.llm.pricing import get_pricing_calculator
 
 logger = logging.getLogger(__name__)
 
@@ -28,11 +28,15 @@ class OpenAIClient(LLMClient):
             api_key: Clé API OpenAI. Si None, utilise settings.openai_api_key
             model: Nom du modèle. Si None, utilise settings.get_model("openai")
         """
+        settings = get_settings()
         self._api_key = api_key or settings.openai_api_key
         self._model = model or settings.get_model("openai")
         self._client = AsyncOpenAI(api_key=self._api_key)
-        self.pricing_calc = PricingCalculator("openai", settings.openai_pricing)
-        logger.info(f"OpenAIClient initialisé avec modèle: {self._model}")
+        self.pricing_calc = get_pricing_calculator("openai")
+        # Défauts lus à chaque appel : copiés une fois depuis les settings
+        self._default_temperature = settings.default_temperature
+        self._default_max_tokens = settings.default_max_tokens
+        logger.info("OpenAIClient initialisé avec modèle: %s", self._model)
 
     @property
     def provider_name(self) -> str:
@@ -61,7 +65,7 @@ class OpenAIClient(LLMClient):
         if is_gpt5:
             kwargs.pop("temperature", None)
         elif "temperature" not in kwargs:
-            kwargs["temperature"] = settings.default_temperature
+            kwargs["temperature"] = self._default_temperature
 
         # GPT-5 utilise max_completion_tokens au lieu de max_tokens
         if is_gpt5 and "max_tokens" in kwargs:
@@ -70,7 +74,7 @@ class OpenAIClient(LLMClient):
         max_tokens_key = "max_completion_tokens" if is_gpt5 else "max_tokens"
 
         if max_tokens_key not in kwargs:
-            kwargs[max_tokens_key] = settings.default_max_tokens
+            kwargs[max_tokens_key] = self._default_max_tokens
 
         # GPT-5 utilise des tokens pour le raisonnement interne
         if is_gpt5 and kwargs.get(max_tokens_key, 0) < 16000:
@@ -90,10 +94,14 @@ class OpenAIClient(LLMClient):
         # Debug: vérifier si content est None ou vide
         if content is None or content.strip() == "":
             logger.warning(
-                f"[WARNING] OpenAI retourné content vide/None pour {model}\n"
-                f"   Message object: {message}\n"
-                f"   Refusal: {getattr(message, 'refusal', None)}\n"
-                f"   Finish reason: {response.choices[0].finish_reason}"
+                "[WARNING] OpenAI retourné content vide/None pour %s\n"
+                "   Message object: %s\n"
+                "   Refusal: %s\n"
+                "   Finish reason: %s",
+                model,
+                message,
+                getattr(message, "refusal", None),
+                response.choices[0].finish_reason,
             )
             content = content or ""
 
@@ -2,13 +2,65 @@
 
 Ce module centralise tous les paramètres de configuration pour les appels LLM,
 incluant les API keys, modèles, retry, rate limits et timeouts.
+
+Les settings sont construits à la demande via get_settings() (lecture du .env
+et validation pydantic au premier appel seulement, puis instance partagée).
 """
 
-from pydantic import Field
+from collections.abc import Mapping
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, ClassVar
+
+from pydantic import Field, PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from src.core.constants import PROJECT_ROOT
 
+# {model: (input_price_per_1M, output_price_per_1M)}
+type PricingTable = Mapping[str, tuple[float, float]]
+
+# Pricing (USD par million de tokens) - Input / Output
+# Estimation par bulletin: ~2000 tokens input, ~500 tokens output
+#
+# OpenAI - Source: https://openai.com/api/pricing/ (Feb 2026)
+_OPENAI_PRICING: PricingTable = MappingProxyType(
+    {
+        "gpt-5.2": (1.75, 14.00),  # ~$0.011/bulletin - le plus puissant
+        "gpt-5-mini": (0.25, 2.00),  # ~$0.0015/bulletin - défaut
+    }
+)
+
+# Anthropic - Source: https://www.anthropic.com/pricing (Feb 2026)
+_ANTHROPIC_PRICING: PricingTable = MappingProxyType(
+    {
+        "claude-opus-4-6": (5.00, 25.00),  # ~$0.023/bulletin - qualité max
+        "claude-sonnet-4-5": (3.00, 15.00),  # ~$0.014/bulletin
+        "claude-haiku-4-5": (1.00, 5.00),  # ~$0.005/bulletin
+    }
+)
+
+# Mistral - Source: https://mistral.ai/technology/#pricing (Feb 2026)
+_MISTRAL_PRICING: PricingTable = MappingProxyType(
+    {
+        "mistral-large-latest": (2.00, 6.00),  # ~$0.007/bulletin
+        "mistral-medium-latest": (2.00, 5.00),  # ~$0.007/bulletin
+        "mistral-small-latest": (0.50, 1.50),  # ~$0.002/bulletin
+    }
+)
+
+# Fenêtres de contexte (tokens input + output) par préfixe de modèle.
+# Sert au rejet local des prompts trop grands avant l'appel API.
+_CONTEXT_WINDOWS: Mapping[str, int] = MappingProxyType(
+    {
+        "gpt-5": 400_000,
+        "claude-": 200_000,
+        "mistral-large": 128_000,
+        "mistral-medium": 128_000,
+        "mistral-small": 128_000,
+    }
+)
+
 
 class LLMSettings(BaseSettings):
     """Configuration des clients LLM.
@@ -85,6 +137,19 @@ class LLMSettings(BaseSettings):
         default=30, gt=0, description="Timeout par défaut en secondes"
     )
 
+    # Cache du résumé des métriques (get_summary), en secondes (0 = désactivé)
+    metrics_cache_ttl_seconds: float = Field(
+        default=5.0, ge=0, description="Durée de cache du résumé des métriques (s)"
+    )
+
+    # Export automatique des métriques vers DuckDB (premier seuil atteint)
+    metrics_flush_rows: int = Field(
+        default=10_000, gt=0, description="Taille du buffer déclenchant un export"
+    )
+    metrics_flush_seconds: float = Field(
+        default=30.0, gt=0, description="Délai max entre deux exports (s)"
+    )
+
     # Paramètres LLM par défaut
     default_temperature: float = Field(
         default=0.2, ge=0, le=2, description="Température par défaut"
@@ -99,29 +164,55 @@ class LLMSettings(BaseSettings):
         gt=0,
         description="Max tokens pour la génération de synthèses (valeur généreuse, coût = tokens utilisés)",
     )
+    # Nombre d'élèves par appel LLM en génération batch (1 = un appel par élève)
+    synthese_group_size: int = Field(
+        default=1,
+        ge=1,
+        description="Élèves regroupés par appel LLM en batch (préfixe partagé)",
+    )
 
-    # Pricing (USD par million de tokens) - Input / Output
-    # Estimation par bulletin: ~2000 tokens input, ~500 tokens output
-    #
-    # OpenAI - Source: https://openai.com/api/pricing/ (Feb 2026)
-    openai_pricing: dict[str, tuple[float, float]] = {
-        "gpt-5.2": (1.75, 14.00),  # ~$0.011/bulletin - le plus puissant
-        "gpt-5-mini": (0.25, 2.00),  # ~$0.0015/bulletin - défaut
-    }
+    # Tables de lookup immuables (constantes module, hors validation pydantic)
+    openai_pricing: ClassVar[PricingTable] = _OPENAI_PRICING
+    anthropic_pricing: ClassVar[PricingTable] = _ANTHROPIC_PRICING
+    mistral_pricing: ClassVar[PricingTable] = _MISTRAL_PRICING
+    context_windows: ClassVar[Mapping[str, int]] = _CONTEXT_WINDOWS
 
-    # Anthropic - Source: https://www.anthropic.com/pricing (Feb 2026)
-    anthropic_pricing: dict[str, tuple[float, float]] = {
-        "claude-opus-4-6": (5.00, 25.00),  # ~$0.023/bulletin - qualité max
-        "claude-sonnet-4-5": (3.00, 15.00),  # ~$0.014/bulletin
-        "claude-haiku-4-5": (1.00, 5.00),  # ~$0.005/bulletin
-    }
+    def get_context_window(self, model: str) -> int | None:
+        """Retourne la fenêtre de contexte d'un modèle.
 
-    # Mistral - Source: https://mistral.ai/technology/#pricing (Feb 2026)
-    mistral_pricing: dict[str, tuple[float, float]] = {
-        "mistral-large-latest": (2.00, 6.00),  # ~$0.007/bulletin
-        "mistral-medium-latest": (2.00, 5.00),  # ~$0.007/bulletin
-        "mistral-small-latest": (0.50, 1.50),  # ~$0.002/bulletin
-    }
+        Args:
+            model: Nom du modèle (peut contenir date/version)
+
+        Returns:
+            Taille de la fenêtre en tokens, ou None si le modèle est inconnu
+        """
+        for prefix, window in self.context_windows.items():
+            if model.startswith(prefix):
+                return window
+        return None
+
+    # Tables de dispatch provider -> valeurs, construites une fois après validation
+    _model_map: dict[str, tuple[str, str]] = PrivateAttr(default_factory=dict)
+    _rpm_map: dict[str, int] = PrivateAttr(default_factory=dict)
+    _pricing_map: dict[str, PricingTable] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, context: Any, /) -> None:
+        """Construit les tables de dispatch par provider."""
+        self._model_map = {
+            "openai": (self.default_openai_model, self.test_openai_model),
+            "anthropic": (self.default_anthropic_model, self.test_anthropic_model),
+            "mistral": (self.default_mistral_model, self.test_mistral_model),
+        }
+        self._rpm_map = {
+            "openai": self.openai_rpm,
+            "anthropic": self.anthropic_rpm,
+            "mistral": self.mistral_rpm,
+        }
+        self._pricing_map = {
+            "openai": self.openai_pricing,
+            "anthropic": self.anthropic_pricing,
+            "mistral": self.mistral_pricing,
+        }
 
     def get_model(self, provider: str) -> str:
         """Retourne le modèle approprié selon le provider et le flag use_test_models.
@@ -135,23 +226,11 @@ class LLMSettings(BaseSettings):
         Raises:
             ValueError: Si le provider est inconnu
         """
-        provider_lower = provider.lower()
-        if self.use_test_models:
-            if provider_lower == "openai":
-                return self.test_openai_model
-            elif provider_lower == "anthropic":
-                return self.test_anthropic_model
-            elif provider_lower == "mistral":
-                return self.test_mistral_model
-        else:
-            if provider_lower == "openai":
-                return self.default_openai_model
-            elif provider_lower == "anthropic":
-                return self.default_anthropic_model
-            elif provider_lower == "mistral":
-                return self.default_mistral_model
-
-        raise ValueError(f"Provider inconnu: {provider}")
+        try:
+            prod, test = self._model_map[provider.lower()]
+        except KeyError:
+            raise ValueError(f"Provider inconnu: {provider}") from None
+        return test if self.use_test_models else prod
 
     def get_rpm(self, provider: str) -> int:
         """Retourne le rate limit (RPM) pour un provider.
@@ -165,36 +244,50 @@ class LLMSettings(BaseSettings):
         Raises:
             ValueError: Si le provider est inconnu
         """
-        provider_lower = provider.lower()
-        if provider_lower == "openai":
-            return self.openai_rpm
-        elif provider_lower == "anthropic":
-            return self.anthropic_rpm
-        elif provider_lower == "mistral":
-            return self.mistral_rpm
-        raise ValueError(f"Provider inconnu: {provider}")
-
-    def get_pricing(self, provider: str) -> dict[str, tuple[float, float]]:
+        try:
+            return self._rpm_map[provider.lower()]
+        except KeyError:
+            raise ValueError(f"Provider inconnu: {provider}") from None
+
+    def get_pricing(self, provider: str) -> PricingTable:
         """Retourne la config de pricing pour un provider.
 
         Args:
             provider: Nom du provider (openai/anthropic/mistral)
 
         Returns:
-            Dict {model: (input_price_per_1M, output_price_per_1M)}
+            Mapping immuable {model: (input_price_per_1M, output_price_per_1M)}
 
         Raises:
             ValueError: Si le provider est inconnu
         """
-        provider_lower = provider.lower()
-        if provider_lower == "openai":
-            return self.openai_pricing
-        elif provider_lower == "anthropic":
-            return self.anthropic_pricing
-        elif provider_lower == "mistral":
-            return self.mistral_pricing
-        raise ValueError(f"Provider inconnu: {provider}")
-
-
-# Instance globale des settings
-settings = LLMSettings()
+        try:
+            return self._pricing_map[provider.lower()]
+        except KeyError:
+            raise ValueError(f"Provider inconnu: {provider}") from None
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> LLMSettings:
+    """Retourne l'instance partagée des settings LLM.
+
+    Construite au premier appel seulement (lecture du .env + validation).
+    Les modules de src.llm, generation et services appellent get_settings()
+    au moment de l'usage : après get_settings.cache_clear(), ils lisent la
+    nouvelle instance (les clients LLM déjà construits gardent leurs défauts).
+
+    Returns:
+        Instance partagée de LLMSettings.
+    """
+    return LLMSettings()
+
+
+def __getattr__(name: str):
+    """Compatibilité : `from src.llm.config import settings` reste supporté.
+
+    L'attribut module `settings` est résolu paresseusement vers get_settings().
+    Une valeur importée ainsi reste liée à l'instance du moment de l'import.
+    """
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,38 +6,158 @@ Orchestration des appels LLM avec gestion des erreurs et parallélisation.
 import asyncio
 import json
 import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import Any
 
 import anthropic
 import httpx
 import openai
 from mistralai import SDKError as MistralSDKError
-from tenacity import (
-    retry,
-    retry_if_exception,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
 
 from src.core.exceptions import ConfigurationError
 from src.llm.base import LLMClient
 from src.llm.clients.anthropic import AnthropicClient
 from src.llm.clients.mistral import MistralClient
 from src.llm.clients.openai import OpenAIClient
-from src.llm.config import settings
+from src.llm.config import get_settings
 from src.llm.metrics import metrics_collector
-from src.llm.rate_limiter import get_shared_rate_limiter
+from src.llm.rate_limiter import SimpleRateLimiter, get_shared_rate_limiter
 from src.utils.async_helpers import run_async_in_sync_context
 
 logger = logging.getLogger(__name__)
 
+# Décodeur JSON C (orjson) si disponible, sinon json standard.
+# orjson.JSONDecodeError hérite de json.JSONDecodeError : même gestion d'erreur.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# Erreurs réseau / rate limit pour lesquelles un nouvel essai a du sens
+_RETRYABLE_ERRORS: tuple[type[BaseException], ...] = (
+    ConnectionError,
+    TimeoutError,
+    httpx.ReadTimeout,
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    anthropic.RateLimitError,
+    anthropic.APIConnectionError,
+)
+
+# Délai max entre deux tentatives (secondes)
+_MAX_BACKOFF_SECONDS = 60
+
+# Providers supportant response_format pour forcer un JSON valide
+_JSON_FORMAT_PROVIDERS = frozenset({"openai", "mistral"})
+# Constante partagée par tous les appels (lecture seule, jamais copiée)
+_JSON_RESPONSE_FORMAT: Mapping[str, str] = MappingProxyType({"type": "json_object"})
+
 
 def _is_retryable_mistral_error(exc: BaseException) -> bool:
     """Vérifie si une erreur Mistral SDK est retryable (429, 5xx)."""
     return isinstance(exc, MistralSDKError) and exc.status_code in (429, 500, 502, 503)
 
 
+def _is_retryable_error(exc: BaseException) -> bool:
+    """Vérifie si une erreur d'appel LLM justifie un nouvel essai."""
+    return isinstance(exc, _RETRYABLE_ERRORS) or _is_retryable_mistral_error(exc)
+
+
+def _extract_json_str(content: str) -> str:
+    """Extrait le JSON d'une réponse LLM, en retirant un éventuel bloc markdown.
+
+    Privilégie un bloc ```json, sinon le premier bloc ```, sinon le texte
+    entier. Un bloc non fermé (réponse tronquée) est pris jusqu'à la fin.
+    Utilise str.partition (parcours en C, sans find() répétés).
+
+    Args:
+        content: Réponse brute du LLM.
+
+    Returns:
+        Chaîne JSON à parser.
+    """
+    _, sep, rest = content.partition("```json")
+    if not sep:
+        _, sep, rest = content.partition("```")
+    if not sep:
+        return content.strip()
+    json_str, _, _ = rest.partition("```")
+    return json_str.strip()
+
+
+def _extract_and_parse_json(content: str) -> dict:
+    """Extrait puis parse le JSON d'une réponse LLM.
+
+    Args:
+        content: Réponse brute du LLM.
+
+    Returns:
+        JSON parsé.
+
+    Raises:
+        json.JSONDecodeError: Si le JSON extrait est invalide.
+    """
+    return _json_loads(_extract_json_str(content))
+
+
+def _log_json_error(
+    error: json.JSONDecodeError,
+    attempt: int,
+    max_retries: int,
+    context_name: str,
+    raw_content: str,
+) -> None:
+    """Log une erreur de parsing JSON (warning, ou error détaillé au dernier essai).
+
+    Args:
+        error: Erreur de parsing (error.doc = JSON extrait, error.pos = offset
+            dans ce JSON).
+        attempt: Numéro de la tentative (1-indexé).
+        max_retries: Nombre max de tentatives.
+        context_name: Nom pour le contexte des logs.
+        raw_content: Réponse brute du LLM (avant extraction du JSON).
+    """
+    error_pos = error.pos
+    if attempt < max_retries:
+        # Tentative intermédiaire : log warning (sans extrait)
+        logger.warning(
+            "[WARNING] Erreur parsing JSON (tentative %d/%d): %s\n"
+            "   Context: %s\n"
+            "   Position erreur: %d",
+            attempt,
+            max_retries,
+            error,
+            context_name,
+            error_pos,
+        )
+    elif logger.isEnabledFor(logging.ERROR):
+        # Dernière tentative : log error complet avec contexte (±200 chars
+        # autour de la position, qui est un offset dans le JSON extrait)
+        json_str = error.doc
+        context = json_str[max(0, error_pos - 200) : error_pos + 200]
+        logger.error(
+            "[ERROR] Erreur parsing JSON après %d tentatives : %s\n"
+            "   Context: %s\n"
+            "   Taille JSON extrait: %d chars (réponse brute: %d chars)\n"
+            "   Position erreur (dans le JSON extrait): %d\n"
+            "   Contexte (±200 chars):\n"
+            "   >>> %s <<<\n"
+            "   Réponse brute (premières 2000 chars):\n"
+            "   %.2000s",
+            max_retries,
+            error,
+            context_name,
+            len(json_str),
+            len(raw_content),
+            error_pos,
+            context,
+            raw_content,
+        )
+
+
 # Registry des clients LLM - ajouter un nouveau provider = 1 ligne
 CLIENT_REGISTRY: dict[str, type[LLMClient]] = {
     "openai": OpenAIClient,
@@ -45,6 +165,54 @@ CLIENT_REGISTRY: dict[str, type[LLMClient]] = {
     "mistral": MistralClient,
 }
 
+# Clés positionnelles d'une requête batch_call (le reste = kwargs LLM)
+_BATCH_REQUIRED_KEYS = frozenset({"provider", "messages", "model"})
+
+
+@dataclass(slots=True, frozen=True)
+class BatchRequest:
+    """Requête d'appel LLM pour batch_call().
+
+    Attributes:
+        provider: Provider à utiliser (openai/anthropic/mistral)
+        messages: Messages à envoyer
+        model: Modèle spécifique (None = défaut du provider)
+        kwargs: Paramètres additionnels transmis à l'API (temperature, etc.)
+    """
+
+    provider: str
+    messages: list[dict[str, str]]
+    model: str | None = None
+    kwargs: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, request: dict[str, Any]) -> "BatchRequest":
+        """Construit une BatchRequest depuis le format dict historique.
+
+        Les métadonnées internes (clés commençant par _) servent au
+        post-processing et ne sont pas transmises aux APIs.
+
+        Args:
+            request: Dict avec provider, messages, model (optionnel) et kwargs.
+
+        Returns:
+            BatchRequest équivalente.
+
+        Raises:
+            KeyError: Si provider ou messages est absent.
+        """
+        return cls(
+            provider=request["provider"],
+            messages=request["messages"],
+            model=request.get("model"),
+            kwargs={
+                k: v
+                for k, v in request.items()
+                if k not in _BATCH_REQUIRED_KEYS and not k.startswith("_")
+            },
+        )
+
+
 # Mapping provider -> (attribut settings, variable d'environnement)
 _API_KEY_MAP: dict[str, tuple[str, str]] = {
     "openai": ("openai_api_key", "OPENAI_API_KEY"),
@@ -57,7 +225,7 @@ class LLMManager:
     """Gestionnaire centralisé pour les appels LLM.
 
     Features:
-    - Retry automatique avec backoff exponentiel
+    - Retry automatique avec backoff exponentiel (boucle inline dans call())
     - Rate limiting par provider
     - Batch processing avec parallélisation contrôlée
     - Wrappers synchrones pour notebooks/scripts
@@ -65,22 +233,69 @@ class LLMManager:
 
     def __init__(self):
         """Initialise le manager avec les clients et rate limiters partagés."""
-        # Clients LLM (lazy initialization via registry)
-        self._clients: dict[str, LLMClient] = {}
+        settings = get_settings()
+
+        # Settings lus sur le chemin chaud, copiés une fois en attributs
+        # Retry réseau : au moins une tentative, backoff exponentiel borné
+        self._max_attempts = max(1, settings.max_retries)
+        self._backoff_factor = settings.backoff_factor
+        self._show_prompt = settings.show_prompt
+
+        # Clients LLM instanciés une fois pour chaque provider dont la clé est
+        # configurée (les autres lèvent ConfigurationError à l'appel)
+        self._clients: dict[str, LLMClient] = {
+            name: client_class()
+            for name, client_class in CLIENT_REGISTRY.items()
+            if getattr(settings, _API_KEY_MAP[name][0], "")
+        }
+
+        # Modèle par défaut résolu une fois par provider (settings figés au runtime)
+        self._resolved_models: dict[str, str] = {
+            name: settings.get_model(name) for name in CLIENT_REGISTRY
+        }
 
         # Rate limiters PARTAGÉS globalement (singleton par provider)
         self.rate_limiters = {
-            "openai": get_shared_rate_limiter("openai", rpm=settings.openai_rpm),
-            "anthropic": get_shared_rate_limiter(
-                "anthropic", rpm=settings.anthropic_rpm
-            ),
-            "mistral": get_shared_rate_limiter("mistral", rpm=settings.mistral_rpm),
+            name: get_shared_rate_limiter(name, rpm=settings.get_rpm(name))
+            for name in CLIENT_REGISTRY
         }
 
+        # Contexte résolu par chaîne provider reçue : (client, rate limiter, modèle)
+        self._provider_ctx: dict[str, tuple[LLMClient, SimpleRateLimiter, str]] = {}
+
         logger.info("LLMManager initialisé avec rate limiters partagés")
 
+    def _resolve_provider(
+        self, provider: str
+    ) -> tuple[LLMClient, SimpleRateLimiter, str]:
+        """Retourne (client, rate limiter, modèle par défaut) pour un provider.
+
+        Le résultat est mis en cache par chaîne reçue (ex: "Mistral" et
+        "mistral" sont résolus une seule fois chacun).
+
+        Args:
+            provider: Nom du provider (casse indifférente)
+
+        Returns:
+            Tuple (client, rate_limiter, default_model)
+
+        Raises:
+            ValueError: Si le provider n'est pas dans le registry
+            ConfigurationError: Si la clé API du provider n'est pas configurée
+        """
+        ctx = self._provider_ctx.get(provider)
+        if ctx is None:
+            provider_lower = provider.lower()
+            ctx = (
+                self._get_client(provider_lower),
+                self.rate_limiters[provider_lower],
+                self._resolved_models[provider_lower],
+            )
+            self._provider_ctx[provider] = ctx
+        return ctx
+
     def _get_client(self, provider: str) -> LLMClient:
-        """Retourne le client pour un provider (lazy init via registry).
+        """Retourne le client pour un provider.
 
         Args:
             provider: Nom du provider (openai, anthropic, mistral)
@@ -90,8 +305,13 @@ class LLMManager:
 
         Raises:
             ValueError: Si le provider n'est pas dans le registry
+            ConfigurationError: Si la clé API du provider n'est pas configurée
         """
         provider_lower = provider.lower()
+        try:
+            return self._clients[provider_lower]
+        except KeyError:
+            pass
 
         if provider_lower not in CLIENT_REGISTRY:
             available = list(CLIENT_REGISTRY.keys())
@@ -99,40 +319,12 @@ class LLMManager:
                 f"Provider '{provider}' non implémenté. Disponibles: {available}"
             )
 
-        if provider_lower not in self._clients:
-            # Vérifier que la clé API est configurée
-            attr, env_var = _API_KEY_MAP[provider_lower]
-            if not getattr(settings, attr, ""):
-                raise ConfigurationError(
-                    f"Clé API {provider_lower} non configurée. "
-                    f"Ajoutez {env_var} dans votre fichier .env"
-                )
+        _, env_var = _API_KEY_MAP[provider_lower]
+        raise ConfigurationError(
+            f"Clé API {provider_lower} non configurée. "
+            f"Ajoutez {env_var} dans votre fichier .env"
+        )
 
-            client_class = CLIENT_REGISTRY[provider_lower]
-            self._clients[provider_lower] = client_class()
-            logger.debug(f"Client {provider_lower} initialisé")
-
-        return self._clients[provider_lower]
-
-    @retry(
-        stop=stop_after_attempt(settings.max_retries),
-        wait=wait_exponential(multiplier=settings.backoff_factor, min=1, max=60),
-        retry=(
-            retry_if_exception_type(
-                (
-                    ConnectionError,
-                    TimeoutError,
-                    httpx.ReadTimeout,
-                    openai.RateLimitError,
-                    openai.APIConnectionError,
-                    anthropic.RateLimitError,
-                    anthropic.APIConnectionError,
-                )
-            )
-            | retry_if_exception(_is_retryable_mistral_error)
-        ),
-        reraise=True,
-    )
     async def call(
         self,
         provider: str,
@@ -142,6 +334,10 @@ class LLMManager:
     ) -> dict:
         """Effectue un appel LLM avec retry et rate limiting.
 
+        Les erreurs réseau / rate limit (voir _is_retryable_error) sont
+        retentées jusqu'à max_retries tentatives, avec un backoff exponentiel
+        (backoff_factor * 2^n secondes, borné entre 1 et 60s).
+
         Args:
             provider: Provider à utiliser (openai/anthropic/mistral)
             messages: Messages à envoyer
@@ -155,80 +351,101 @@ class LLMManager:
             ValueError: Si provider inconnu
             Exception: En cas d'erreur API persistante
         """
-        provider_lower = provider.lower()
-
-        # Sélection du client via registry
-        client = self._get_client(provider_lower)
+        client, limiter, default_model = self._resolve_provider(provider)
 
-        # Rate limiting : attendre jusqu'à pouvoir faire la requête
-        await self.rate_limiters[provider_lower].acquire()
+        model = model or default_model
 
-        logger.debug(f"Appel LLM: {provider_lower}/{model or 'default'}")
+        # isEnabledFor est mis en cache par logging (invalidé si le niveau change)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Appel LLM: %s/%s", client.provider_name, model)
 
-        if settings.show_prompt:
+        # json.dumps du prompt complet : seulement si le log sera réellement émis
+        if self._show_prompt and logger.isEnabledFor(logging.DEBUG):
             logger.debug(
                 "Prompt LLM (%d messages):\n%s",
                 len(messages),
                 json.dumps(messages, ensure_ascii=False, indent=2),
             )
 
-        # Override du modèle si fourni
-        if model:
-            kwargs["model"] = model
-
-        # Appel au client (retry géré par @retry decorator)
-        result = await client.call(messages, **kwargs)
+        kwargs["model"] = model
 
-        return result
+        attempt = 1
+        while True:
+            # Rate limiting : attendre jusqu'à pouvoir faire la requête
+            await limiter.acquire()
+            try:
+                return await client.call(messages, **kwargs)
+            except Exception as e:
+                if attempt >= self._max_attempts or not _is_retryable_error(e):
+                    raise
+                delay = min(
+                    _MAX_BACKOFF_SECONDS,
+                    max(1, self._backoff_factor * 2 ** (attempt - 1)),
+                )
+                logger.warning(
+                    "Erreur retryable %s (tentative %d/%d), nouvel essai dans %.1fs",
+                    type(e).__name__,
+                    attempt,
+                    self._max_attempts,
+                    delay,
+                )
+            await asyncio.sleep(delay)
+            attempt += 1
 
     async def batch_call(
         self,
-        requests: list[dict[str, Any]],
+        requests: list[BatchRequest | dict[str, Any]],
         max_concurrent: int = 20,
     ) -> list[dict]:
         """Effectue plusieurs appels LLM en parallèle.
 
         Args:
-            requests: Liste de requêtes, chaque dict contient:
+            requests: Liste de BatchRequest, ou de dicts (convertis une fois) avec:
                 - provider: str
                 - messages: list[dict]
                 - model: str (optionnel)
-                - autres kwargs
+                - autres kwargs (les clés commençant par _ sont ignorées)
             max_concurrent: Nombre max d'appels simultanés
 
         Returns:
             Liste de résultats (même ordre que requests)
             En cas d'erreur individuelle, le dict contient {"error": str}
-        """
-        semaphore = asyncio.Semaphore(max_concurrent)
 
-        async def _call_with_semaphore(request: dict) -> dict:
-            """Wrapper pour appeler call() avec semaphore global de concurrence."""
-            async with semaphore:
+        Raises:
+            KeyError: Si une requête n'a pas de clé provider ou messages
+                (détecté avant tout appel API)
+        """
+        # Normaliser une fois pour tout le batch (dict -> BatchRequest)
+        prepared = [
+            req if isinstance(req, BatchRequest) else BatchRequest.from_dict(req)
+            for req in requests
+        ]
+        results: list[dict | None] = [None] * len(prepared)
+
+        # Pool de max_concurrent workers qui consomment une file partagée :
+        # seules max_concurrent coroutines existent, quelle que soit la taille du batch.
+        # (itérateur partagé sans verrou : l'event loop est mono-thread)
+        pending = iter(enumerate(prepared))
+
+        async def _worker() -> None:
+            """Traite les requêtes de la file jusqu'à épuisement."""
+            for idx, req in pending:
                 try:
-                    # Extraire les paramètres requis
-                    provider = request.pop("provider")
-                    messages = request.pop("messages")
-
-                    # Filtrer les métadonnées internes (clés commençant par _)
-                    # Elles sont utilisées pour le post-processing mais ne doivent pas être passées aux APIs
-                    llm_kwargs = {
-                        k: v for k, v in request.items() if not k.startswith("_")
-                    }
-
                     # Appel avec rate limiting automatique
-                    return await self.call(provider, messages, **llm_kwargs)
+                    results[idx] = await self.call(
+                        req.provider, req.messages, req.model, **req.kwargs
+                    )
                 except Exception as e:
-                    logger.error(f"Erreur batch call: {type(e).__name__} - {str(e)}")
-                    return {"error": str(e), "error_type": type(e).__name__}
+                    logger.error("Erreur batch call: %s - %s", type(e).__name__, e)
+                    results[idx] = {"error": str(e), "error_type": type(e).__name__}
 
-        # Lancer tous les appels en parallèle
-        tasks = [_call_with_semaphore(req.copy()) for req in requests]
-        results = await asyncio.gather(*tasks, return_exceptions=False)
+        nb_workers = min(max_concurrent, len(prepared))
+        await asyncio.gather(*(_worker() for _ in range(nb_workers)))
 
         logger.info(
-            f"Batch call terminé: {len(results)} requêtes "
-            f"({sum(1 for r in results if 'error' not in r)} succès)"
+            "Batch call terminé: %d requêtes (%d succès)",
+            len(results),
+            sum(1 for r in results if "error" not in r),
         )
 
         return results
@@ -250,7 +467,7 @@ class LLMManager:
         - Préparation des kwargs selon le provider (response_format pour OpenAI/Mistral)
         - Boucle de retry en cas d'erreur de parsing JSON
         - Extraction du JSON depuis markdown (gestion des délimiteurs ```json```)
-        - Parsing avec json.loads()
+        - Parsing avec orjson (fallback json.loads())
         - Logging détaillé des erreurs
 
         Args:
@@ -270,118 +487,88 @@ class LLMManager:
             RuntimeError: Si toutes les tentatives de parsing échouent
             Exception: Autres erreurs LLM
         """
-        import json
-
         # Préparer kwargs selon le provider
         # OpenAI et Mistral supportent response_format pour forcer JSON valide
-        provider_lower = provider.lower()
         llm_kwargs = dict(kwargs)  # Copie pour ne pas modifier l'original
 
-        if provider_lower in ["openai", "mistral"]:
+        if provider.lower() in _JSON_FORMAT_PROVIDERS:
             # Ajouter response_format si pas déjà présent
-            if "response_format" not in llm_kwargs:
-                llm_kwargs["response_format"] = {"type": "json_object"}
+            llm_kwargs.setdefault("response_format", _JSON_RESPONSE_FORMAT)
 
-        # Boucle de retry pour gérer les erreurs JSONDecodeError
-        parsed_data = None
-        last_error = None
-        retry_count = 0
-
-        for attempt in range(max_retries):
-            retry_count = attempt + 1
-
-            if attempt > 0:
-                logger.warning(f"Retry {retry_count}/{max_retries} pour {context_name}")
+        # Réponse brute de la dernière tentative, pour le log d'erreur
+        last_content = ""
 
+        async def _attempt() -> tuple[dict, dict]:
+            nonlocal last_content
+            # Appel LLM (retry réseau déjà géré par call())
+            response = await self.call(
+                provider=provider, messages=messages, model=model, **llm_kwargs
+            )
+            content = last_content = response.get("content", "")
             try:
-                # Appel LLM (retry réseau déjà géré par @retry decorator)
-                response = await self.call(
-                    provider=provider, messages=messages, model=model, **llm_kwargs
-                )
-
-                # Extraire le contenu
-                content = response.get("content", "")
-
+                return _extract_and_parse_json(content), response
+            except json.JSONDecodeError:
                 # Log pour debug si contenu vide
-                if not content or content.strip() == "":
+                if not content or content.isspace():
                     logger.warning(
-                        f"[WARNING] Contenu vide retourné par le LLM pour {context_name}\n"
-                        f"   Model: {response.get('model')}\n"
-                        f"   Tokens: {response.get('total_tokens')}"
+                        "[WARNING] Contenu vide retourné par le LLM pour %s\n"
+                        "   Model: %s\n"
+                        "   Tokens: %s",
+                        context_name,
+                        response.get("model"),
+                        response.get("total_tokens"),
                     )
-
-                # Extraire le JSON (au cas où le LLM ajoute du texte autour)
-                # Cherche les délimiteurs ```json ... ```
-                if "```json" in content:
-                    start = content.find("```json") + 7
-                    end = content.find("```", start)
-                    json_str = content[start:end].strip()
-                elif "```" in content:
-                    start = content.find("```") + 3
-                    end = content.find("```", start)
-                    json_str = content[start:end].strip()
-                else:
-                    json_str = content.strip()
-
-                # Parser le JSON
-                parsed_data = json.loads(json_str)
-
-                # Succès : sortir de la boucle
-                if retry_count > 1:
-                    logger.info(
-                        f"Succès au retry {retry_count}/{max_retries} pour {context_name}"
+                raise
+
+        # Fast path : la grande majorité des réponses parse au premier essai
+        retry_count = 1
+        try:
+            parsed_data, response = await _attempt()
+        except json.JSONDecodeError as e:
+            # Slow path : nouvelles tentatives jusqu'à max_retries
+            _log_json_error(e, retry_count, max_retries, context_name, last_content)
+            last_error = e
+            while retry_count < max_retries:
+                retry_count += 1
+                logger.warning(
+                    "Retry %d/%d pour %s", retry_count, max_retries, context_name
+                )
+                try:
+                    parsed_data, response = await _attempt()
+                    break
+                except json.JSONDecodeError as retry_error:
+                    _log_json_error(
+                        retry_error,
+                        retry_count,
+                        max_retries,
+                        context_name,
+                        last_content,
                     )
+                    last_error = retry_error
+            else:
+                logger.error(
+                    "[ERROR] Échec définitif pour %s après %d tentatives",
+                    context_name,
+                    max_retries,
+                )
+                raise RuntimeError(
+                    f"JSON parsing failed after {max_retries} retries for {context_name}: {str(last_error)}"
+                ) from None
+            logger.info(
+                "Succès au retry %d/%d pour %s", retry_count, max_retries, context_name
+            )
 
-                # Ajouter retry_count aux métadonnées
-                response["retry_count"] = retry_count
-
-                # Normalize token field names (different providers use different names)
-                # prompt_tokens -> input_tokens, completion_tokens -> output_tokens
-                if "prompt_tokens" in response and "input_tokens" not in response:
-                    response["input_tokens"] = response["prompt_tokens"]
-                if "completion_tokens" in response and "output_tokens" not in response:
-                    response["output_tokens"] = response["completion_tokens"]
-
-                return parsed_data, response
-
-            except json.JSONDecodeError as e:
-                # Sauvegarder l'erreur pour logging final si toutes les tentatives échouent
-                last_error = e
-
-                # Afficher plus de contexte autour de l'erreur
-                if "content" in locals():
-                    error_pos = e.pos if hasattr(e, "pos") else 0
-                    context_start = max(0, error_pos - 200)
-                    context_end = min(len(content), error_pos + 200)
-                    context = content[context_start:context_end]
-
-                    if attempt < max_retries - 1:
-                        # Tentative intermédiaire : log warning
-                        logger.warning(
-                            f"[WARNING] Erreur parsing JSON (tentative {retry_count}/{max_retries}): {e}\n"
-                            f"   Context: {context_name}\n"
-                            f"   Position erreur: {error_pos}"
-                        )
-                    else:
-                        # Dernière tentative : log error complet
-                        logger.error(
-                            f"[ERROR] Erreur parsing JSON après {max_retries} tentatives : {e}\n"
-                            f"   Context: {context_name}\n"
-                            f"   Taille contenu: {len(content)} chars\n"
-                            f"   Position erreur: {error_pos}\n"
-                            f"   Contexte (±200 chars):\n"
-                            f"   >>> {context} <<<\n"
-                            f"   Contenu complet (premières 2000 chars):\n"
-                            f"   {content[:2000]}"
-                        )
-
-        # Si toutes les tentatives ont échoué
-        logger.error(
-            f"[ERROR] Échec définitif pour {context_name} après {max_retries} tentatives"
-        )
-        raise RuntimeError(
-            f"JSON parsing failed after {max_retries} retries for {context_name}: {str(last_error)}"
-        )
+        # Ajouter retry_count aux métadonnées
+        response["retry_count"] = retry_count
+
+        # Normalize token field names (different providers use different names)
+        # prompt_tokens -> input_tokens, completion_tokens -> output_tokens
+        if "prompt_tokens" in response and "input_tokens" not in response:
+            response["input_tokens"] = response["prompt_tokens"]
+        if "completion_tokens" in response and "output_tokens" not in response:
+            response["output_tokens"] = response["completion_tokens"]
+
+        return parsed_data, response
 
     # ========== Wrappers synchrones pour notebooks/scripts ==========
 
@@ -410,7 +597,7 @@ class LLMManager:
 
     def batch_call_sync(
         self,
-        requests: list[dict[str, Any]],
+        requests: list[BatchRequest | dict[str, Any]],
         max_concurrent: int = 20,
     ) -> list[dict]:
         """Version synchrone de batch_call().
@@ -4,24 +4,81 @@ Ce module définit les structures de données pour tracker les appels LLM
 et un collector pour les agréger et les exporter vers DuckDB.
 """
 
+import asyncio
+import atexit
 import logging
-from datetime import UTC, datetime
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import duckdb
-from pydantic import BaseModel, Field
 
 from src.core.constants import DATA_LLM_METRICS_DIR, DB_LLM_METRICS
+from src.llm.config import get_settings
+
+if TYPE_CHECKING:
+    import pandas
+    import pyarrow
 
 logger = logging.getLogger(__name__)
 
+# Insertion colonne par colonne (ordre = schéma de la table llm_metrics)
+_INSERT_COLUMNS_SQL = """
+    INSERT INTO llm_metrics SELECT
+        UNNEST($1::TIMESTAMP[]),
+        UNNEST($2::VARCHAR[]),
+        UNNEST($3::VARCHAR[]),
+        UNNEST($4::INTEGER[]),
+        UNNEST($5::INTEGER[]),
+        UNNEST($6::INTEGER[]),
+        UNNEST($7::DOUBLE[]),
+        UNNEST($8::BOOLEAN[]),
+        UNNEST($9::VARCHAR[]),
+        UNNEST($10::DOUBLE[])
+"""
 
-class LLMCallMetrics(BaseModel):
+# Résumé par provider, entièrement calculé par DuckDB (arrondis et défauts inclus)
+_SUMMARY_SQL = """
+    SELECT
+        provider,
+        COUNT(*) AS total_calls,
+        COUNT(*) FILTER (WHERE success) AS successful_calls,
+        COUNT(*) FILTER (WHERE NOT success) * 100.0 / COUNT(*) AS error_rate,
+        SUM(prompt_tokens) AS prompt_tokens,
+        SUM(completion_tokens) AS completion_tokens,
+        SUM(total_tokens) AS total_tokens,
+        ROUND(COALESCE(AVG(latency_ms), 0), 2) AS avg_latency_ms,
+        ROUND(COALESCE(SUM(cost_usd), 0), 4) AS total_cost_usd
+    FROM llm_metrics
+    GROUP BY provider
+    ORDER BY provider
+"""
+_SUMMARY_FIELDS = (
+    "total_calls",
+    "successful_calls",
+    "error_rate",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "avg_latency_ms",
+    "total_cost_usd",
+)
+
+
+@dataclass(slots=True, kw_only=True)
+class LLMCallMetrics:
     """Métriques d'un appel LLM individuel.
 
+    Simple dataclass (pas de validation pydantic) : construite à chaque appel
+    LLM à partir des compteurs renvoyés par les SDK.
+
     Attributes:
-        timestamp: Horodatage de l'appel
+        timestamp: Horodatage de l'appel (UTC)
         provider: Provider utilisé (openai/anthropic/mistral)
         model: Nom du modèle
         prompt_tokens: Nombre de tokens du prompt
@@ -33,21 +90,16 @@ class LLMCallMetrics(BaseModel):
         cost_usd: Coût estimé en USD
     """
 
-    timestamp: datetime = Field(
-        default_factory=lambda: datetime.now(UTC),
-        description="Horodatage de l'appel (UTC)",
-    )
-    provider: str = Field(..., description="Provider (openai/anthropic/mistral)")
-    model: str = Field(..., description="Nom du modèle")
-    prompt_tokens: int = Field(default=0, ge=0, description="Tokens du prompt")
-    completion_tokens: int = Field(
-        default=0, ge=0, description="Tokens de la complétion"
-    )
-    total_tokens: int = Field(default=0, ge=0, description="Total tokens")
-    latency_ms: float = Field(default=0.0, ge=0, description="Latence en ms")
-    success: bool = Field(..., description="Succès de l'appel")
-    error_type: str | None = Field(default=None, description="Type d'erreur")
-    cost_usd: float | None = Field(default=None, ge=0, description="Coût en USD")
+    timestamp: datetime = field(default_factory=lambda: datetime.now(UTC))
+    provider: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    latency_ms: float = 0.0
+    success: bool
+    error_type: str | None = None
+    cost_usd: float | None = None
 
 
 class MetricsCollector:
@@ -74,17 +126,55 @@ class MetricsCollector:
         if not self._initialized:
             self.db_path = db_path or DB_LLM_METRICS
             self._metrics: list[LLMCallMetrics] = []
+            # Connexion persistante (ouverte à la demande), protégée par un lock
+            self._conn: duckdb.DuckDBPyConnection | None = None
+            self._lock = threading.Lock()
+            # Cache du résumé : (instant monotonic du calcul, résumé)
+            self._summary_cache: tuple[float, dict] | None = None
+            # Export automatique (taille du buffer ou délai depuis le dernier
+            # export, seuils lus dans les settings à chaque collecte)
+            self._last_flush = time.monotonic()
+            self._flush_pending = False
             self._ensure_db_exists()
+            atexit.register(self.close)
             MetricsCollector._initialized = True
             logger.info(f"MetricsCollector initialisé avec DB: {self.db_path}")
 
+    @contextmanager
+    def _get_conn(self) -> Generator[duckdb.DuckDBPyConnection]:
+        """Connexion persistante protégée par un lock.
+
+        Crée la connexion au premier appel, puis la réutilise.
+        Le lock est maintenu pendant toute la durée du bloc `with`.
+
+        Yields:
+            Connexion DuckDB du collector.
+        """
+        with self._lock:
+            if self._conn is None:
+                self._conn = duckdb.connect(str(self.db_path))
+                logger.debug("Connexion metrics ouverte: %s", self.db_path)
+            yield self._conn
+
+    def close(self) -> None:
+        """Exporte le buffer restant puis ferme la connexion DuckDB (flush WAL).
+
+        Appelé via atexit.
+        """
+        if self._metrics:
+            self.export_to_duckdb()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
     def _ensure_db_exists(self) -> None:
         """Crée le répertoire et la table si nécessaire."""
         # Créer le répertoire
         DATA_LLM_METRICS_DIR.mkdir(parents=True, exist_ok=True)
 
         # Créer la table si elle n'existe pas
-        with duckdb.connect(str(self.db_path)) as conn:
+        with self._get_conn() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS llm_metrics (
                     timestamp TIMESTAMP,
@@ -104,107 +194,167 @@ class MetricsCollector:
     def collect(self, metric: LLMCallMetrics) -> None:
         """Collecte une métrique.
 
+        Déclenche un export vers DuckDB quand le buffer atteint
+        `metrics_flush_rows` ou que `metrics_flush_seconds` sont écoulées
+        depuis le dernier export.
+
         Args:
             metric: Métrique à collecter
         """
         self._metrics.append(metric)
         logger.debug(
-            f"Métrique collectée: {metric.provider}/{metric.model} - "
-            f"{metric.total_tokens} tokens - {metric.latency_ms:.0f}ms - "
-            f"Success: {metric.success}"
+            "Métrique collectée: %s/%s - %d tokens - %.0fms - Success: %s",
+            metric.provider,
+            metric.model,
+            metric.total_tokens,
+            metric.latency_ms,
+            metric.success,
         )
+        if self._flush_pending:
+            return
+        settings = get_settings()
+        if (
+            len(self._metrics) >= settings.metrics_flush_rows
+            or time.monotonic() - self._last_flush >= settings.metrics_flush_seconds
+        ):
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Lance l'export du buffer, hors de la boucle asyncio si elle tourne."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.export_to_duckdb()
+            return
+
+        self._flush_pending = True
+        future = loop.run_in_executor(None, self.export_to_duckdb)
+        future.add_done_callback(self._on_flush_done)
+
+    def _on_flush_done(self, future: asyncio.Future) -> None:
+        """Callback de fin d'export en arrière-plan."""
+        self._flush_pending = False
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(
+                "Export automatique des métriques échoué: %s", future.exception()
+            )
 
     def export_to_duckdb(self) -> None:
         """Exporte toutes les métriques collectées vers DuckDB."""
-        if not self._metrics:
+        self._last_flush = time.monotonic()
+        # Détacher le buffer : les métriques collectées pendant l'export
+        # (export en thread) vont dans le nouveau buffer
+        batch, self._metrics = self._metrics, []
+        if not batch:
             logger.info("Aucune métrique à exporter")
             return
 
-        with duckdb.connect(str(self.db_path)) as conn:
-            # Convertir les métriques en liste de tuples
-            data = [
-                (
-                    m.timestamp,
-                    m.provider,
-                    m.model,
-                    m.prompt_tokens,
-                    m.completion_tokens,
-                    m.total_tokens,
-                    m.latency_ms,
-                    m.success,
-                    m.error_type,
-                    m.cost_usd,
-                )
-                for m in self._metrics
-            ]
-
-            # Insertion batch
-            conn.executemany(
-                """
-                INSERT INTO llm_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                data,
+        # Transposer en colonnes : une seule requête vectorisée (UNNEST des
+        # listes) au lieu d'un bind de paramètres par ligne avec executemany
+        columns = [
+            list(column)
+            for column in zip(
+                *(
+                    (
+                        m.timestamp,
+                        m.provider,
+                        m.model,
+                        m.prompt_tokens,
+                        m.completion_tokens,
+                        m.total_tokens,
+                        m.latency_ms,
+                        m.success,
+                        m.error_type,
+                        m.cost_usd,
+                    )
+                    for m in batch
+                ),
+                strict=True,
             )
+        ]
 
-        logger.info(f"{len(self._metrics)} métriques exportées vers DuckDB")
-        self._metrics.clear()
+        with self._get_conn() as conn:
+            conn.execute(_INSERT_COLUMNS_SQL, columns)
+
+        logger.info(f"{len(batch)} métriques exportées vers DuckDB")
+        self._summary_cache = None
 
     def get_summary(self) -> dict:
         """Retourne un résumé des métriques stockées en DB.
 
+        Le résultat est mis en cache pendant `metrics_cache_ttl_seconds`
+        (invalidé à chaque écriture en DB par le collector).
+
         Returns:
             dict avec statistiques agrégées par provider
         """
-        with duckdb.connect(str(self.db_path)) as conn:
-            result = conn.execute("""
-                SELECT
-                    provider,
-                    COUNT(*) as total_calls,
-                    SUM(CASE WHEN success THEN 1 ELSE 0 END) as successful_calls,
-                    SUM(prompt_tokens) as prompt_tokens,
-                    SUM(completion_tokens) as completion_tokens,
-                    SUM(total_tokens) as total_tokens,
-                    AVG(latency_ms) as avg_latency_ms,
-                    SUM(cost_usd) as total_cost_usd
-                FROM llm_metrics
-                GROUP BY provider
-                ORDER BY provider
-            """).fetchall()
-
-            summary = {}
-            for row in result:
-                (
-                    provider,
-                    total,
-                    success,
-                    prompt_tok,
-                    completion_tok,
-                    total_tok,
-                    latency,
-                    cost,
-                ) = row
-                summary[provider] = {
-                    "total_calls": total,
-                    "successful_calls": success,
-                    "error_rate": ((total - success) / total * 100 if total > 0 else 0),
-                    "prompt_tokens": prompt_tok,
-                    "completion_tokens": completion_tok,
-                    "total_tokens": total_tok,
-                    "avg_latency_ms": round(latency, 2) if latency else 0,
-                    "total_cost_usd": round(cost, 4) if cost else 0,
-                }
-
-            return summary
+        cached = self._summary_cache
+        ttl = get_settings().metrics_cache_ttl_seconds
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+        with self._get_conn() as conn:
+            rows = conn.execute(_SUMMARY_SQL).fetchall()
+
+        summary = {
+            provider: dict(zip(_SUMMARY_FIELDS, stats, strict=True))
+            for provider, *stats in rows
+        }
+        self._summary_cache = (time.monotonic(), summary)
+        return summary
+
+    def get_summary_arrow(self) -> "pyarrow.Table":
+        """Retourne le résumé par provider sous forme de table Arrow.
+
+        Même requête que get_summary(), sans conversion en objets Python
+        (une ligne par provider, colonne `provider` incluse). Nécessite
+        pyarrow, qui n'est pas une dépendance du projet.
+
+        Returns:
+            Table Arrow du résumé
+        """
+        with self._get_conn() as conn:
+            return conn.execute(_SUMMARY_SQL).fetch_arrow_table()
+
+    def get_summary_df(self) -> "pandas.DataFrame":
+        """Retourne le résumé par provider sous forme de DataFrame pandas.
+
+        Nécessite pandas, qui n'est pas une dépendance du projet.
+
+        Returns:
+            DataFrame du résumé (une ligne par provider)
+        """
+        with self._get_conn() as conn:
+            return conn.execute(_SUMMARY_SQL).df()
 
     def clear_metrics(self) -> None:
         """Vide les métriques en mémoire (pas la DB)."""
         self._metrics.clear()
         logger.info("Métriques en mémoire vidées")
 
+    def cleanup_older_than(self, days: int) -> int:
+        """Supprime de la DB les métriques plus anciennes que `days` jours.
+
+        Args:
+            days: Durée de rétention en jours
+
+        Returns:
+            Nombre de métriques supprimées
+        """
+        cutoff = datetime.now(UTC) - timedelta(days=days)
+        with self._get_conn() as conn:
+            (deleted,) = conn.execute(
+                "DELETE FROM llm_metrics WHERE timestamp < ?::TIMESTAMP", [cutoff]
+            ).fetchone()
+        self._summary_cache = None
+        logger.info("%d métriques de plus de %d jours supprimées", deleted, days)
+        return deleted
+
     def reset_db(self) -> None:
         """Supprime toutes les métriques de la DB (use with caution)."""
-        with duckdb.connect(str(self.db_path)) as conn:
+        with self._get_conn() as conn:
             conn.execute("DELETE FROM llm_metrics")
+        self._summary_cache = None
         logger.warning("Toutes les métriques DB supprimées")
 
 
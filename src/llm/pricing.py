@@ -6,11 +6,20 @@ Unifie la logique de pricing pour tous les providers (OpenAI, Anthropic, Mistral
 
 import logging
 import re
+from functools import lru_cache
 
-from src.llm.config import settings as llm_settings
+from src.llm.config import PricingTable, get_settings
 
 logger = logging.getLogger(__name__)
 
+# Suffixe de date des modèles Anthropic (ex: claude-haiku-4-5-20251001)
+_ANTHROPIC_DATE_RE = re.compile(r"-\d{8}$")
+
+# Tarif des tokens du cache de prompt, relatif au prix d'input
+# (Anthropic : lecture 0.1x, écriture avec TTL de 5 minutes 1.25x)
+_CACHE_READ_PRICE_RATIO = 0.1
+_CACHE_WRITE_PRICE_RATIO = 1.25
+
 
 class PricingCalculator:
     """Calculateur de coûts unifié pour tous les providers.
@@ -18,25 +27,35 @@ class PricingCalculator:
     Gère les variantes de noms de modèles et les fallbacks intelligents.
     """
 
-    def __init__(self, provider: str, pricing_config: dict[str, tuple[float, float]]):
+    def __init__(self, provider: str, pricing_config: PricingTable):
         """Initialise le calculateur de coûts.
 
         Args:
             provider: Nom du provider (openai, anthropic, mistral)
-            pricing_config: Dict {model: (input_price_per_1M, output_price_per_1M)}
+            pricing_config: Mapping {model: (input_price_per_1M, output_price_per_1M)}
         """
         self.provider = provider
         self.pricing = pricing_config
+        # Cache modèle -> pricing résolu (la table est immuable), pré-rempli
+        # avec les noms exacts : seules les variantes passent par la résolution
+        self._price_cache: dict[str, tuple[float, float] | None] = dict(pricing_config)
 
     def calculate(
-        self, model: str, prompt_tokens: int, completion_tokens: int
+        self,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
     ) -> float:
         """Calcule le coût en USD d'un appel LLM.
 
         Args:
             model: Nom du modèle (peut contenir date/version)
-            prompt_tokens: Nombre de tokens d'input
+            prompt_tokens: Nombre de tokens d'input (hors cache de prompt)
             completion_tokens: Nombre de tokens d'output
+            cache_read_tokens: Tokens d'input lus dans le cache de prompt
+            cache_write_tokens: Tokens d'input écrits dans le cache de prompt
 
         Returns:
             Coût en USD (arrondi à 6 décimales)
@@ -50,12 +69,32 @@ class PricingCalculator:
             return 0.0
 
         input_price, output_price = price
-        cost = (prompt_tokens * input_price / 1_000_000) + (
+        input_tokens = (
+            prompt_tokens
+            + cache_read_tokens * _CACHE_READ_PRICE_RATIO
+            + cache_write_tokens * _CACHE_WRITE_PRICE_RATIO
+        )
+        cost = (input_tokens * input_price / 1_000_000) + (
             completion_tokens * output_price / 1_000_000
         )
         return round(cost, 6)
 
     def _find_price(self, model: str) -> tuple[float, float] | None:
+        """Retourne le pricing d'un modèle, résolu une seule fois par nom.
+
+        Args:
+            model: Nom du modèle
+
+        Returns:
+            Tuple (input_price, output_price) ou None si non trouvé
+        """
+        try:
+            return self._price_cache[model]
+        except KeyError:
+            price = self._price_cache[model] = self._resolve_price(model)
+            return price
+
+    def _resolve_price(self, model: str) -> tuple[float, float] | None:
         """Recherche intelligente du pricing selon le provider.
 
         Gère les variantes de noms de modèles :
@@ -70,9 +109,10 @@ class PricingCalculator:
             Tuple (input_price, output_price) ou None si non trouvé
         """
         if self.provider == "anthropic":
-            # Strip YYYYMMDD suffix
-            model_base = re.sub(r"-\d{8}$", "", model)
-            return self.pricing.get(model_base)
+            # Strip YYYYMMDD suffix (trop court pour en porter un : lookup direct)
+            if len(model) < 9:
+                return self.pricing.get(model)
+            return self.pricing.get(_ANTHROPIC_DATE_RE.sub("", model))
 
         elif self.provider == "openai":
             # Essayer plusieurs variantes
@@ -90,11 +130,27 @@ class PricingCalculator:
             return self.pricing.get(model)
 
 
+@lru_cache(maxsize=8)
+def get_pricing_calculator(provider: str) -> PricingCalculator:
+    """Retourne le calculateur partagé d'un provider (cache des prix inclus).
+
+    Args:
+        provider: Nom du provider (openai, anthropic, mistral), en minuscules.
+
+    Returns:
+        Instance partagée de PricingCalculator.
+
+    Raises:
+        ValueError: Si le provider est inconnu.
+    """
+    return PricingCalculator(provider, get_settings().get_pricing(provider))
+
+
 def estimate_synthese_cost(
     nb_eleves: int,
     avg_input_tokens: int = 2000,
     avg_output_tokens: int = 500,
-    provider: str = llm_settings.default_provider,
+    provider: str | None = None,
     model: str | None = None,
 ) -> dict:
     """Estime le coût de génération de synthèses pour N élèves.
@@ -103,23 +159,22 @@ def estimate_synthese_cost(
         nb_eleves: Nombre d'élèves à traiter.
         avg_input_tokens: Tokens moyens en input par élève (défaut: 2000).
         avg_output_tokens: Tokens moyens en output par élève (défaut: 500).
-        provider: Provider LLM à utiliser.
+        provider: Provider LLM à utiliser (défaut: provider par défaut).
         model: Modèle à utiliser (défaut: modèle par défaut du provider).
 
     Returns:
         Dict avec 'nb_eleves', 'total_tokens', 'cost_usd', 'cost_per_eleve'.
     """
-    from src.llm.config import settings
+    settings = get_settings()
+    provider = provider or settings.default_provider
 
-    # Récupérer le modèle et pricing config
+    # Récupérer le modèle et le calculateur partagé
     try:
         model = model or settings.get_model(provider)
-        pricing_config = settings.get_pricing(provider)
+        calculator = get_pricing_calculator(provider.lower())
     except ValueError:
         return {"error": f"Provider inconnu: {provider}"}
 
-    calculator = PricingCalculator(provider, pricing_config)
-
     # Calculer pour un élève
     cost_per_eleve = calculator.calculate(model, avg_input_tokens, avg_output_tokens)
     total_cost = cost_per_eleve * nb_eleves
@@ -9,6 +9,7 @@ un vrai rate limiting au niveau de l'application.
 
 import asyncio
 import logging
+import threading
 import time
 from collections import deque
 
@@ -16,6 +17,12 @@ logger = logging.getLogger(__name__)
 
 # Stockage global des rate limiters (singleton par provider)
 _GLOBAL_RATE_LIMITERS: dict[str, "SimpleRateLimiter"] = {}
+# Protège la création concurrente (threads) d'un même rate limiter partagé
+_REGISTRY_LOCK = threading.Lock()
+
+# Fenêtre glissante et marge de sécurité, en nanosecondes (arithmétique entière)
+_WINDOW_NS = 60_000_000_000
+_MARGIN_NS = 100_000_000
 
 
 class SimpleRateLimiter:
@@ -26,8 +33,8 @@ class SimpleRateLimiter:
 
     Attributes:
         rpm: Nombre max de requêtes par minute
-        requests: Liste des timestamps des requêtes dans la fenêtre glissante
-        lock: Lock asyncio pour thread-safety
+        requests: Deque des timestamps (ns, time.monotonic_ns) de la fenêtre glissante
+        lock: Lock asyncio pour thread-safety (jamais tenu pendant une attente)
         verbose: Si True, affiche les messages de rate limiting sur stdout (notebooks)
     """
 
@@ -40,8 +47,11 @@ class SimpleRateLimiter:
         """
         self.rpm = rpm
         self.verbose = verbose
-        self.requests: deque[float] = deque()  # timestamps des requêtes (O(1) popleft)
+        self.requests: deque[int] = deque()  # timestamps ns (O(1) popleft)
         self.lock = asyncio.Lock()
+        # Condition sur le même lock : les waiters attendent sans tenir le lock
+        self._cond = asyncio.Condition(self.lock)
+        self._timer_armed = False  # Un waiter attend déjà l'expiration de la tête
 
         logger.info(f"SimpleRateLimiter initialisé: {rpm} RPM (verbose={verbose})")
 
@@ -61,74 +71,16 @@ class SimpleRateLimiter:
 
         Note:
             - Thread-safe grâce au lock asyncio
+            - Le lock ne couvre que la décision d'admission : il est libéré
+              pendant l'attente, les autres coroutines restent admissibles
             - En cas de cancellation, le lock est correctement libéré
             - L'exception CancelledError est loggée puis propagée
         """
-
-        async def _acquire_with_lock():
-            try:
-                async with self.lock:
-                    while True:  # Boucle au lieu de récursion (évite deadlock)
-                        now = time.monotonic()
-
-                        # 1. Nettoyer les requêtes qui sont sorties de la fenêtre de 60s
-                        # Utilise popleft() O(1) au lieu de list comprehension O(n)
-                        while self.requests and now - self.requests[0] >= 60:
-                            self.requests.popleft()
-
-                        # 2. Vérifier si on peut faire la requête
-                        if len(self.requests) >= self.rpm:
-                            # On a atteint la limite, il faut attendre
-                            oldest = self.requests[0]
-                            wait_time = (
-                                60 - (now - oldest) + 0.1
-                            )  # +0.1s marge de sécurité
-
-                            msg = (
-                                f"Rate limit atteint ({self.rpm} RPM): "
-                                f"attente de {wait_time:.1f}s "
-                                f"({len(self.requests)} requêtes dans la fenêtre)"
-                            )
-                            logger.info(msg)
-                            if self.verbose:
-                                print(msg)
-
-                            await asyncio.sleep(wait_time)
-
-                            # Message après l'attente
-                            msg_resume = "Attente terminée, reprise des requêtes (fenêtre libérée)"
-                            logger.info(msg_resume)
-                            if self.verbose:
-                                print(msg_resume)
-
-                            # La boucle va réessayer automatiquement
-                        else:
-                            # 3. OK, on peut faire la requête
-                            self.requests.append(now)
-
-                            # Log pour debug (seulement tous les 10 appels pour éviter spam)
-                            if len(self.requests) % 10 == 0:
-                                logger.debug(
-                                    f"Rate limiter: {len(self.requests)}/{self.rpm} requêtes "
-                                    f"dans la fenêtre de 60s"
-                                )
-
-                            # Sortir de la boucle
-                            break
-            except asyncio.CancelledError:
-                # La tâche a été annulée (via task.cancel() ou timeout global)
-                logger.info(
-                    f"Rate limiter: acquisition annulée "
-                    f"({len(self.requests)}/{self.rpm} requêtes actives)"
-                )
-                # Re-raise pour propager la cancellation
-                raise
-
         # Appliquer le timeout si spécifié
         if timeout:
             try:
                 async with asyncio.timeout(timeout):
-                    await _acquire_with_lock()
+                    await self._acquire_core()
             except TimeoutError:
                 logger.warning(
                     f"Timeout atteint ({timeout}s) en attendant le rate limiter"
@@ -137,7 +89,89 @@ class SimpleRateLimiter:
                     f"Rate limiter timeout après {timeout}s d'attente"
                 ) from None
         else:
-            await _acquire_with_lock()
+            await self._acquire_core()
+
+    async def _acquire_core(self) -> None:
+        """Admet la requête dans la fenêtre glissante, en attendant si besoin."""
+        try:
+            async with self._cond:
+                while True:  # Boucle au lieu de récursion (évite deadlock)
+                    now = time.monotonic_ns()
+
+                    # 1. Nettoyer les requêtes qui sont sorties de la fenêtre de 60s
+                    # Utilise popleft() O(1) au lieu de list comprehension O(n)
+                    while self.requests and now - self.requests[0] >= _WINDOW_NS:
+                        self.requests.popleft()
+
+                    # 2. Vérifier si on peut faire la requête
+                    if len(self.requests) < self.rpm:
+                        break
+
+                    # 3. Limite atteinte : un seul waiter arme le réveil à
+                    # l'expiration de la plus ancienne requête, les autres
+                    # attendent sa notification (lock libéré pendant l'attente)
+                    if self._timer_armed:
+                        await self._cond.wait()
+                        continue
+
+                    oldest = self.requests[0]
+                    wait_time = (_WINDOW_NS - (now - oldest) + _MARGIN_NS) / 1e9
+
+                    if self.verbose or logger.isEnabledFor(logging.INFO):
+                        msg = (
+                            f"Rate limit atteint ({self.rpm} RPM): "
+                            f"attente de {wait_time:.1f}s "
+                            f"({len(self.requests)} requêtes dans la fenêtre)"
+                        )
+                        logger.info(msg)
+                        if self.verbose:
+                            print(msg)
+
+                    self._timer_armed = True
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), wait_time)
+                    except TimeoutError:
+                        pass
+                    except asyncio.CancelledError:
+                        # Passer le relais du réveil à un autre waiter
+                        self._timer_armed = False
+                        self._cond.notify()
+                        raise
+                    finally:
+                        self._timer_armed = False
+
+                    # Message après l'attente
+                    msg_resume = (
+                        "Attente terminée, reprise des requêtes (fenêtre libérée)"
+                    )
+                    logger.info(msg_resume)
+                    if self.verbose:
+                        print(msg_resume)
+
+                    # La boucle va réessayer automatiquement
+
+                # 4. OK, on peut faire la requête
+                self.requests.append(now)
+
+                # Réveiller le waiter suivant : il sera admis s'il reste de
+                # la place, sinon il armera le prochain réveil
+                self._cond.notify()
+
+                # Log pour debug (seulement tous les 10 appels pour éviter spam)
+                if len(self.requests) % 10 == 0:
+                    logger.debug(
+                        "Rate limiter: %d/%d requêtes dans la fenêtre de 60s",
+                        len(self.requests),
+                        self.rpm,
+                    )
+        except asyncio.CancelledError:
+            # La tâche a été annulée (via task.cancel() ou timeout global)
+            logger.info(
+                f"Rate limiter: acquisition annulée "
+                f"({len(self.requests)}/{self.rpm} requêtes actives)"
+            )
+            # Re-raise pour propager la cancellation
+            raise
 
     def get_current_usage(self) -> dict[str, int | float]:
         """Retourne l'usage actuel du rate limiter.
@@ -152,9 +186,15 @@ class SimpleRateLimiter:
         Note:
             Cette méthode n'est pas thread-safe et est destinée au monitoring.
         """
-        now = time.monotonic()
-        # Count active requests without modifying the deque
-        active_count = sum(1 for ts in self.requests if now - ts < 60)
+        now = time.monotonic_ns()
+        # Timestamps triés : seules les entrées de tête peuvent être expirées,
+        # on les compte sans modifier la deque (pas de parcours complet)
+        expired = 0
+        for ts in self.requests:
+            if now - ts < _WINDOW_NS:
+                break
+            expired += 1
+        active_count = len(self.requests) - expired
         available = max(0, self.rpm - active_count)
         usage_pct = (active_count / self.rpm) * 100 if self.rpm > 0 else 0
 
@@ -201,15 +241,22 @@ def get_shared_rate_limiter(
         >>> limiter2 = get_shared_rate_limiter("openai", 500)
         >>> limiter1 is limiter2  # True : même instance
     """
-    if provider not in _GLOBAL_RATE_LIMITERS:
-        # Créer le rate limiter pour ce provider
-        _GLOBAL_RATE_LIMITERS[provider] = SimpleRateLimiter(rpm=rpm, verbose=verbose)
-        logger.info(f"Rate limiter partagé créé pour {provider}: {rpm} RPM (singleton)")
-    else:
-        # Déjà existant, ne pas recréer
-        logger.debug(f"Réutilisation du rate limiter partagé existant pour {provider}")
-
-    return _GLOBAL_RATE_LIMITERS[provider]
+    with _REGISTRY_LOCK:
+        limiter = _GLOBAL_RATE_LIMITERS.get(provider)
+        if limiter is None:
+            # Créer le rate limiter pour ce provider
+            limiter = SimpleRateLimiter(rpm=rpm, verbose=verbose)
+            _GLOBAL_RATE_LIMITERS[provider] = limiter
+            logger.info(
+                f"Rate limiter partagé créé pour {provider}: {rpm} RPM (singleton)"
+            )
+        else:
+            # Déjà existant, ne pas recréer
+            logger.debug(
+                f"Réutilisation du rate limiter partagé existant pour {provider}"
+            )
+
+    return limiter
 
 
 def reset_all_rate_limiters() -> None:
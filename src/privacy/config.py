@@ -5,6 +5,8 @@ Elle ne doit JAMAIS être partagée, synchronisée ou backupée sur le cloud.
 Seule chiron.duckdb (données pseudonymisées) peut être partagée.
 """
 
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings
 
 from src.core.constants import DATA_DIR
@@ -20,10 +22,33 @@ class PrivacySettings(BaseSettings):
 
     pseudonym_prefix: str = "ELEVE_"
     mapping_table: str = "mapping_identites"
+    # Compteur des identifiants attribués (jamais réutilisés après suppression)
+    counter_table: str = "eleve_counters"
     # Base séparée pour les données sensibles (vrais noms)
     db_path: str = str(DATA_DIR / "db" / "privacy.duckdb")
 
     model_config = {"env_prefix": "CHIRON_PRIVACY_"}
 
 
-privacy_settings = PrivacySettings()
+@lru_cache(maxsize=1)
+def get_privacy_settings() -> PrivacySettings:
+    """Retourne l'instance partagée des settings privacy.
+
+    Construite au premier appel seulement (lecture de l'environnement +
+    validation). Les tests peuvent réinitialiser le cache via
+    get_privacy_settings.cache_clear().
+
+    Returns:
+        Instance partagée de PrivacySettings.
+    """
+    return PrivacySettings()
+
+
+def __getattr__(name: str):
+    """Compatibilité : `from src.privacy.config import privacy_settings` reste supporté.
+
+    L'attribut module `privacy_settings` est résolu paresseusement.
+    """
+    if name == "privacy_settings":
+        return get_privacy_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,19 +5,35 @@ in DuckDB for later depseudonymization when needed.
 """
 
 import logging
+import re
 import threading
-from collections.abc import Generator
-from contextlib import contextmanager
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple
 
 import duckdb
 
 from src.core.exceptions import PrivacyError
 from src.core.utils import normalize_name
-from src.privacy.config import privacy_settings
+from src.privacy.config import get_privacy_settings
 
 logger = logging.getLogger(__name__)
 
+# (eleve_id, nom_original, prenom_original, classe_id, created_at)
+type MappingRow = tuple[str, str, str | None, str, datetime]
+
+
+class _MappingCache(NamedTuple):
+    """Snapshot en mémoire de la table de mapping."""
+
+    rows: list[MappingRow]  # Toutes les lignes, ordre created_at
+    by_classe: dict[str, list[MappingRow]]
+    by_eleve: dict[str, MappingRow]
+    # {classe_id (None = toutes): {eleve_id: nom affiché}}, rempli à la demande
+    replacements: dict[str | None, dict[str, str]]
+
 
 class Pseudonymizer:
     """Handles pseudonymization of student data.
@@ -34,8 +50,21 @@ class Pseudonymizer:
         original = pseudo.depseudonymize("ELEVE_001")
     """
 
+    # _lock ne protège que l'ouverture de la connexion partagée ; les
+    # lectures passent par un curseur par thread, sans sérialisation.
+    # Les écritures restent sérialisées (_write_lock) pour éviter les
+    # conflits de transaction DuckDB sur le compteur et la table de mapping.
     _lock = threading.Lock()
+    _write_lock = threading.Lock()
     _conn: duckdb.DuckDBPyConnection | None = None
+    # Curseur du thread courant (tls.conn, tls.cursor), recréé si _conn change
+    _tls = threading.local()
+    # Cache mémoire de la table de mapping (partagé comme la connexion),
+    # chargé à la première lecture et invalidé à chaque écriture
+    _cache: _MappingCache | None = None
+    # Incrémenté à chaque invalidation : un snapshot chargé pendant une
+    # écriture concurrente n'est pas publié
+    _cache_version = 0
 
     def __init__(self, db_path: Path | str | None = None) -> None:
         """Initialize pseudonymizer.
@@ -43,26 +72,89 @@ class Pseudonymizer:
         Args:
             db_path: Path to DuckDB database. Defaults to config setting.
         """
-        self.db_path = Path(db_path) if db_path else Path(privacy_settings.db_path)
+        self._settings = get_privacy_settings()
+        self.db_path = Path(db_path) if db_path else Path(self._settings.db_path)
+        # Pseudonyme = préfixe + chiffres, en mot entier (pas dans "XELEVE_001")
+        self._pseudonym_re = re.compile(
+            rf"\b{re.escape(self._settings.pseudonym_prefix)}\d+\b"
+        )
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._ensure_table()
 
     @contextmanager
-    def _get_connection(self) -> Generator[duckdb.DuckDBPyConnection]:
-        """Connexion persistante protégée par un lock.
+    def _get_connection(
+        self, *, write: bool = False
+    ) -> Generator[duckdb.DuckDBPyConnection]:
+        """Curseur du thread courant sur la connexion persistante partagée.
+
+        Chaque thread garde son curseur (session DuckDB indépendante), créé
+        une seule fois : les lectures concurrentes ne se bloquent pas entre
+        elles. Les blocs ne doivent pas être imbriqués dans un même thread.
+
+        Args:
+            write: Sérialise le bloc avec les autres écritures.
 
         Yields:
-            Connexion DuckDB partagée.
+            Curseur DuckDB du thread courant.
         """
-        with self._lock:
-            if Pseudonymizer._conn is None:
-                Pseudonymizer._conn = duckdb.connect(str(self.db_path))
-            yield Pseudonymizer._conn
+        conn = Pseudonymizer._conn
+        if conn is None:
+            with self._lock:
+                if Pseudonymizer._conn is None:
+                    Pseudonymizer._conn = duckdb.connect(str(self.db_path))
+                conn = Pseudonymizer._conn
+
+        tls = Pseudonymizer._tls
+        if getattr(tls, "conn", None) is not conn:
+            tls.cursor = conn.cursor()
+            tls.conn = conn
+
+        with self._write_lock if write else nullcontext():
+            yield tls.cursor
+
+    def _get_cache(self) -> _MappingCache:
+        """Retourne le snapshot des mappings, chargé depuis DuckDB si besoin.
+
+        Returns:
+            Snapshot courant (lignes, index par classe et par eleve_id).
+        """
+        cache = Pseudonymizer._cache
+        if cache is not None:
+            return cache
+
+        version = Pseudonymizer._cache_version
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT eleve_id, nom_original, prenom_original, classe_id, created_at
+                FROM {self._settings.mapping_table}
+                ORDER BY created_at
+                """
+            ).fetchall()
+
+            by_classe: dict[str, list[MappingRow]] = {}
+            for row in rows:
+                by_classe.setdefault(row[3], []).append(row)
+            cache = _MappingCache(
+                rows=rows,
+                by_classe=by_classe,
+                by_eleve={row[0]: row for row in rows},
+                replacements={},
+            )
+        if version == Pseudonymizer._cache_version:
+            Pseudonymizer._cache = cache
+        return cache
+
+    @staticmethod
+    def _invalidate_cache() -> None:
+        """Invalide le cache des mappings (à appeler après chaque écriture)."""
+        Pseudonymizer._cache_version += 1
+        Pseudonymizer._cache = None
 
     def _ensure_table(self) -> None:
         """Ensure the mapping table exists with proper constraints."""
-        table = privacy_settings.mapping_table
-        with self._get_connection() as conn:
+        table = self._settings.mapping_table
+        with self._get_connection(write=True) as conn:
             conn.execute(f"""
                 CREATE TABLE IF NOT EXISTS {table} (
                     eleve_id VARCHAR PRIMARY KEY,
@@ -117,6 +209,30 @@ class Pseudonymizer:
             except duckdb.CatalogException:
                 pass
 
+            # Compteur d'eleve_id : créé puis recalé sur le max existant
+            # (bases antérieures au compteur, ou IDs insérés hors compteur)
+            counters = self._settings.counter_table
+            prefix = self._settings.pseudonym_prefix
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {counters} (
+                    prefix VARCHAR PRIMARY KEY,
+                    last_id BIGINT NOT NULL
+                )
+            """)
+            conn.execute(
+                f"""
+                INSERT INTO {counters}
+                SELECT ?, COALESCE(MAX(CAST(REPLACE(eleve_id, ?, '') AS INTEGER)), 0)
+                FROM {table}
+                WHERE eleve_id LIKE ?
+                ON CONFLICT (prefix) DO UPDATE
+                SET last_id = GREATEST({counters}.last_id, EXCLUDED.last_id)
+                """,
+                [prefix, prefix, f"{prefix}%"],
+            )
+
+        self._invalidate_cache()
+
     def create_eleve_id(
         self,
         nom: str,
@@ -152,6 +268,98 @@ class Pseudonymizer:
         logger.debug(f"Created mapping: {nom} {prenom or ''} -> {eleve_id}")
         return eleve_id
 
+    def create_eleve_ids(
+        self, students: Iterable[tuple[str, str | None, str]]
+    ) -> list[str]:
+        """Bulk version of create_eleve_id for a whole class enrollment.
+
+        Existing mappings are looked up in one query, the new IDs are
+        reserved with a single counter update and all new mappings are
+        stored with one columnar INSERT.
+
+        Args:
+            students: (nom, prenom, classe_id) tuples.
+
+        Returns:
+            eleve_ids in the same order as the input (duplicates share an ID).
+
+        Raises:
+            PrivacyError: If a nom is empty or the mappings cannot be stored.
+        """
+        students = list(students)
+        if any(not nom for nom, _, _ in students):
+            raise PrivacyError("Cannot create eleve_id: nom is required")
+        if not students:
+            return []
+
+        table = self._settings.mapping_table
+        prefix = self._settings.pseudonym_prefix
+        keys = [
+            (normalize_name(nom), normalize_name(prenom) or None, classe_id)
+            for nom, prenom, classe_id in students
+        ]
+
+        try:
+            with self._get_connection(write=True) as conn:
+                existing = {
+                    (nom_norm, prenom_norm or None, classe_id): eleve_id
+                    for nom_norm, prenom_norm, classe_id, eleve_id in conn.execute(
+                        f"""
+                        SELECT nom_normalized, prenom_normalized, classe_id, eleve_id
+                        FROM {table}
+                        WHERE classe_id IN (SELECT UNNEST(?::VARCHAR[]))
+                        """,
+                        [sorted({key[2] for key in keys})],
+                    ).fetchall()
+                }
+
+                # Un seul représentant par élève absent de la base
+                new = {}
+                for key, student in zip(keys, students, strict=True):
+                    if key not in existing:
+                        new.setdefault(key, student)
+
+                if new:
+                    (last_id,) = conn.execute(
+                        f"""
+                        INSERT INTO {self._settings.counter_table} VALUES (?, ?)
+                        ON CONFLICT (prefix) DO UPDATE
+                        SET last_id = last_id + EXCLUDED.last_id
+                        RETURNING last_id
+                        """,
+                        [prefix, len(new)],
+                    ).fetchone()
+                    first_id = last_id - len(new) + 1
+                    for offset, key in enumerate(new):
+                        existing[key] = f"{prefix}{first_id + offset:03d}"
+
+                    rows = list(new.items())
+                    conn.execute(
+                        f"""
+                        INSERT INTO {table}
+                        (eleve_id, nom_original, prenom_original,
+                         nom_normalized, prenom_normalized, classe_id)
+                        SELECT UNNEST(?::VARCHAR[]), UNNEST(?::VARCHAR[]),
+                               UNNEST(?::VARCHAR[]), UNNEST(?::VARCHAR[]),
+                               UNNEST(?::VARCHAR[]), UNNEST(?::VARCHAR[])
+                        """,
+                        [
+                            [existing[key] for key, _ in rows],
+                            [nom for _, (nom, _, _) in rows],
+                            [prenom for _, (_, prenom, _) in rows],
+                            [normalize_name(nom) for _, (nom, _, _) in rows],
+                            [normalize_name(prenom) for _, (_, prenom, _) in rows],
+                            [classe_id for _, (_, _, classe_id) in rows],
+                        ],
+                    )
+        except duckdb.Error as e:
+            raise PrivacyError(f"Failed to store mappings: {e}") from e
+
+        if new:
+            self._invalidate_cache()
+            logger.debug("Created %d mappings in bulk", len(new))
+        return [existing[key] for key in keys]
+
     def _get_existing_mapping(
         self, nom: str, prenom: str | None, classe_id: str
     ) -> str | None:
@@ -170,7 +378,7 @@ class Pseudonymizer:
         """
         nom_norm = normalize_name(nom)
         prenom_norm = normalize_name(prenom)
-        table = privacy_settings.mapping_table
+        table = self._settings.mapping_table
         with self._get_connection() as conn:
             if prenom_norm:
                 result = conn.execute(
@@ -193,7 +401,11 @@ class Pseudonymizer:
     def _generate_eleve_id_atomic(
         self, classe_id: str, nom: str, prenom: str | None
     ) -> str:
-        """Generate a unique eleve_id atomically using INSERT with retry.
+        """Generate a unique eleve_id and store the mapping.
+
+        The ID comes from the counter table, so it cannot collide with an
+        existing one: the only possible conflict is the same student being
+        inserted concurrently, in which case the existing ID is returned.
 
         Args:
             classe_id: Class identifier.
@@ -204,51 +416,48 @@ class Pseudonymizer:
             Generated eleve_id.
 
         Raises:
-            PrivacyError: If ID generation fails after retries.
+            PrivacyError: If the mapping cannot be stored.
         """
-        max_retries = 10
-        for _attempt in range(max_retries):
-            eleve_id = self._generate_eleve_id(classe_id)
+        eleve_id = self._generate_eleve_id(classe_id)
 
-            try:
-                with self._get_connection() as conn:
-                    conn.execute(
-                        f"""
-                        INSERT INTO {privacy_settings.mapping_table}
-                        (eleve_id, nom_original, prenom_original, nom_normalized, prenom_normalized, classe_id)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """,
-                        [
-                            eleve_id,
-                            nom,
-                            prenom,
-                            normalize_name(nom),
-                            normalize_name(prenom),
-                            classe_id,
-                        ],
-                    )
-                return eleve_id
-            except Exception as e:
-                error_str = str(e).lower()
-                if "unique" in error_str or "duplicate" in error_str:
-                    # Either eleve_id or (nom, prenom, classe_id) conflict
-                    # Check if it's a duplicate student
-                    existing = self._get_existing_mapping(nom, prenom, classe_id)
-                    if existing:
-                        return existing
-                    # Otherwise, retry with a new ID
-                    continue
-                raise PrivacyError(f"Failed to store mapping: {e}") from e
-
-        raise PrivacyError(
-            f"Failed to generate unique eleve_id after {max_retries} attempts"
-        )
+        try:
+            with self._get_connection(write=True) as conn:
+                inserted = conn.execute(
+                    f"""
+                    INSERT INTO {self._settings.mapping_table}
+                    (eleve_id, nom_original, prenom_original, nom_normalized, prenom_normalized, classe_id)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT DO NOTHING
+                    RETURNING eleve_id
+                    """,
+                    [
+                        eleve_id,
+                        nom,
+                        prenom,
+                        normalize_name(nom),
+                        normalize_name(prenom),
+                        classe_id,
+                    ],
+                ).fetchone()
+        except duckdb.Error as e:
+            raise PrivacyError(f"Failed to store mapping: {e}") from e
+
+        if inserted:
+            self._invalidate_cache()
+            return inserted[0]
+
+        # (nom, prenom, classe_id) conflict: student inserted concurrently
+        existing = self._get_existing_mapping(nom, prenom, classe_id)
+        if existing:
+            return existing
+        raise PrivacyError(f"Failed to store mapping: {eleve_id} already exists")
 
     def _generate_eleve_id(self, classe_id: str) -> str:
         """Generate a unique eleve_id.
 
-        Uses MAX of existing numeric suffixes to avoid collisions when
-        rows have been deleted or IDs exist from other sources.
+        Atomically increments the counter table (single keyed upsert, no
+        scan of the mapping table). IDs are never reused, even after
+        mappings are deleted.
 
         Args:
             classe_id: Class identifier.
@@ -256,19 +465,18 @@ class Pseudonymizer:
         Returns:
             Unique eleve_id like "ELEVE_001".
         """
-        prefix = privacy_settings.pseudonym_prefix
-        with self._get_connection() as conn:
-            result = conn.execute(
+        prefix = self._settings.pseudonym_prefix
+        with self._get_connection(write=True) as conn:
+            (next_id,) = conn.execute(
                 f"""
-                SELECT MAX(CAST(REPLACE(eleve_id, ?, '') AS INTEGER))
-                FROM {privacy_settings.mapping_table}
-                WHERE eleve_id LIKE ?
+                INSERT INTO {self._settings.counter_table} VALUES (?, 1)
+                ON CONFLICT (prefix) DO UPDATE SET last_id = last_id + 1
+                RETURNING last_id
                 """,
-                [prefix, f"{prefix}%"],
+                [prefix],
             ).fetchone()
-            max_num = result[0] if result and result[0] is not None else 0
 
-        return f"{prefix}{max_num + 1:03d}"
+        return f"{prefix}{next_id:03d}"
 
     def depseudonymize(self, eleve_id: str) -> dict | None:
         """Retrieve original identity for an eleve_id.
@@ -279,23 +487,14 @@ class Pseudonymizer:
         Returns:
             Dict with nom_original, prenom_original, classe_id or None.
         """
-        with self._get_connection() as conn:
-            result = conn.execute(
-                f"""
-                SELECT nom_original, prenom_original, classe_id
-                FROM {privacy_settings.mapping_table}
-                WHERE eleve_id = ?
-                """,
-                [eleve_id],
-            ).fetchone()
-
-        if not result:
+        row = self._get_cache().by_eleve.get(eleve_id)
+        if not row:
             return None
 
         return {
-            "nom_original": result[0],
-            "prenom_original": result[1],
-            "classe_id": result[2],
+            "nom_original": row[1],
+            "prenom_original": row[2],
+            "classe_id": row[3],
         }
 
     def depseudonymize_text(self, text: str, classe_id: str | None = None) -> str:
@@ -309,30 +508,30 @@ class Pseudonymizer:
         Returns:
             Text with pseudonyms replaced by original names.
         """
-        with self._get_connection() as conn:
-            if classe_id:
-                mappings = conn.execute(
-                    f"""
-                    SELECT eleve_id, nom_original, prenom_original
-                    FROM {privacy_settings.mapping_table}
-                    WHERE classe_id = ?
-                    """,
-                    [classe_id],
-                ).fetchall()
-            else:
-                mappings = conn.execute(
-                    f"""
-                    SELECT eleve_id, nom_original, prenom_original
-                    FROM {privacy_settings.mapping_table}
-                    """,
-                ).fetchall()
-
-        for eleve_id, nom, prenom in mappings:
-            if nom:
-                replacement = prenom if prenom else nom
-                text = text.replace(eleve_id, replacement)
+        # Aucun pseudonyme possible : pas de chargement des mappings
+        if self._settings.pseudonym_prefix not in text:
+            return text
+
+        cache = self._get_cache()
+        scope = classe_id or None
+        replacements = cache.replacements.get(scope)
+        if replacements is None:
+            # Construit une fois par snapshot et par classe (réutilisé par
+            # chaque synthèse d'un batch)
+            mappings = cache.by_classe.get(scope, []) if scope else cache.rows
+            replacements = {
+                eleve_id: prenom or nom
+                for eleve_id, nom, prenom, _, _ in mappings
+                if nom
+            }
+            cache.replacements[scope] = replacements
+        if not replacements:
+            return text
 
-        return text
+        # Une seule passe : chaque pseudonyme trouvé est remplacé via le dict
+        return self._pseudonym_re.sub(
+            lambda m: replacements.get(m.group(), m.group()), text
+        )
 
     def list_mappings(self, classe_id: str | None = None) -> list[dict]:
         """List all pseudonymization mappings.
@@ -343,25 +542,8 @@ class Pseudonymizer:
         Returns:
             List of mapping dictionaries.
         """
-        with self._get_connection() as conn:
-            if classe_id:
-                result = conn.execute(
-                    f"""
-                    SELECT eleve_id, nom_original, prenom_original, classe_id, created_at
-                    FROM {privacy_settings.mapping_table}
-                    WHERE classe_id = ?
-                    ORDER BY created_at
-                    """,
-                    [classe_id],
-                ).fetchall()
-            else:
-                result = conn.execute(
-                    f"""
-                    SELECT eleve_id, nom_original, prenom_original, classe_id, created_at
-                    FROM {privacy_settings.mapping_table}
-                    ORDER BY created_at
-                    """,
-                ).fetchall()
+        cache = self._get_cache()
+        result = cache.by_classe.get(classe_id, []) if classe_id else cache.rows
 
         return [
             {
@@ -374,6 +556,21 @@ class Pseudonymizer:
             for row in result
         ]
 
+    def get_mappings_by_id(self, classe_id: str) -> dict[str, tuple[str, str | None]]:
+        """Map eleve_id to original names for one class.
+
+        Lighter than list_mappings when only names are needed: no
+        per-row dict.
+
+        Args:
+            classe_id: Class identifier.
+
+        Returns:
+            Dict {eleve_id: (nom_original, prenom_original)}.
+        """
+        rows = self._get_cache().by_classe.get(classe_id, [])
+        return {eleve_id: (nom, prenom) for eleve_id, nom, prenom, _, _ in rows}
+
     def clear_mapping_for_eleve(self, eleve_id: str) -> int:
         """Clear pseudonymization mapping for a single student.
 
@@ -383,13 +580,14 @@ class Pseudonymizer:
         Returns:
             Number of mappings deleted (0 or 1).
         """
-        with self._get_connection() as conn:
+        with self._get_connection(write=True) as conn:
             rows = conn.execute(
-                f"DELETE FROM {privacy_settings.mapping_table} "
+                f"DELETE FROM {self._settings.mapping_table} "
                 f"WHERE eleve_id = ? RETURNING 1",
                 [eleve_id],
             ).fetchall()
             deleted = len(rows)
+            self._invalidate_cache()
             if deleted:
                 logger.info("Cleared privacy mapping for %s", eleve_id)
             return deleted
@@ -403,15 +601,16 @@ class Pseudonymizer:
         Returns:
             Number of mappings deleted.
         """
-        with self._get_connection() as conn:
+        with self._get_connection(write=True) as conn:
             if classe_id:
                 rows = conn.execute(
-                    f"DELETE FROM {privacy_settings.mapping_table} "
+                    f"DELETE FROM {self._settings.mapping_table} "
                     f"WHERE classe_id = ? RETURNING 1",
                     [classe_id],
                 ).fetchall()
             else:
                 rows = conn.execute(
-                    f"DELETE FROM {privacy_settings.mapping_table} RETURNING 1"
+                    f"DELETE FROM {self._settings.mapping_table} RETURNING 1"
                 ).fetchall()
+            self._invalidate_cache()
             return len(rows)
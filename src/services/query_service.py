@@ -4,8 +4,16 @@ from __future__ import annotations
 
 import logging
 
+from pydantic import TypeAdapter
+
+from src.core.models import Alerte, Reussite
+
 logger = logging.getLogger(__name__)
 
+# Sérialisation de listes en un seul appel pydantic-core (schéma construit une fois)
+_ALERTES_ADAPTER = TypeAdapter(list[Alerte])
+_REUSSITES_ADAPTER = TypeAdapter(list[Reussite])
+
 
 def get_classe_stats(
     classe_id: str,
@@ -47,41 +55,40 @@ def get_eleves_with_syntheses(
     classe_id: str,
     trimestre: int,
     eleve_repo,
-    synthese_repo,
     pseudonymizer,
 ) -> list[dict]:
     """Récupère les élèves avec leurs synthèses en évitant les requêtes N+1.
 
+    Élèves et synthèses sont joints en une requête sur chiron.duckdb ; les
+    noms réels viennent du cache mémoire du Pseudonymizer (base privacy
+    séparée, donc non joignable en SQL).
+
     Args:
         classe_id: Identifiant de la classe.
         trimestre: Numéro du trimestre.
         eleve_repo: EleveRepository.
-        synthese_repo: SyntheseRepository.
         pseudonymizer: Pseudonymizer.
 
     Returns:
         Liste de dicts avec données élève + statut synthèse.
     """
-    eleves = eleve_repo.get_by_classe(classe_id, trimestre)
-    syntheses_map = synthese_repo.get_by_classe(classe_id, trimestre)
-    mappings = pseudonymizer.list_mappings(classe_id)
-    mappings_by_id = {m["eleve_id"]: m for m in mappings}
+    rows = eleve_repo.get_by_classe_with_syntheses(classe_id, trimestre)
+    mappings_by_id = pseudonymizer.get_mappings_by_id(classe_id)
 
     result = []
-    for eleve in eleves:
-        mapping = mappings_by_id.get(eleve.eleve_id)
-        syn_data = syntheses_map.get(eleve.eleve_id)
+    for row in rows:
+        nom, prenom = mappings_by_id.get(row["eleve_id"], (None, None))
         item = {
-            "eleve_id": eleve.eleve_id,
-            "prenom": mapping["prenom_original"] if mapping else None,
-            "nom": mapping["nom_original"] if mapping else None,
-            "trimestre": eleve.trimestre,
-            "absences_demi_journees": eleve.absences_demi_journees,
-            "retards": eleve.retards,
-            "nb_matieres": len(eleve.matieres),
-            "has_synthese": syn_data is not None,
-            "synthese_id": syn_data["synthese_id"] if syn_data else None,
-            "synthese_status": syn_data["status"] if syn_data else None,
+            "eleve_id": row["eleve_id"],
+            "prenom": prenom,
+            "nom": nom,
+            "trimestre": row["trimestre"],
+            "absences_demi_journees": row["absences_demi_journees"],
+            "retards": row["retards"],
+            "nb_matieres": row["nb_matieres"],
+            "has_synthese": row["synthese_id"] is not None,
+            "synthese_id": row["synthese_id"],
+            "synthese_status": row["synthese_status"],
         }
         result.append(item)
 
@@ -119,8 +126,8 @@ def get_eleve_synthese(
         "status": result["status"],
         "synthese": {
             "synthese_texte": synthese.synthese_texte,
-            "alertes": [a.model_dump() for a in synthese.alertes],
-            "reussites": [r.model_dump() for r in synthese.reussites],
+            "alertes": _ALERTES_ADAPTER.dump_python(synthese.alertes),
+            "reussites": _REUSSITES_ADAPTER.dump_python(synthese.reussites),
             "axes_travail": synthese.axes_travail,
         },
     }
@@ -2,18 +2,44 @@
 
 from __future__ import annotations
 
+import logging
+import os
 import tempfile
 from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
+from src.core.constants import CUSTOM_SYSTEM_PROMPT_PATH
 from src.generation.prompt_builder import format_eleve_data
 from src.generation.prompts import CURRENT_PROMPT, get_prompt_hash
-from src.llm.config import settings as llm_settings
+from src.llm.config import get_settings
+
+logger = logging.getLogger(__name__)
 
 VALID_PROVIDERS = ("openai", "anthropic", "mistral")
 VALID_TRIMESTRES = (1, 2, 3)
 
 
+@lru_cache(maxsize=256)
+def _cached_prompt_hash(
+    template_name: str, prompt_mtime_ns: int, eleve_data_str: str
+) -> str:
+    """get_prompt_hash mémoïsé (retries, régénérations multi-provider).
+
+    prompt_mtime_ns ne sert que de clé : une modification du system prompt
+    (fichier éditable depuis l'UI) change la clé et force un nouveau hash.
+    """
+    return get_prompt_hash(template_name, eleve_data_str)
+
+
+def _system_prompt_mtime_ns() -> int:
+    """Date de modification du system prompt (0 s'il n'existe pas encore)."""
+    try:
+        return CUSTOM_SYSTEM_PROMPT_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
 def build_llm_metadata(
     llm_metadata: dict,
     provider: str,
@@ -21,7 +47,7 @@ def build_llm_metadata(
     generator_model: str,
     duration_ms: int,
     eleve_data_str: str,
-    temperature: float = llm_settings.default_temperature,
+    temperature: float | None = None,
 ) -> dict:
     """Construit le dict de métadonnées LLM pour stockage en base.
 
@@ -32,12 +58,16 @@ def build_llm_metadata(
         generator_model: Modèle effectif du générateur.
         duration_ms: Durée de l'appel en ms.
         eleve_data_str: Données élève formatées (pour le prompt hash).
-        temperature: Température utilisée.
+        temperature: Température utilisée (None = défaut des settings).
 
     Returns:
         Dict prêt pour synthese_repo.create().
     """
-    prompt_hash = get_prompt_hash(CURRENT_PROMPT, eleve_data_str)
+    if temperature is None:
+        temperature = get_settings().default_temperature
+    prompt_hash = _cached_prompt_hash(
+        CURRENT_PROMPT, _system_prompt_mtime_ns(), eleve_data_str
+    )
 
     return {
         "llm_provider": llm_metadata.get("llm_provider", provider),
@@ -60,16 +90,65 @@ def build_eleve_data_str(eleve) -> str:
     return format_eleve_data(eleve)
 
 
+@lru_cache(maxsize=1)
+def _pdf_temp_dir() -> str | None:
+    """Répertoire des PDF temporaires : tmpfs (/dev/shm) si disponible.
+
+    Returns:
+        "/dev/shm" sous Linux s'il est inscriptible, sinon None (tempdir
+        par défaut, ex. Windows).
+    """
+    shm = Path("/dev/shm")
+    if shm.is_dir() and os.access(shm, os.W_OK):
+        return str(shm)
+    return None
+
+
+def _write_temp_pdf(content: bytes, directory: str | None) -> Path:
+    """Écrit le PDF dans un nouveau fichier temporaire de `directory`.
+
+    Si l'écriture échoue, le fichier partiel est supprimé avant de relever
+    l'erreur.
+
+    Returns:
+        Path vers le fichier temporaire.
+    """
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf", dir=directory)
+    tmp_path = Path(tmp.name)
+    try:
+        with tmp:
+            tmp.write(content)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path
+
+
 @contextmanager
 def temp_pdf_file(content: bytes):
     """Context manager pour écrire un PDF dans un fichier temporaire.
 
+    Le fichier est créé en mémoire (tmpfs) quand c'est possible : le PDF,
+    qui contient les noms réels, n'est alors jamais écrit sur disque.
+    Si le tmpfs est plein (ex. /dev/shm limité à 64 Mo sous Docker), le
+    fichier est créé dans le répertoire temporaire par défaut.
+
     Yields:
         Path vers le fichier temporaire.
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(content)
-        tmp_path = Path(tmp.name)
+    directory = _pdf_temp_dir()
+    try:
+        tmp_path = _write_temp_pdf(content, directory)
+    except OSError as e:
+        if directory is None:
+            raise
+        logger.warning(
+            "Écriture du PDF temporaire dans %s impossible (%s), "
+            "repli sur le répertoire temporaire par défaut",
+            directory,
+            e,
+        )
+        tmp_path = _write_temp_pdf(content, None)
     try:
         yield tmp_path
     finally:
@@ -85,7 +164,4 @@ def ensure_classe_exists(classe_repo, classe_id: str) -> None:
     """
     from src.storage.repositories.classe import Classe
 
-    classe = classe_repo.get(classe_id)
-    if not classe:
-        classe = Classe(classe_id=classe_id, nom=classe_id)
-        classe_repo.create(classe)
+    classe_repo.create_if_not_exists(Classe(classe_id=classe_id, nom=classe_id))
@@ -2,16 +2,27 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import re
 import time
+from functools import lru_cache
 
 from src.generation.prompt_builder import build_fewshot_examples, format_eleve_data
-from src.llm.config import settings as llm_settings
+from src.llm.config import get_settings
 from src.services.shared import build_llm_metadata
 
 logger = logging.getLogger(__name__)
 
+# (alternance compilée, {nom de groupe: eleve_id}) pour un jeu de noms
+type Alternation = tuple[re.Pattern[str], dict[str, str]]
+# (alternance IGNORECASE, alternance casefold, noms casefold du pré-filtre)
+type NamePattern = tuple[Alternation, Alternation, frozenset[str]]
+
+# Exemples few-shot déjà re-pseudonymisés, par (classe_id, trimestre).
+# Réutilisés tant que les exemples en base et les mappings sont inchangés.
+_FEWSHOT_CACHE: dict[tuple[str, int], tuple[int, list]] = {}
+
 
 def get_fewshot_generator(
     classe_id: str,
@@ -26,7 +37,8 @@ def get_fewshot_generator(
 
     Charge les exemples validés, re-pseudonymise les textes (car la DB
     stocke les noms réels après dépseudonymisation), puis les injecte
-    dans le générateur.
+    dans le générateur. Le résultat est réutilisé tant que les exemples
+    et les mappings de la classe n'ont pas changé.
 
     Args:
         classe_id: Identifiant de la classe.
@@ -45,14 +57,31 @@ def get_fewshot_generator(
     if raw_examples:
         # Re-pseudonymize synthese_texte before sending to LLM
         # (DB stores real names after depseudonymization)
-        mappings = pseudonymizer.list_mappings(classe_id)
-        for row in raw_examples:
-            texte = row.get("synthese_texte", "")
-            if texte:
-                texte = _re_pseudonymize_text(texte, mappings)
-                row["synthese_texte"] = texte
-
-        examples = build_fewshot_examples(raw_examples)
+        names = _mapping_names(pseudonymizer.list_mappings(classe_id))
+        # Empreinte hashée : le cache ne retient pas les noms réels
+        fingerprint = hash(
+            (
+                tuple(
+                    (row["eleve_id"], row.get("synthese_texte"), row.get("matieres"))
+                    for row in raw_examples
+                ),
+                names,
+            )
+        )
+        cached = _FEWSHOT_CACHE.get((classe_id, trimestre))
+        if cached is not None and cached[0] == fingerprint:
+            examples = cached[1]
+        else:
+            # Pattern résolu une fois pour tous les exemples
+            compiled = _build_name_pattern(names)
+            for row in raw_examples:
+                texte = row.get("synthese_texte", "")
+                if texte:
+                    row["synthese_texte"] = _apply_name_pattern(texte, compiled)
+
+            examples = build_fewshot_examples(raw_examples)
+            _FEWSHOT_CACHE[(classe_id, trimestre)] = (fingerprint, examples)
+
         generator.set_exemples(examples)
         logger.info(
             "Few-shot: %d exemple(s) re-pseudonymise(s) et injecte(s) pour %s T%d",
@@ -66,9 +95,96 @@ def get_fewshot_generator(
     return generator
 
 
+def _mapping_names(mappings: list[dict]) -> tuple[tuple[str, str, str], ...]:
+    """Réduit les mappings aux tuples (eleve_id, nom, prenom) hashables."""
+    return tuple(
+        (m["eleve_id"], m.get("nom_original") or "", m.get("prenom_original") or "")
+        for m in mappings
+    )
+
+
+def _compile_alternation(
+    names: tuple[tuple[str, str, str], ...], flags: int = 0
+) -> Alternation | None:
+    """Compile une alternance unique (groupes nommés) sur des noms donnés.
+
+    Le lookahead sur les premiers caractères possibles écarte d'emblée les
+    positions où aucune alternative ne peut commencer (re n'indexe pas les
+    branches d'une alternance : sans lui, chacune est essayée partout).
+    """
+    alternatives: dict[str, tuple[int, str]] = {}  # pattern -> (longueur, eleve_id)
+    starts: set[str] = set()
+
+    for eid, nom, prenom in names:
+        if prenom and nom:
+            full = len(prenom) + len(nom) + 1
+            alternatives.setdefault(
+                rf"{re.escape(prenom)}\s+{re.escape(nom)}", (full, eid)
+            )
+            alternatives.setdefault(
+                rf"{re.escape(nom)}\s+{re.escape(prenom)}", (full, eid)
+            )
+        if nom:
+            alternatives.setdefault(re.escape(nom), (len(nom), eid))
+            starts.add(nom[0])
+        if prenom:
+            alternatives.setdefault(re.escape(prenom), (len(prenom), eid))
+            starts.add(prenom[0])
+
+    if not alternatives:
+        return None
+
+    ordered = sorted(alternatives, key=lambda p: alternatives[p][0], reverse=True)
+    groups = {f"g{i}": alternatives[p][1] for i, p in enumerate(ordered)}
+    body = "|".join(f"(?P<g{i}>{p})" for i, p in enumerate(ordered))
+    first = "".join(re.escape(c) for c in sorted(starts))
+    return re.compile(rf"\b(?=[{first}])(?:{body})\b", flags), groups
+
+
+@lru_cache(maxsize=32)
+def _build_name_pattern(
+    names: tuple[tuple[str, str, str], ...],
+) -> NamePattern | None:
+    """Compile une alternance unique couvrant tous les noms d'une classe.
+
+    Chaque alternative est un groupe nommé : le groupe qui a matché
+    (match.lastgroup) désigne directement l'eleve_id, sans normaliser le
+    texte trouvé. Les alternatives sont triées par longueur décroissante :
+    à une même position, "Prénom Nom" l'emporte sur "Prénom" ou "Nom" seul.
+    En cas de nom partagé par deux élèves, le premier mapping l'emporte.
+
+    Deux variantes sont compilées : sensible à la casse sur les noms en
+    casefold (appliquée au texte casefold, sans repliement Unicode pendant
+    le matching) et re.IGNORECASE sur les noms d'origine (repli quand le
+    casefold change la longueur du texte, ex. "ß" -> "ss").
+
+    Args:
+        names: Tuples (eleve_id, nom, prenom).
+
+    Returns:
+        (alternance IGNORECASE, alternance casefold, noms et prénoms en
+        casefold pour le pré-filtre), ou None si aucun nom.
+    """
+    ignorecase = _compile_alternation(names, re.IGNORECASE)
+    if ignorecase is None:
+        return None
+    folded = _compile_alternation(
+        tuple((eid, nom.casefold(), prenom.casefold()) for eid, nom, prenom in names)
+    )
+    # Toute alternative contient un nom ou un prénom entier
+    needles = frozenset(
+        part.casefold() for _, nom, prenom in names for part in (nom, prenom) if part
+    )
+    return ignorecase, folded, needles
+
+
 def _re_pseudonymize_text(texte: str, mappings: list[dict]) -> str:
     """Remplace les noms réels par les identifiants pseudonymes dans un texte.
 
+    Une seule passe regex sur le texte, quel que soit le nombre d'élèves
+    (alternance compilée une fois par ensemble de mappings). Un pré-filtre
+    par recherche de sous-chaînes évite la regex quand aucun nom n'apparaît.
+
     Args:
         texte: Texte contenant potentiellement des noms réels.
         mappings: Liste des mappings pseudonymisation.
@@ -76,38 +192,83 @@ def _re_pseudonymize_text(texte: str, mappings: list[dict]) -> str:
     Returns:
         Texte avec noms remplacés par ELEVE_XXX.
     """
-    for m in mappings:
-        eid = m["eleve_id"]
-        nom = m.get("nom_original", "")
-        prenom = m.get("prenom_original", "")
-        if prenom and nom:
-            texte = re.sub(
-                rf"\b{re.escape(prenom)}\s+{re.escape(nom)}\b",
-                eid,
-                texte,
-                flags=re.IGNORECASE,
-            )
-            texte = re.sub(
-                rf"\b{re.escape(nom)}\s+{re.escape(prenom)}\b",
-                eid,
-                texte,
-                flags=re.IGNORECASE,
-            )
-        if nom:
-            texte = re.sub(
-                rf"\b{re.escape(nom)}\b",
-                eid,
-                texte,
-                flags=re.IGNORECASE,
-            )
-        if prenom:
-            texte = re.sub(
-                rf"\b{re.escape(prenom)}\b",
-                eid,
-                texte,
-                flags=re.IGNORECASE,
-            )
-    return texte
+    if not mappings:
+        return texte
+
+    return _apply_name_pattern(texte, _build_name_pattern(_mapping_names(mappings)))
+
+
+def _apply_name_pattern(
+    texte: str,
+    compiled: NamePattern | None,
+) -> str:
+    """Applique un pattern issu de _build_name_pattern à un texte.
+
+    Args:
+        texte: Texte contenant potentiellement des noms réels.
+        compiled: Résultat de _build_name_pattern (None = aucun nom).
+
+    Returns:
+        Texte avec noms remplacés par ELEVE_XXX.
+    """
+    if compiled is None:
+        return texte
+
+    (pattern, groups), (folded_pattern, folded_groups), needles = compiled
+    # casefold couvre au moins les équivalences de re.IGNORECASE :
+    # le pré-filtre ne peut pas écarter un texte que la regex modifierait
+    folded = texte.casefold()
+    if not any(needle in folded for needle in needles):
+        return texte
+
+    if len(folded) != len(texte):
+        return pattern.sub(lambda match: groups[match.lastgroup], texte)
+
+    # Même longueur : chaque caractère replié correspond à un seul caractère
+    # d'origine, les offsets trouvés sur `folded` valent pour `texte`
+    parts = []
+    last = 0
+    for match in folded_pattern.finditer(folded):
+        parts.append(texte[last : match.start()])
+        parts.append(folded_groups[match.lastgroup])
+        last = match.end()
+    if not parts:
+        return texte
+    parts.append(texte[last:])
+    return "".join(parts)
+
+
+def _prepare_synthese(
+    eleve,
+    synthese,
+    llm_metadata: dict,
+    provider: str,
+    model: str | None,
+    generator_model: str,
+    duration_ms: int,
+    pseudonymizer,
+    temperature: float,
+) -> dict:
+    """Dépseudonymise une synthèse (in-place) et construit ses métadonnées.
+
+    Returns:
+        Dict de métadonnées prêt pour synthese_repo.create().
+    """
+    classe_id = eleve.classe
+    if classe_id:
+        synthese.synthese_texte = pseudonymizer.depseudonymize_text(
+            synthese.synthese_texte, classe_id
+        )
+
+    return build_llm_metadata(
+        llm_metadata=llm_metadata,
+        provider=provider,
+        model=model,
+        generator_model=generator_model,
+        duration_ms=duration_ms,
+        eleve_data_str=format_eleve_data(eleve),
+        temperature=temperature,
+    )
 
 
 def persist_synthese(
@@ -121,11 +282,12 @@ def persist_synthese(
     trimestre: int,
     pseudonymizer,
     synthese_repo,
-    temperature: float = llm_settings.default_temperature,
+    temperature: float | None = None,
 ) -> str:
     """Dépseudonymise, prépare les métadonnées et stocke une synthèse.
 
-    Pipeline post-génération partagé entre generate_single et generate_batch.
+    Pipeline post-génération de generate_single (generate_batch stocke
+    toutes ses synthèses en une fois via synthese_repo.replace_many).
 
     Args:
         eleve: EleveExtraction de l'élève.
@@ -138,34 +300,26 @@ def persist_synthese(
         trimestre: Numéro du trimestre.
         pseudonymizer: Pseudonymizer instance.
         synthese_repo: SyntheseRepository instance.
-        temperature: Température utilisée.
+        temperature: Température utilisée (None = défaut des settings).
 
     Returns:
         synthese_id créé.
     """
-    # Depseudonymize
-    classe_id = eleve.classe
-    if classe_id:
-        synthese.synthese_texte = pseudonymizer.depseudonymize_text(
-            synthese.synthese_texte, classe_id
-        )
-
-    # Delete existing synthesis (allows regeneration)
-    synthese_repo.delete_for_eleve(eleve.eleve_id, trimestre)
-
-    # Build metadata
-    eleve_data_str = format_eleve_data(eleve)
-    metadata = build_llm_metadata(
-        llm_metadata=llm_metadata,
-        provider=provider,
-        model=model,
-        generator_model=generator_model,
-        duration_ms=duration_ms,
-        eleve_data_str=eleve_data_str,
-        temperature=temperature,
+    if temperature is None:
+        temperature = get_settings().default_temperature
+    metadata = _prepare_synthese(
+        eleve,
+        synthese,
+        llm_metadata,
+        provider,
+        model,
+        generator_model,
+        duration_ms,
+        pseudonymizer,
+        temperature,
     )
 
-    # Store
+    # Upsert : remplace la synthèse existante (régénération)
     return synthese_repo.create(
         eleve_id=eleve.eleve_id,
         synthese=synthese,
@@ -221,7 +375,7 @@ def generate_single(
     start_time = time.perf_counter()
     result = generator.generate_with_metadata(
         eleve=eleve,
-        max_tokens=llm_settings.synthese_max_tokens,
+        max_tokens=get_settings().synthese_max_tokens,
     )
     duration_ms = int((time.perf_counter() - start_time) * 1000)
 
@@ -255,6 +409,58 @@ def generate_single(
     }
 
 
+def _store_batch_results(
+    eleves: list,
+    gen_results: list,
+    duration_per_eleve: int,
+    trimestre: int,
+    provider: str,
+    model: str | None,
+    generator_model: str,
+    pseudonymizer,
+    synthese_repo,
+) -> list[dict]:
+    """Dépseudonymise et stocke les synthèses d'un batch (code synchrone).
+
+    Returns:
+        Un dict de résultat par élève (status "generated" ou "error").
+    """
+    results = []
+    to_store = []
+
+    for eleve, gen_result in zip(eleves, gen_results, strict=False):
+        if gen_result is None:
+            results.append(
+                {
+                    "eleve_id": eleve.eleve_id,
+                    "status": "error",
+                    "error": "Échec de la génération LLM",
+                }
+            )
+            continue
+
+        metadata = _prepare_synthese(
+            eleve,
+            gen_result.synthese,
+            gen_result.metadata,
+            provider,
+            model,
+            generator_model,
+            duration_per_eleve,
+            pseudonymizer,
+            get_settings().default_temperature,
+        )
+        to_store.append((eleve.eleve_id, gen_result.synthese, metadata))
+        results.append({"eleve_id": eleve.eleve_id, "status": "generated"})
+
+    # Une seule transaction (upserts groupés) pour tout le batch
+    synthese_ids = iter(synthese_repo.replace_many(to_store, trimestre))
+    for item in results:
+        if item["status"] == "generated":
+            item["synthese_id"] = next(synthese_ids)
+    return results
+
+
 async def generate_batch(
     classe_id: str,
     trimestre: int,
@@ -290,12 +496,11 @@ async def generate_batch(
 
     # Determine which students to generate for
     if eleve_ids is not None:
-        eleves_map = {e.eleve_id: e for e in all_eleves}
-        eleves_to_generate = []
-        for eid in eleve_ids:
-            if eid in eleves_map:
-                eleves_to_generate.append(eleves_map[eid])
-                synthese_repo.delete_for_eleve(eid, trimestre)
+        requested = set(eleve_ids)
+        eleves_to_generate = [e for e in all_eleves if e.eleve_id in requested]
+        synthese_repo.delete_for_eleves(
+            [e.eleve_id for e in eleves_to_generate], trimestre
+        )
     else:
         syntheses_map = synthese_repo.get_by_classe(classe_id, trimestre)
         eleves_to_generate = [e for e in all_eleves if e.eleve_id not in syntheses_map]
@@ -325,46 +530,25 @@ async def generate_batch(
     start_time = time.perf_counter()
     gen_results = await generator.generate_batch_async(
         eleves=eleves_to_generate,
-        max_tokens=llm_settings.synthese_max_tokens,
+        max_tokens=get_settings().synthese_max_tokens,
     )
     total_duration_ms = int((time.perf_counter() - start_time) * 1000)
 
-    results = []
-    total_success = 0
-    total_errors = 0
-
-    for eleve, gen_result in zip(eleves_to_generate, gen_results, strict=False):
-        if gen_result is None:
-            total_errors += 1
-            results.append(
-                {
-                    "eleve_id": eleve.eleve_id,
-                    "status": "error",
-                    "error": "Échec de la génération LLM",
-                }
-            )
-            continue
-
-        synthese_id = persist_synthese(
-            eleve=eleve,
-            synthese=gen_result.synthese,
-            llm_metadata=gen_result.metadata,
-            provider=provider,
-            model=model,
-            generator_model=generator.model,
-            duration_ms=total_duration_ms // len(eleves_to_generate),
-            trimestre=trimestre,
-            pseudonymizer=pseudonymizer,
-            synthese_repo=synthese_repo,
-        )
-        total_success += 1
-        results.append(
-            {
-                "eleve_id": eleve.eleve_id,
-                "status": "generated",
-                "synthese_id": synthese_id,
-            }
-        )
+    # Post-traitement (regex, hash, écriture DuckDB) hors de la boucle asyncio
+    results = await asyncio.to_thread(
+        _store_batch_results,
+        eleves_to_generate,
+        gen_results,
+        total_duration_ms // len(eleves_to_generate),
+        trimestre,
+        provider,
+        model,
+        generator.model,
+        pseudonymizer,
+        synthese_repo,
+    )
+    total_success = sum(1 for item in results if item["status"] == "generated")
+    total_errors = len(results) - total_success
 
     logger.info(
         "Batch generation: %d/%d succès en %dms",
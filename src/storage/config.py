@@ -2,6 +2,7 @@
 
 from pathlib import Path
 
+from pydantic import Field
 from pydantic_settings import BaseSettings
 
 from src.core.constants import DATA_DIR
@@ -13,7 +14,23 @@ class StorageSettings(BaseSettings):
     db_path: Path = DATA_DIR / "db" / "chiron.duckdb"
     data_retention_days: int = 30
 
+    # Réglages DuckDB appliqués à l'ouverture (None = défaut DuckDB)
+    duckdb_threads: int | None = Field(default=None, ge=1)
+    duckdb_memory_limit: str | None = None  # ex. "2GB"
+    duckdb_object_cache: bool = True
+
     model_config = {"env_prefix": "CHIRON_STORAGE_"}
 
+    def duckdb_config(self) -> dict[str, str | int | bool]:
+        """Options passées à duckdb.connect() pour la base applicative."""
+        config: dict[str, str | int | bool] = {
+            "enable_object_cache": self.duckdb_object_cache
+        }
+        if self.duckdb_threads is not None:
+            config["threads"] = self.duckdb_threads
+        if self.duckdb_memory_limit is not None:
+            config["memory_limit"] = self.duckdb_memory_limit
+        return config
+
 
 storage_settings = StorageSettings()
@@ -1,13 +1,15 @@
 """DuckDB connection management.
 
-Utilise une connexion persistante unique par fichier de base de données,
-protégée par un threading.Lock pour la sécurité multi-thread (FastAPI
-exécute les endpoints sync dans un thread pool).
+Utilise une connexion persistante unique par fichier de base de données.
+Chaque thread (FastAPI exécute les endpoints sync dans un thread pool)
+travaille sur son propre curseur : les lectures sont concurrentes, seules
+les écritures sont sérialisées.
 """
 
 import atexit
 import logging
 import threading
+import weakref
 from collections.abc import Generator
 from contextlib import contextmanager
 from pathlib import Path
@@ -26,9 +28,20 @@ from src.storage.schemas import (
 
 logger = logging.getLogger(__name__)
 
-# Verrou global et pool de connexions persistantes (une par fichier DB)
+# Pool de connexions persistantes (une par fichier DB). _db_lock ne protège
+# que l'ouverture/fermeture ; _write_lock sérialise les écritures pour éviter
+# les conflits de transaction DuckDB entre curseurs.
 _db_lock = threading.Lock()
+_write_lock = threading.Lock()
 _connections: dict[str, duckdb.DuckDBPyConnection] = {}
+# Curseur du thread courant par fichier DB : {db_key: (connexion, curseur)}.
+# Seul le thread-local référence le curseur : il est libéré avec son thread
+_tls = threading.local()
+# Curseurs encore vivants, fermés avec les connexions du pool
+_cursors: "weakref.WeakSet[duckdb.DuckDBPyConnection]" = weakref.WeakSet()
+# Compteur d'écritures par fichier DB, incrémenté après chaque bloc
+# d'écriture : sert de clé d'invalidation aux caches de lecture
+_write_versions: dict[str, int] = {}
 
 _SHARED_CONNECTION: "DuckDBConnection | None" = None
 
@@ -37,8 +50,8 @@ class DuckDBConnection:
     """Gestion de connexion DuckDB avec connexion persistante thread-safe.
 
     Utilise une connexion unique par fichier DB, partagée entre toutes
-    les instances (repositories). Un threading.Lock sérialise l'accès
-    pour éviter les conflits de verrouillage fichier sous Windows.
+    les instances (repositories). Chaque thread y ouvre son curseur ;
+    les écritures sont sérialisées par un threading.Lock.
 
     Usage:
         conn = DuckDBConnection()
@@ -75,33 +88,72 @@ class DuckDBConnection:
         return False
 
     @contextmanager
-    def _get_conn(self) -> Generator[duckdb.DuckDBPyConnection]:
-        """Connexion persistante protégée par un lock.
+    def _get_conn(self, *, write: bool = False) -> Generator[duckdb.DuckDBPyConnection]:
+        """Curseur du thread courant sur la connexion persistante.
 
-        Crée la connexion au premier appel, puis la réutilise.
-        Si le WAL est corrompu, le supprime et retente.
-        Le lock est maintenu pendant toute la durée du bloc `with`.
+        Crée la connexion au premier appel (avec les réglages DuckDB de
+        StorageSettings : threads, memory_limit, object cache), puis la réutilise.
+        Si le WAL est corrompu, le supprime et retente. Chaque thread garde son
+        curseur : les lectures concurrentes ne se bloquent pas entre elles.
+        Les blocs ne doivent pas être imbriqués dans un même thread.
+
+        Args:
+            write: Sérialise le bloc avec les autres écritures.
 
         Yields:
-            Connexion DuckDB partagée.
+            Curseur DuckDB du thread courant.
         """
         db_key = str(self.db_path)
+        conn = _connections.get(db_key)
+        if conn is None:
+            conn = self._open(db_key)
+
+        thread_cursors = getattr(_tls, "cursors", None)
+        if thread_cursors is None:
+            thread_cursors = _tls.cursors = {}
+        cached = thread_cursors.get(db_key)
+        if cached is None or cached[0] is not conn:
+            with _db_lock:
+                cursor = conn.cursor()
+                _cursors.add(cursor)
+            cached = thread_cursors[db_key] = (conn, cursor)
+
+        if not write:
+            yield cached[1]
+            return
+        with _write_lock:
+            try:
+                yield cached[1]
+            finally:
+                _write_versions[db_key] = _write_versions.get(db_key, 0) + 1
+
+    def _write_version(self) -> int:
+        """Nombre de blocs d'écriture terminés sur ce fichier DB.
+
+        À lire avant la requête dont on met le résultat en cache : une
+        écriture concurrente rend alors l'entrée obsolète dès son commit.
+        """
+        return _write_versions.get(str(self.db_path), 0)
+
+    def _open(self, db_key: str) -> duckdb.DuckDBPyConnection:
+        """Ouvre la connexion persistante du fichier (une seule fois)."""
         with _db_lock:
             if db_key not in _connections:
+                config = storage_settings.duckdb_config()
                 try:
-                    _connections[db_key] = duckdb.connect(db_key)
+                    _connections[db_key] = duckdb.connect(db_key, config=config)
                 except duckdb.InternalException:
                     # WAL corruption after crash — auto-repair
                     if self._remove_wal_file():
-                        _connections[db_key] = duckdb.connect(db_key)
+                        _connections[db_key] = duckdb.connect(db_key, config=config)
                     else:
                         raise
                 logger.debug(f"Opened persistent connection: {db_key}")
-            yield _connections[db_key]
+            return _connections[db_key]
 
     def ensure_tables(self) -> None:
         """Crée toutes les tables et index si ils n'existent pas."""
-        with self._get_conn() as conn:
+        with self._get_conn(write=True) as conn:
             # 1. Create tables
             for table_name in TABLE_ORDER:
                 sql = TABLES[table_name]
@@ -200,6 +252,12 @@ def close_all_connections() -> None:
     Appelé automatiquement via atexit à l'arrêt du process.
     """
     with _db_lock:
+        for cursor in list(_cursors):
+            try:
+                cursor.close()
+            except Exception:
+                logger.debug("Erreur fermeture curseur DuckDB", exc_info=True)
+        _cursors.clear()
         for db_key, conn in _connections.items():
             try:
                 conn.close()
@@ -6,6 +6,7 @@ Architecture:
 """
 
 from abc import ABC, abstractmethod
+from functools import cached_property
 from pathlib import Path
 from typing import TypeVar
 
@@ -63,17 +64,30 @@ class DuckDBRepository[T](DuckDBConnection, ABC):
 
     # _get_conn() est hérité de DuckDBConnection
 
-    def _execute(self, sql: str, params: list | None = None) -> list[tuple]:
+    @cached_property
+    def _sql_exists(self) -> str:
+        """Requête de exists(), construite une fois par instance."""
+        return f"SELECT 1 FROM {self.table_name} WHERE {self.id_column} = ?"
+
+    @cached_property
+    def _sql_delete(self) -> str:
+        """Requête de delete(), construite une fois par instance."""
+        return f"DELETE FROM {self.table_name} WHERE {self.id_column} = ?"
+
+    def _execute(
+        self, sql: str, params: list | None = None, *, write: bool = False
+    ) -> list[tuple]:
         """Exécute du SQL et retourne les résultats.
 
         Args:
             sql: Requête SQL.
             params: Paramètres optionnels.
+            write: True pour une écriture avec RETURNING (sérialisée).
 
         Returns:
             Liste de tuples résultat.
         """
-        with self._get_conn() as conn:
+        with self._get_conn(write=write) as conn:
             if params:
                 return conn.execute(sql, params).fetchall()
             return conn.execute(sql).fetchall()
@@ -98,7 +112,7 @@ class DuckDBRepository[T](DuckDBConnection, ABC):
             sql: Requête SQL.
             params: Paramètres optionnels.
         """
-        with self._get_conn() as conn:
+        with self._get_conn(write=True) as conn:
             if params:
                 conn.execute(sql, params)
             else:
@@ -113,10 +127,7 @@ class DuckDBRepository[T](DuckDBConnection, ABC):
         Returns:
             True si elle existe.
         """
-        result = self._execute_one(
-            f"SELECT 1 FROM {self.table_name} WHERE {self.id_column} = ?",
-            [entity_id],
-        )
+        result = self._execute_one(self._sql_exists, [entity_id])
         return result is not None
 
     def delete(self, entity_id: str) -> bool:
@@ -128,8 +139,24 @@ class DuckDBRepository[T](DuckDBConnection, ABC):
         Returns:
             True si supprimée.
         """
-        self._execute_write(
-            f"DELETE FROM {self.table_name} WHERE {self.id_column} = ?",
-            [entity_id],
-        )
+        self._execute_write(self._sql_delete, [entity_id])
         return True
+
+    def delete_many(self, entity_ids: list[str]) -> int:
+        """Supprime plusieurs entités en une seule requête.
+
+        Args:
+            entity_ids: Identifiants des entités.
+
+        Returns:
+            Nombre de lignes supprimées.
+        """
+        if not entity_ids:
+            return 0
+        rows = self._execute(
+            f"DELETE FROM {self.table_name} "
+            f"WHERE {self.id_column} IN (SELECT UNNEST(?::VARCHAR[])) RETURNING 1",
+            [entity_ids],
+            write=True,
+        )
+        return len(rows)
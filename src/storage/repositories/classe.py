@@ -6,6 +6,8 @@ import re
 import uuid
 from dataclasses import dataclass, field
 
+import duckdb
+
 from src.core.constants import get_current_school_year
 from src.core.exceptions import StorageError
 from src.storage.repositories.base import DuckDBRepository
@@ -14,6 +16,19 @@ from src.storage.repositories.base import DuckDBRepository
 _CLASSE_NOM_PATTERN = re.compile(r"^\d+[A-Za-z]+_\d{4}-\d{4}$")
 
 
+def _check_nom_format(nom: str) -> None:
+    """Vérifie le format du nom de classe.
+
+    Raises:
+        StorageError: Si le nom ne respecte pas {niveau}{groupe}_{année}.
+    """
+    if not _CLASSE_NOM_PATTERN.match(nom):
+        raise StorageError(
+            f"Format de nom de classe invalide : '{nom}'. "
+            "Format attendu : {{niveau}}{{groupe}}_{{année}} (ex: 3A_2024-2025)",
+        )
+
+
 @dataclass
 class Classe:
     """Class entity."""
@@ -61,11 +76,7 @@ class ClasseRepository(DuckDBRepository[Classe]):
         if not classe.classe_id:
             classe.classe_id = str(uuid.uuid4())[:12]
 
-        if not _CLASSE_NOM_PATTERN.match(classe.nom):
-            raise StorageError(
-                f"Format de nom de classe invalide : '{classe.nom}'. "
-                "Format attendu : {{niveau}}{{groupe}}_{{année}} (ex: 3A_2024-2025)",
-            )
+        _check_nom_format(classe.nom)
 
         existing = self._execute_one(
             "SELECT classe_id FROM classes WHERE nom = ? AND annee_scolaire = ?",
@@ -96,6 +107,51 @@ class ClasseRepository(DuckDBRepository[Classe]):
         )
         return classe.classe_id
 
+    def create_if_not_exists(self, classe: Classe) -> bool:
+        """Create a class unless its classe_id already exists.
+
+        Single INSERT ... ON CONFLICT DO NOTHING instead of get() + create().
+        The name format is only enforced when the class would be created.
+
+        Args:
+            classe: Class to create.
+
+        Returns:
+            True if the class was created, False if it already existed.
+
+        Raises:
+            StorageError: Si le nom est invalide pour une nouvelle classe, ou
+                si une classe avec le même nom et année scolaire existe déjà.
+        """
+        if not _CLASSE_NOM_PATTERN.match(classe.nom):
+            if self.exists(classe.classe_id):
+                return False
+            _check_nom_format(classe.nom)
+
+        try:
+            inserted = self._execute(
+                """
+                INSERT INTO classes (classe_id, nom, niveau, etablissement, annee_scolaire)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (classe_id) DO NOTHING
+                RETURNING classe_id
+                """,
+                [
+                    classe.classe_id,
+                    classe.nom,
+                    classe.niveau,
+                    classe.etablissement,
+                    classe.annee_scolaire,
+                ],
+                write=True,
+            )
+        except duckdb.ConstraintException as e:
+            raise StorageError(
+                "Cette classe existe déjà pour cette année scolaire",
+                details={"nom": classe.nom, "annee_scolaire": classe.annee_scolaire},
+            ) from e
+        return bool(inserted)
+
     def get(self, classe_id: str) -> Classe | None:
         """Get a class by ID.
 
@@ -185,6 +241,11 @@ class ClasseRepository(DuckDBRepository[Classe]):
     ) -> Classe:
         """Get existing class by name and school year, or create new one.
 
+        The lookup comes first (one query when the class exists). On a miss,
+        a single INSERT ... ON CONFLICT (nom, annee_scolaire) DO NOTHING
+        RETURNING creates the class; if a concurrent call created it in
+        between, the winning row is read back instead of raising.
+
         Args:
             nom: Class name.
             niveau: Optional level.
@@ -192,21 +253,32 @@ class ClasseRepository(DuckDBRepository[Classe]):
 
         Returns:
             Existing or newly created class.
+
+        Raises:
+            StorageError: Si le nom est invalide pour une nouvelle classe.
         """
         annee = annee_scolaire or get_current_school_year()
-        result = self._execute_one(
-            "SELECT classe_id, nom, niveau, etablissement, annee_scolaire FROM classes WHERE nom = ? AND annee_scolaire = ?",
-            [nom, annee],
+        select_sql = (
+            "SELECT classe_id, nom, niveau, etablissement, annee_scolaire "
+            "FROM classes WHERE nom = ? AND annee_scolaire = ?"
         )
-
+        result = self._execute_one(select_sql, [nom, annee])
         if result:
             return self._row_to_entity(result)
 
-        classe = Classe(
-            classe_id=str(uuid.uuid4())[:12],
-            nom=nom,
-            niveau=niveau,
-            annee_scolaire=annee,
+        _check_nom_format(nom)
+        # DO NOTHING plutôt qu'un DO UPDATE factice : DuckDB refuse de mettre
+        # à jour une classe déjà référencée par des élèves (clé étrangère)
+        inserted = self._execute(
+            """
+            INSERT INTO classes (classe_id, nom, niveau, annee_scolaire)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (nom, annee_scolaire) DO NOTHING
+            RETURNING classe_id, nom, niveau, etablissement, annee_scolaire
+            """,
+            [str(uuid.uuid4())[:12], nom, niveau, annee],
+            write=True,
         )
-        self.create(classe)
-        return classe
+        if not inserted:
+            inserted = self._execute(select_sql, [nom, annee])
+        return self._row_to_entity(inserted[0])
@@ -9,11 +9,93 @@ from __future__ import annotations
 import json
 import logging
 
+from pydantic import TypeAdapter
+
 from src.core.models import EleveExtraction, MatiereExtraction
 from src.storage.repositories.base import DuckDBRepository
 
 logger = logging.getLogger(__name__)
 
+# (Dé)codage des colonnes JSON (schémas construits une fois)
+_MATIERES = TypeAdapter(list[MatiereExtraction])
+_STR_LIST = TypeAdapter(list[str])
+
+_INSERT_SQL = """
+    INSERT INTO eleves (
+        eleve_id, classe_id, trimestre,
+        moyenne_generale,
+        absences_demi_journees, absences_justifiees, retards,
+        engagements, parcours, evenements, matieres
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _insert_params(eleve: EleveExtraction) -> list:
+    """Valide un élève et construit les paramètres de _INSERT_SQL.
+
+    Raises:
+        ValueError: Si eleve_id ou trimestre manquant.
+    """
+    if not eleve.eleve_id:
+        raise ValueError("eleve_id is required")
+    if eleve.trimestre is None:
+        raise ValueError("trimestre is required")
+    return [
+        eleve.eleve_id,
+        eleve.classe,
+        eleve.trimestre,
+        eleve.moyenne_generale,
+        eleve.absences_demi_journees,
+        eleve.absences_justifiees,
+        eleve.retards,
+        json.dumps(eleve.engagements),
+        json.dumps(eleve.parcours),
+        json.dumps(eleve.evenements),
+        _MATIERES.dump_json(eleve.matieres).decode(),
+    ]
+
+
+def _update_assignments(updates: dict) -> tuple[list[str], list]:
+    """Traduit des champs à mettre à jour en clauses SET et paramètres.
+
+    Les champs inconnus sont ignorés.
+
+    Returns:
+        (clauses "colonne = ?", paramètres dans le même ordre).
+    """
+    set_clauses = []
+    params = []
+
+    for key, value in updates.items():
+        if key in (
+            "absences_demi_journees",
+            "absences_justifiees",
+            "retards",
+            "moyenne_generale",
+        ):
+            set_clauses.append(f"{key} = ?")
+            params.append(value)
+        elif key in ("engagements", "parcours", "evenements"):
+            set_clauses.append(f"{key} = ?")
+            params.append(json.dumps(value))
+        elif key == "matieres":
+            set_clauses.append("matieres = ?")
+            if isinstance(value, list) and value and hasattr(value[0], "model_dump"):
+                params.append(_MATIERES.dump_json(value).decode())
+            else:
+                params.append(json.dumps(value))
+
+    return set_clauses, params
+
+
+def _update_sql(set_clauses: list[str] | tuple[str, ...]) -> str:
+    """Requête UPDATE d'un élève/trimestre pour des clauses SET données."""
+    return (
+        f"UPDATE eleves SET updated_at = CURRENT_TIMESTAMP, {', '.join(set_clauses)} "
+        "WHERE eleve_id = ? AND trimestre = ?"
+    )
+
 
 class EleveRepository(DuckDBRepository[EleveExtraction]):
     """Repository pour la gestion des élèves.
@@ -43,21 +125,16 @@ class EleveRepository(DuckDBRepository[EleveExtraction]):
         """
         eleve_id = row[0]
 
-        # Parse matieres with error handling
-        matieres = []
-        try:
-            matieres_data = json.loads(row[10]) if row[10] else []
-            matieres = [MatiereExtraction(**m) for m in matieres_data]
-        except (json.JSONDecodeError, TypeError, ValueError) as e:
-            logger.warning(f"Failed to parse matieres for {eleve_id}: {e}")
-
-        # Parse other JSON fields with error handling
-        def safe_json_loads(data: str | None, field_name: str) -> list:
+        # Parse JSON fields with error handling (parsing + validation en une
+        # passe pydantic-core, sans json.loads ni dicts Python intermédiaires)
+        def safe_json_loads(
+            data: str | None, field_name: str, adapter: TypeAdapter = _STR_LIST
+        ) -> list:
             if not data:
                 return []
             try:
-                return json.loads(data)
-            except (json.JSONDecodeError, TypeError) as e:
+                return adapter.validate_json(data)
+            except ValueError as e:
                 logger.warning(f"Failed to parse {field_name} for {eleve_id}: {e}")
                 return []
 
@@ -72,7 +149,7 @@ class EleveRepository(DuckDBRepository[EleveExtraction]):
             engagements=safe_json_loads(row[7], "engagements"),
             parcours=safe_json_loads(row[8], "parcours"),
             evenements=safe_json_loads(row[9], "evenements"),
-            matieres=matieres,
+            matieres=safe_json_loads(row[10], "matieres", _MATIERES),
         )
 
     def create(self, eleve: EleveExtraction) -> str:
@@ -87,37 +164,38 @@ class EleveRepository(DuckDBRepository[EleveExtraction]):
         Raises:
             ValueError: Si eleve_id ou trimestre manquant.
         """
-        if not eleve.eleve_id:
-            raise ValueError("eleve_id is required")
-        if eleve.trimestre is None:
-            raise ValueError("trimestre is required")
-
-        self._execute_write(
-            """
-            INSERT INTO eleves (
-                eleve_id, classe_id, trimestre,
-                moyenne_generale,
-                absences_demi_journees, absences_justifiees, retards,
-                engagements, parcours, evenements, matieres
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            [
-                eleve.eleve_id,
-                eleve.classe,
-                eleve.trimestre,
-                eleve.moyenne_generale,
-                eleve.absences_demi_journees,
-                eleve.absences_justifiees,
-                eleve.retards,
-                json.dumps(eleve.engagements),
-                json.dumps(eleve.parcours),
-                json.dumps(eleve.evenements),
-                json.dumps([m.model_dump() for m in eleve.matieres]),
-            ],
-        )
+        self._execute_write(_INSERT_SQL, _insert_params(eleve))
         return eleve.eleve_id
 
+    def create_many(self, eleves: list[EleveExtraction]) -> list[str]:
+        """Crée plusieurs enregistrements élèves en une transaction.
+
+        Équivalent groupé de create() : un seul executemany (requête
+        préparée une fois), tout ou rien.
+
+        Args:
+            eleves: Données des élèves (eleve_id et trimestre requis).
+
+        Returns:
+            eleve_id des élèves créés, dans l'ordre.
+
+        Raises:
+            ValueError: Si eleve_id ou trimestre manquant (rien n'est écrit).
+        """
+        if not eleves:
+            return []
+
+        params = [_insert_params(eleve) for eleve in eleves]
+        with self._get_conn(write=True) as conn:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.executemany(_INSERT_SQL, params)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return [eleve.eleve_id for eleve in eleves]
+
     def get(
         self, eleve_id: str, trimestre: int | None = None
     ) -> EleveExtraction | None:
@@ -161,6 +239,44 @@ class EleveRepository(DuckDBRepository[EleveExtraction]):
             return None
         return self._row_to_entity(result)
 
+    def get_many(
+        self, eleve_ids: list[str], trimestre: int | None = None
+    ) -> dict[str, EleveExtraction]:
+        """Récupère plusieurs élèves en une requête.
+
+        Équivalent groupé de get() pour chaque identifiant.
+
+        Args:
+            eleve_ids: Identifiants des élèves.
+            trimestre: Numéro du trimestre. Si None, le plus récent par élève.
+
+        Returns:
+            Dict {eleve_id: EleveExtraction} (identifiants absents omis).
+        """
+        if not eleve_ids:
+            return {}
+
+        sql = """
+            SELECT eleve_id, classe_id, trimestre,
+                   moyenne_generale,
+                   absences_demi_journees, absences_justifiees, retards,
+                   engagements, parcours, evenements, matieres
+            FROM eleves
+            WHERE eleve_id IN (SELECT UNNEST(?::VARCHAR[]))
+        """
+        params: list = [eleve_ids]
+        if trimestre is not None:
+            sql += " AND trimestre = ?"
+            params.append(trimestre)
+        else:
+            sql += (
+                " QUALIFY row_number() OVER "
+                "(PARTITION BY eleve_id ORDER BY trimestre DESC) = 1"
+            )
+
+        results = self._execute(sql, params)
+        return {row[0]: self._row_to_entity(row) for row in results}
+
     def exists(self, eleve_id: str, trimestre: int | None = None) -> bool:
         """Vérifie si un enregistrement élève existe.
 
@@ -234,6 +350,49 @@ class EleveRepository(DuckDBRepository[EleveExtraction]):
             filters["trimestre"] = trimestre
         return self.list(**filters)
 
+    def get_by_classe_with_syntheses(
+        self, classe_id: str, trimestre: int
+    ) -> list[dict]:
+        """Récupère les élèves d'une classe avec le statut de leur synthèse.
+
+        Une seule requête (LEFT JOIN sur syntheses), sans désérialiser les
+        matières : seul leur nombre est calculé côté DuckDB.
+
+        Args:
+            classe_id: Identifiant de la classe.
+            trimestre: Numéro du trimestre.
+
+        Returns:
+            Liste de dicts (eleve_id, trimestre, absences_demi_journees,
+            retards, nb_matieres, synthese_id, synthese_status).
+        """
+        results = self._execute(
+            """
+            SELECT e.eleve_id, e.trimestre, e.absences_demi_journees, e.retards,
+                   CASE WHEN json_valid(e.matieres)
+                        THEN json_array_length(e.matieres) ELSE 0 END,
+                   s.id, s.status
+            FROM eleves e
+            LEFT JOIN syntheses s
+                ON s.eleve_id = e.eleve_id AND s.trimestre = e.trimestre
+            WHERE e.classe_id = ? AND e.trimestre = ?
+            ORDER BY e.eleve_id
+            """,
+            [classe_id, trimestre],
+        )
+        return [
+            {
+                "eleve_id": row[0],
+                "trimestre": row[1],
+                "absences_demi_journees": row[2],
+                "retards": row[3],
+                "nb_matieres": row[4],
+                "synthese_id": row[5],
+                "synthese_status": row[6],
+            }
+            for row in results
+        ]
+
     def update(self, eleve_id: str, trimestre: int, **updates) -> bool:
         """Met à jour un enregistrement élève.
 
@@ -245,45 +404,47 @@ class EleveRepository(DuckDBRepository[EleveExtraction]):
         Returns:
             True si mis à jour.
         """
-        if not updates:
-            return False
-
-        set_clauses = ["updated_at = CURRENT_TIMESTAMP"]
-        params = []
-
-        for key, value in updates.items():
-            if key in (
-                "absences_demi_journees",
-                "absences_justifiees",
-                "retards",
-                "moyenne_generale",
-            ):
-                set_clauses.append(f"{key} = ?")
-                params.append(value)
-            elif key in ("engagements", "parcours", "evenements"):
-                set_clauses.append(f"{key} = ?")
-                params.append(json.dumps(value))
-            elif key == "matieres":
-                set_clauses.append("matieres = ?")
-                if (
-                    isinstance(value, list)
-                    and value
-                    and hasattr(value[0], "model_dump")
-                ):
-                    params.append(json.dumps([m.model_dump() for m in value]))
-                else:
-                    params.append(json.dumps(value))
-
-        if len(set_clauses) == 1:  # Only updated_at
+        set_clauses, params = _update_assignments(updates)
+        if not set_clauses:
             return False
 
         params.extend([eleve_id, trimestre])
-        self._execute_write(
-            f"UPDATE eleves SET {', '.join(set_clauses)} WHERE eleve_id = ? AND trimestre = ?",
-            params,
-        )
+        self._execute_write(_update_sql(set_clauses), params)
         return True
 
+    def update_many(self, updates: list[tuple[str, int, dict]]) -> int:
+        """Met à jour plusieurs enregistrements élèves en une transaction.
+
+        Les mises à jour portant sur les mêmes champs partagent une requête,
+        exécutée une fois par groupe via executemany.
+
+        Args:
+            updates: Tuples (eleve_id, trimestre, champs), cf. update().
+
+        Returns:
+            Nombre de mises à jour appliquées (hors entrées sans champ valide).
+        """
+        groups: dict[tuple[str, ...], list[list]] = {}
+        for eleve_id, trimestre, fields in updates:
+            set_clauses, params = _update_assignments(fields)
+            if set_clauses:
+                params.extend([eleve_id, trimestre])
+                groups.setdefault(tuple(set_clauses), []).append(params)
+
+        if not groups:
+            return 0
+
+        with self._get_conn(write=True) as conn:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                for set_clauses, params_list in groups.items():
+                    conn.executemany(_update_sql(set_clauses), params_list)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return sum(len(params_list) for params_list in groups.values())
+
     def delete(self, eleve_id: str, trimestre: int | None = None) -> bool:
         """Supprime un enregistrement élève.
 
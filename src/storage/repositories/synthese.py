@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
 import uuid
 
 from src.core.models import Alerte, Reussite, SyntheseGeneree
@@ -11,6 +12,86 @@ from src.storage.repositories.base import DuckDBRepository
 
 logger = logging.getLogger(__name__)
 
+# Few-shot rows per (db file, classe_id, trimestre), tagged with the write
+# version they were read at (see DuckDBConnection._write_version)
+_FEWSHOT_ROWS: dict[tuple[str, str, int], tuple[int, list[tuple]]] = {}
+_fewshot_lock = threading.Lock()
+
+_INSERT_SQL = """
+    INSERT INTO syntheses (
+        id, eleve_id, trimestre, synthese_texte,
+        llm_response_raw,
+        alertes_json, reussites_json, axes_travail_json,
+        status,
+        llm_provider, llm_model,
+        prompt_template, prompt_hash,
+        tokens_input, tokens_output, tokens_total,
+        llm_cost, llm_duration_ms, llm_temperature,
+        retry_count
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (eleve_id, trimestre) DO UPDATE SET
+        id = EXCLUDED.id,
+        synthese_texte = EXCLUDED.synthese_texte,
+        llm_response_raw = EXCLUDED.llm_response_raw,
+        alertes_json = EXCLUDED.alertes_json,
+        reussites_json = EXCLUDED.reussites_json,
+        axes_travail_json = EXCLUDED.axes_travail_json,
+        status = EXCLUDED.status,
+        llm_provider = EXCLUDED.llm_provider,
+        llm_model = EXCLUDED.llm_model,
+        prompt_template = EXCLUDED.prompt_template,
+        prompt_hash = EXCLUDED.prompt_hash,
+        tokens_input = EXCLUDED.tokens_input,
+        tokens_output = EXCLUDED.tokens_output,
+        tokens_total = EXCLUDED.tokens_total,
+        llm_cost = EXCLUDED.llm_cost,
+        llm_duration_ms = EXCLUDED.llm_duration_ms,
+        llm_temperature = EXCLUDED.llm_temperature,
+        retry_count = EXCLUDED.retry_count,
+        -- Remise à zéro comme pour une nouvelle ligne
+        error_message = NULL,
+        validated_by = NULL,
+        validated_at = NULL,
+        edited_at = NULL,
+        is_fewshot_example = FALSE,
+        created_at = now(),
+        updated_at = now()
+"""
+
+
+def _insert_params(
+    synthese_id: str,
+    eleve_id: str,
+    synthese: SyntheseGeneree,
+    trimestre: int,
+    metadata: dict | None,
+) -> list:
+    """Build the _INSERT_SQL parameters for one synthesis."""
+    metadata = metadata or {}
+    return [
+        synthese_id,
+        eleve_id,
+        trimestre,
+        synthese.synthese_texte,
+        metadata.get("llm_response_raw"),
+        json.dumps([a.model_dump() for a in synthese.alertes]),
+        json.dumps([r.model_dump() for r in synthese.reussites]),
+        json.dumps(synthese.axes_travail),
+        "generated",
+        metadata.get("llm_provider"),
+        metadata.get("llm_model"),
+        metadata.get("prompt_template"),
+        metadata.get("prompt_hash"),
+        metadata.get("tokens_input"),
+        metadata.get("tokens_output"),
+        metadata.get("tokens_total"),
+        metadata.get("llm_cost"),
+        metadata.get("llm_duration_ms"),
+        metadata.get("llm_temperature"),
+        metadata.get("retry_count", 0),
+    ]
+
 
 class SyntheseRepository(DuckDBRepository[SyntheseGeneree]):
     """Repository for managing generated syntheses."""
@@ -60,7 +141,11 @@ class SyntheseRepository(DuckDBRepository[SyntheseGeneree]):
         trimestre: int,
         metadata: dict | None = None,
     ) -> str:
-        """Create a new synthesis record.
+        """Create a synthesis record, replacing the student's previous one.
+
+        Upsert on (eleve_id, trimestre): an existing synthesis for the same
+        trimester is overwritten in a single statement (validation and
+        few-shot flags reset, new synthese_id).
 
         Args:
             eleve_id: Student identifier.
@@ -84,48 +169,49 @@ class SyntheseRepository(DuckDBRepository[SyntheseGeneree]):
             synthese_id of created record.
         """
         synthese_id = str(uuid.uuid4())[:12]
-        metadata = metadata or {}
-
         self._execute_write(
-            """
-            INSERT INTO syntheses (
-                id, eleve_id, trimestre, synthese_texte,
-                llm_response_raw,
-                alertes_json, reussites_json, axes_travail_json,
-                status,
-                llm_provider, llm_model,
-                prompt_template, prompt_hash,
-                tokens_input, tokens_output, tokens_total,
-                llm_cost, llm_duration_ms, llm_temperature,
-                retry_count
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            [
-                synthese_id,
-                eleve_id,
-                trimestre,
-                synthese.synthese_texte,
-                metadata.get("llm_response_raw"),
-                json.dumps([a.model_dump() for a in synthese.alertes]),
-                json.dumps([r.model_dump() for r in synthese.reussites]),
-                json.dumps(synthese.axes_travail),
-                "generated",
-                metadata.get("llm_provider"),
-                metadata.get("llm_model"),
-                metadata.get("prompt_template"),
-                metadata.get("prompt_hash"),
-                metadata.get("tokens_input"),
-                metadata.get("tokens_output"),
-                metadata.get("tokens_total"),
-                metadata.get("llm_cost"),
-                metadata.get("llm_duration_ms"),
-                metadata.get("llm_temperature"),
-                metadata.get("retry_count", 0),
-            ],
+            _INSERT_SQL,
+            _insert_params(synthese_id, eleve_id, synthese, trimestre, metadata),
         )
         return synthese_id
 
+    def replace_many(
+        self,
+        items: list[tuple[str, SyntheseGeneree, dict | None]],
+        trimestre: int,
+    ) -> list[str]:
+        """Replace the syntheses of several students in one transaction.
+
+        Bulk equivalent of create() per student: one executemany upsert.
+
+        Args:
+            items: (eleve_id, synthese, metadata) tuples, see create().
+            trimestre: Trimester number.
+
+        Returns:
+            synthese_ids of created records, in the same order as items.
+        """
+        if not items:
+            return []
+
+        synthese_ids = [str(uuid.uuid4())[:12] for _ in items]
+        params = [
+            _insert_params(synthese_id, eleve_id, synthese, trimestre, metadata)
+            for synthese_id, (eleve_id, synthese, metadata) in zip(
+                synthese_ids, items, strict=True
+            )
+        ]
+
+        with self._get_conn(write=True) as conn:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                conn.executemany(_INSERT_SQL, params)
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        return synthese_ids
+
     def get(self, synthese_id: str) -> SyntheseGeneree | None:
         """Get a synthesis by ID.
 
@@ -218,8 +304,6 @@ class SyntheseRepository(DuckDBRepository[SyntheseGeneree]):
     def delete_for_eleve(self, eleve_id: str, trimestre: int) -> int:
         """Delete existing syntheses for a student/trimester.
 
-        Used before regeneration to avoid UNIQUE constraint violations.
-
         Args:
             eleve_id: Student identifier.
             trimestre: Trimester number.
@@ -230,6 +314,30 @@ class SyntheseRepository(DuckDBRepository[SyntheseGeneree]):
         rows = self._execute(
             "DELETE FROM syntheses WHERE eleve_id = ? AND trimestre = ? RETURNING 1",
             [eleve_id, trimestre],
+            write=True,
+        )
+        return len(rows)
+
+    def delete_for_eleves(self, eleve_ids: list[str], trimestre: int) -> int:
+        """Delete existing syntheses for several students in one statement.
+
+        Args:
+            eleve_ids: Student identifiers.
+            trimestre: Trimester number.
+
+        Returns:
+            Number of deleted records.
+        """
+        if not eleve_ids:
+            return 0
+        rows = self._execute(
+            """
+            DELETE FROM syntheses
+            WHERE trimestre = ? AND eleve_id IN (SELECT UNNEST(?::VARCHAR[]))
+            RETURNING 1
+            """,
+            [trimestre, eleve_ids],
+            write=True,
         )
         return len(rows)
 
@@ -500,6 +608,8 @@ class SyntheseRepository(DuckDBRepository[SyntheseGeneree]):
         """Get few-shot examples for a class/trimester.
 
         Returns validated syntheses marked as examples, with student data.
+        Rows are cached until the next write to the database (any table:
+        the query also reads eleves).
 
         Args:
             classe_id: Class identifier.
@@ -508,22 +618,18 @@ class SyntheseRepository(DuckDBRepository[SyntheseGeneree]):
         Returns:
             List of dicts with eleve_id, synthese_texte, and eleve data fields.
         """
-        results = self._execute(
-            """
-            SELECT s.eleve_id, s.synthese_texte,
-                   e.absences_demi_journees, e.absences_justifiees,
-                   e.retards, e.engagements, e.matieres, e.moyenne_generale
-            FROM syntheses s
-            JOIN eleves e ON s.eleve_id = e.eleve_id AND s.trimestre = e.trimestre
-            WHERE e.classe_id = ? AND s.trimestre = ?
-              AND s.is_fewshot_example = TRUE
-              AND s.status = 'validated'
-            ORDER BY s.validated_at
-            LIMIT 3
-            """,
-            [classe_id, trimestre],
-        )
+        key = (str(self.db_path), classe_id, trimestre)
+        version = self._write_version()
+        with _fewshot_lock:
+            cached = _FEWSHOT_ROWS.get(key)
+        if cached is not None and cached[0] == version:
+            results = cached[1]
+        else:
+            results = self._query_fewshot_examples(classe_id, trimestre)
+            with _fewshot_lock:
+                _FEWSHOT_ROWS[key] = (version, results)
 
+        # Dicts neufs à chaque appel : l'appelant les modifie (re-pseudonymisation)
         return [
             {
                 "eleve_id": row[0],
@@ -538,6 +644,24 @@ class SyntheseRepository(DuckDBRepository[SyntheseGeneree]):
             for row in results
         ]
 
+    def _query_fewshot_examples(self, classe_id: str, trimestre: int) -> list[tuple]:
+        """Run the few-shot examples query (uncached)."""
+        return self._execute(
+            """
+            SELECT s.eleve_id, s.synthese_texte,
+                   e.absences_demi_journees, e.absences_justifiees,
+                   e.retards, e.engagements, e.matieres, e.moyenne_generale
+            FROM syntheses s
+            JOIN eleves e ON s.eleve_id = e.eleve_id AND s.trimestre = e.trimestre
+            WHERE e.classe_id = ? AND s.trimestre = ?
+              AND s.is_fewshot_example = TRUE
+              AND s.status = 'validated'
+            ORDER BY s.validated_at
+            LIMIT 3
+            """,
+            [classe_id, trimestre],
+        )
+
     def is_fewshot_example(self, synthese_id: str) -> bool:
         """Check if a synthesis is marked as a few-shot example.
 
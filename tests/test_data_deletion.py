@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import gc
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from unittest.mock import patch
@@ -167,6 +170,98 @@ class TestSyntheseDeletion:
         assert deleted == 1
         assert synthese_repo.get_for_eleve(eid, 1) is None
 
+    def test_delete_for_eleves_bulk(self, synthese_repo):
+        for eid in ("ELEVE_001", "ELEVE_002", "ELEVE_003"):
+            synthese_repo.create(eid, _make_synthese(), trimestre=1)
+        synthese_repo.create("ELEVE_001", _make_synthese(), trimestre=2)
+
+        assert synthese_repo.delete_for_eleves(["ELEVE_001", "ELEVE_002"], 1) == 2
+        assert synthese_repo.get_for_eleve("ELEVE_003", 1) is not None
+        assert synthese_repo.get_for_eleve("ELEVE_001", 2) is not None
+        assert synthese_repo.delete_for_eleves([], 1) == 0
+
+    def test_replace_many_replaces_previous_syntheses(self, synthese_repo):
+        synthese_repo.create("ELEVE_001", _make_synthese(), trimestre=1)
+        synthese_repo.create("ELEVE_001", _make_synthese(), trimestre=2)
+
+        ids = synthese_repo.replace_many(
+            [
+                ("ELEVE_001", SyntheseGeneree(synthese_texte="Nouvelle."), None),
+                ("ELEVE_002", _make_synthese(), {"llm_provider": "test"}),
+            ],
+            trimestre=1,
+        )
+
+        assert len(ids) == 2
+        assert synthese_repo.get_for_eleve("ELEVE_001", 1).synthese_texte == "Nouvelle."
+        assert synthese_repo.get_for_eleve("ELEVE_002", 1) is not None
+        assert synthese_repo.get_for_eleve("ELEVE_001", 2) is not None  # T2 intact
+
+    def test_create_replaces_existing_synthese(self, synthese_repo):
+        first = synthese_repo.create("ELEVE_001", _make_synthese(), trimestre=1)
+        synthese_repo.update_status(first, "validated")
+
+        second = synthese_repo.create(
+            "ELEVE_001", SyntheseGeneree(synthese_texte="Régénérée."), trimestre=1
+        )
+
+        assert second != first
+        assert synthese_repo.get(first) is None
+        row = synthese_repo.get_for_eleve_with_metadata("ELEVE_001", 1)
+        assert row["synthese_id"] == second
+        assert row["status"] == "generated"
+
+    def test_fewshot_examples_cached_until_write(self, eleve_repo, synthese_repo):
+        _ensure_classe(eleve_repo, "5A")
+        eleve_repo.create(_make_eleve("ELEVE_001", "5A", 1))
+        sid = synthese_repo.create("ELEVE_001", _make_synthese(), trimestre=1)
+        synthese_repo.update_status(sid, "validated")
+        synthese_repo.toggle_fewshot_example(sid, True)
+
+        first = synthese_repo.get_fewshot_examples("5A", 1)
+        first[0]["synthese_texte"] = "modifié"  # l'appelant peut muter ses dicts
+        assert synthese_repo.get_fewshot_examples("5A", 1)[0]["synthese_texte"] == (
+            "Bonne élève."
+        )
+
+        synthese_repo.toggle_fewshot_example(sid, False)
+        assert synthese_repo.get_fewshot_examples("5A", 1) == []
+
+    def test_concurrent_reads_and_writes(self, synthese_repo):
+        def _write_then_read(i: int) -> bool:
+            eid = f"ELEVE_{i:03d}"
+            synthese_repo.create(eid, _make_synthese(), trimestre=1)
+            return synthese_repo.get_for_eleve(eid, 1) is not None
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert all(pool.map(_write_then_read, range(32)))
+
+    def test_thread_cursors_released_with_their_thread(self, synthese_repo):
+        from src.storage import connection
+
+        synthese_repo.exists("ELEVE_001")
+        before = len(connection._cursors)
+
+        for _ in range(20):
+            thread = threading.Thread(target=synthese_repo.exists, args=["ELEVE_001"])
+            thread.start()
+            thread.join()
+        gc.collect()
+
+        assert len(connection._cursors) == before
+
+    def test_delete_many_counts_deleted_rows(self, synthese_repo):
+        sids = [
+            synthese_repo.create(f"ELEVE_{i:03d}", _make_synthese(), trimestre=1)
+            for i in range(3)
+        ]
+
+        assert synthese_repo.delete_many([sids[0], "absent", sids[2]]) == 2
+        assert synthese_repo.delete_many([sids[0]]) == 0
+        assert synthese_repo.delete_many([]) == 0
+        assert synthese_repo.get(sids[0]) is None
+        assert synthese_repo.get(sids[1]) is not None
+
 
 # =============================================================================
 # Effacement automatique — rétention (RGPD Art. 5(1)(e))
@@ -310,3 +405,48 @@ class TestAutoRetention:
 
         assert "5A" in result["deleted_classes"]
         assert classe_repo.get("5A") is None
+
+
+# =============================================================================
+# PDF temporaires (noms réels)
+# =============================================================================
+
+
+class TestTempPdfFile:
+    """Les PDF importés ne laissent aucun fichier derrière eux."""
+
+    def test_falls_back_to_default_tempdir_when_tmpfs_is_full(
+        self, tmp_path, monkeypatch
+    ):
+        import errno
+        import tempfile
+
+        from src.services import shared
+
+        shm_dir = tmp_path / "shm"
+        default_dir = tmp_path / "default"
+        shm_dir.mkdir()
+        default_dir.mkdir()
+        monkeypatch.setattr(shared, "_pdf_temp_dir", lambda: str(shm_dir))
+        monkeypatch.setattr(tempfile, "tempdir", str(default_dir))
+
+        named_temporary_file = tempfile.NamedTemporaryFile
+
+        def _full_tmpfs(*args, dir=None, **kwargs):
+            tmp = named_temporary_file(*args, dir=dir, **kwargs)
+            if dir == str(shm_dir):
+
+                def _write(data):
+                    raise OSError(errno.ENOSPC, "No space left on device")
+
+                tmp.write = _write
+            return tmp
+
+        monkeypatch.setattr(tempfile, "NamedTemporaryFile", _full_tmpfs)
+
+        with shared.temp_pdf_file(b"%PDF-1.4 Dupont Marie") as pdf_path:
+            assert pdf_path.parent == default_dir
+            assert pdf_path.read_bytes() == b"%PDF-1.4 Dupont Marie"
+            assert list(shm_dir.iterdir()) == []  # fichier partiel supprimé
+
+        assert list(default_dir.iterdir()) == []
@@ -0,0 +1,189 @@
+"""Tests du repository des élèves (opérations groupées, colonnes JSON)."""
+
+from __future__ import annotations
+
+import json
+
+import duckdb
+import pytest
+
+from src.core.models import EleveExtraction, MatiereExtraction
+from src.storage.repositories.eleve import EleveRepository
+
+
+@pytest.fixture()
+def eleve_repo(tmp_path):
+    """Repository élèves sur une DB temporaire, avec la classe 5A créée."""
+    repo = EleveRepository(str(tmp_path / "chiron.duckdb"))
+    repo.ensure_tables()
+    repo._execute_write(
+        "INSERT INTO classes (classe_id, nom) VALUES (?, ?)", ["5A", "5A"]
+    )
+    return repo
+
+
+def _make_eleve(eleve_id: str, trimestre: int | None = 1) -> EleveExtraction:
+    return EleveExtraction(
+        eleve_id=eleve_id,
+        classe="5A",
+        trimestre=trimestre,
+        matieres=[MatiereExtraction(nom="Maths", appreciation="Bon travail.")],
+    )
+
+
+class TestCreateMany:
+    def test_creates_all_entries(self, eleve_repo):
+        ids = eleve_repo.create_many(
+            [_make_eleve("ELEVE_001"), _make_eleve("ELEVE_002")]
+        )
+
+        assert ids == ["ELEVE_001", "ELEVE_002"]
+        assert [e.eleve_id for e in eleve_repo.list()] == ["ELEVE_001", "ELEVE_002"]
+
+    def test_empty_input_writes_nothing(self, eleve_repo):
+        assert eleve_repo.create_many([]) == []
+        assert eleve_repo.list() == []
+
+    def test_duplicate_key_rolls_back_whole_batch(self, eleve_repo):
+        with pytest.raises(duckdb.ConstraintException):
+            eleve_repo.create_many(
+                [
+                    _make_eleve("ELEVE_001"),
+                    _make_eleve("ELEVE_002"),
+                    _make_eleve("ELEVE_001"),
+                ]
+            )
+
+        assert eleve_repo.list() == []
+
+    def test_missing_trimestre_writes_nothing(self, eleve_repo):
+        with pytest.raises(ValueError, match="trimestre"):
+            eleve_repo.create_many(
+                [_make_eleve("ELEVE_001"), _make_eleve("ELEVE_002", trimestre=None)]
+            )
+
+        assert eleve_repo.list() == []
+
+
+class TestGetMany:
+    @pytest.fixture()
+    def eleves(self, eleve_repo):
+        eleve_repo.create_many(
+            [
+                _make_eleve("ELEVE_001", 1),
+                _make_eleve("ELEVE_001", 3),
+                _make_eleve("ELEVE_001", 2),
+                _make_eleve("ELEVE_002", 1),
+                _make_eleve("ELEVE_003", 2),
+            ]
+        )
+
+    def test_latest_trimestre_per_eleve(self, eleve_repo, eleves):
+        result = eleve_repo.get_many(["ELEVE_001", "ELEVE_002", "ELEVE_003"])
+
+        assert {eid: e.trimestre for eid, e in result.items()} == {
+            "ELEVE_001": 3,
+            "ELEVE_002": 1,
+            "ELEVE_003": 2,
+        }
+        assert result["ELEVE_001"] == eleve_repo.get("ELEVE_001")
+
+    def test_explicit_trimestre(self, eleve_repo, eleves):
+        result = eleve_repo.get_many(["ELEVE_001", "ELEVE_002", "ELEVE_003"], 2)
+
+        assert {eid: e.trimestre for eid, e in result.items()} == {
+            "ELEVE_001": 2,
+            "ELEVE_003": 2,
+        }
+
+    def test_missing_ids_are_omitted(self, eleve_repo, eleves):
+        result = eleve_repo.get_many(["ELEVE_002", "ELEVE_999"])
+
+        assert list(result) == ["ELEVE_002"]
+        assert eleve_repo.get_many([]) == {}
+
+
+class TestUpdateMany:
+    @pytest.fixture()
+    def eleves(self, eleve_repo):
+        eleve_repo.create_many([_make_eleve(f"ELEVE_00{i}") for i in range(1, 4)])
+
+    def test_groups_by_field_set(self, eleve_repo, eleves):
+        count = eleve_repo.update_many(
+            [
+                ("ELEVE_001", 1, {"retards": 2}),
+                ("ELEVE_002", 1, {"absences_demi_journees": 4, "retards": 1}),
+                ("ELEVE_003", 1, {"retards": 5}),
+                ("ELEVE_002", 1, {"champ_inconnu": 1}),
+            ]
+        )
+
+        assert count == 3
+        rows = {e.eleve_id: e for e in eleve_repo.list()}
+        assert rows["ELEVE_001"].retards == 2
+        assert rows["ELEVE_001"].absences_demi_journees is None
+        assert rows["ELEVE_002"].retards == 1
+        assert rows["ELEVE_002"].absences_demi_journees == 4
+        assert rows["ELEVE_003"].retards == 5
+
+    def test_only_unknown_fields_writes_nothing(self, eleve_repo, eleves):
+        assert eleve_repo.update_many([("ELEVE_001", 1, {"champ_inconnu": 1})]) == 0
+        assert eleve_repo.update_many([]) == 0
+
+    def test_failure_rolls_back_every_group(self, eleve_repo, eleves):
+        with pytest.raises(duckdb.ConversionException):
+            eleve_repo.update_many(
+                [
+                    ("ELEVE_001", 1, {"retards": 2}),
+                    ("ELEVE_002", 1, {"absences_demi_journees": "beaucoup"}),
+                ]
+            )
+
+        assert eleve_repo.get("ELEVE_001").retards is None
+        assert eleve_repo.get("ELEVE_002").absences_demi_journees is None
+
+
+class TestMatieresJson:
+    _MATIERES = [
+        MatiereExtraction(
+            nom="Éducation physique et sportive",
+            professeur="Mme Lefèvre",
+            moyenne_eleve=14.5,
+            competences=["S'exprimer à l'écrit", "Coopérer"],
+            appreciation="Très bon trimestre, élève investi.",
+        ),
+        MatiereExtraction(nom="Français", appreciation="Des progrès à l'oral."),
+    ]
+
+    def test_round_trip_non_ascii(self, eleve_repo):
+        eleve = _make_eleve("ELEVE_001")
+        eleve.matieres = self._MATIERES
+        eleve.engagements = ["Délégué de classe"]
+        eleve_repo.create(eleve)
+
+        loaded = eleve_repo.get("ELEVE_001", 1)
+
+        assert loaded.matieres == self._MATIERES
+        assert loaded.engagements == ["Délégué de classe"]
+
+    def test_reads_rows_written_with_json_dumps(self, eleve_repo):
+        """Format d'avant dump_json : json.dumps ASCII (é → \\u00e9)."""
+        eleve_repo.create(_make_eleve("ELEVE_001"))
+        legacy = json.dumps([m.model_dump() for m in self._MATIERES])
+        assert "\\u00c9" in legacy
+        eleve_repo._execute_write(
+            "UPDATE eleves SET matieres = ? WHERE eleve_id = ?",
+            [legacy, "ELEVE_001"],
+        )
+
+        assert eleve_repo.get("ELEVE_001", 1).matieres == self._MATIERES
+
+    def test_corrupt_matieres_fall_back_to_empty(self, eleve_repo):
+        """JSON valide (colonne typée JSON) mais matière sans `nom`."""
+        eleve_repo.create(_make_eleve("ELEVE_001"))
+        eleve_repo._execute_write(
+            "UPDATE eleves SET matieres = ? WHERE eleve_id = ?",
+            ['[{"appreciation": "Sans matière."}]', "ELEVE_001"],
+        )
+
+        assert eleve_repo.get("ELEVE_001", 1).matieres == []
@@ -0,0 +1,559 @@
+"""Tests du module LLM (sans appel réseau)."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from src.core.exceptions import PromptTooLargeError
+from src.core.models import EleveExtraction, EleveGroundTruth
+from src.generation.generator import SyntheseGenerator
+from src.llm.base import LLMClient, LLMRawResponse
+from src.llm.config import get_settings
+from src.llm.manager import BatchRequest, LLMManager, _extract_json_str
+from src.llm.metrics import LLMCallMetrics, metrics_collector
+from src.llm.pricing import PricingCalculator
+from src.llm.rate_limiter import SimpleRateLimiter
+
+
+@pytest.fixture(autouse=True)
+def _isolated_metrics(tmp_path, monkeypatch):
+    """Redirige le collector global vers une DB temporaire (jamais la vraie)."""
+    monkeypatch.setattr(metrics_collector, "db_path", tmp_path / "metrics.duckdb")
+    monkeypatch.setattr(metrics_collector, "_metrics", [])
+    monkeypatch.setattr(metrics_collector, "_conn", None)
+    monkeypatch.setattr(metrics_collector, "_summary_cache", None)
+    monkeypatch.setattr(metrics_collector, "_last_flush", time.monotonic())
+    metrics_collector._ensure_db_exists()
+    yield
+    metrics_collector.close()
+
+
+class _FakeClient(LLMClient):
+    """Client factice : compte les appels API au lieu de les effectuer."""
+
+    def __init__(self, model: str = "mistral-small-latest") -> None:
+        self._model = model
+        self.pricing_calc = PricingCalculator("mistral", get_settings().mistral_pricing)
+        self.api_calls = 0
+
+    @property
+    def provider_name(self) -> str:
+        return "mistral"
+
+    @property
+    def model_name(self) -> str:
+        return self._model
+
+    async def _do_call(self, messages, model, **kwargs) -> LLMRawResponse:
+        self.api_calls += 1
+        return LLMRawResponse(
+            content="{}",
+            prompt_tokens=10,
+            completion_tokens=2,
+            total_tokens=12,
+            model=model,
+        )
+
+
+class TestPromptSizeCheck:
+    def test_estimate_tokens(self):
+        client = _FakeClient()
+        messages = [{"role": "user", "content": "a" * 400}]
+        assert client.estimate_tokens(messages) == 104
+
+    def test_small_prompt_is_sent(self):
+        client = _FakeClient()
+        result = asyncio.run(
+            client.call([{"role": "user", "content": "Bonjour"}], max_tokens=100)
+        )
+        assert result["content"] == "{}"
+        assert client.api_calls == 1
+
+    def test_oversized_prompt_fails_without_api_call(self):
+        client = _FakeClient()
+        huge = "x" * (get_settings().get_context_window("mistral-small-latest") * 4)
+        with pytest.raises(PromptTooLargeError):
+            asyncio.run(client.call([{"role": "user", "content": huge}]))
+        assert client.api_calls == 0
+
+    def test_unknown_model_is_not_checked(self):
+        client = _FakeClient(model="modele-inconnu")
+        huge = "x" * 10_000_000
+        asyncio.run(client.call([{"role": "user", "content": huge}]))
+        assert client.api_calls == 1
+
+
+class _FlakyClient(_FakeClient):
+    """Client factice qui échoue `failures` fois avant de répondre."""
+
+    def __init__(self, failures: int, error: Exception) -> None:
+        super().__init__()
+        self.failures = failures
+        self.error = error
+
+    async def _do_call(self, messages, model, **kwargs) -> LLMRawResponse:
+        if self.failures:
+            self.failures -= 1
+            self.api_calls += 1
+            raise self.error
+        return await super()._do_call(messages, model, **kwargs)
+
+
+class _ScriptedClient(_FakeClient):
+    """Client factice qui renvoie successivement les contenus fournis."""
+
+    def __init__(self, contents: list[str]) -> None:
+        super().__init__()
+        self.contents = list(contents)
+
+    async def _do_call(self, messages, model, **kwargs) -> LLMRawResponse:
+        self.api_calls += 1
+        return LLMRawResponse(
+            content=self.contents.pop(0),
+            prompt_tokens=10,
+            completion_tokens=2,
+            total_tokens=12,
+            model=model,
+        )
+
+
+class TestLLMManager:
+    @pytest.fixture()
+    def no_sleep(self, monkeypatch):
+        delays = []
+
+        async def _sleep(delay):
+            delays.append(delay)
+
+        monkeypatch.setattr("src.llm.manager.asyncio.sleep", _sleep)
+        return delays
+
+    def test_retryable_error_is_retried(self, no_sleep):
+        manager = LLMManager()
+        client = _FlakyClient(failures=1, error=ConnectionError("reset"))
+        manager._clients["mistral"] = client
+
+        result = asyncio.run(manager.call("mistral", []))
+
+        assert result["content"] == "{}"
+        assert client.api_calls == 2
+        assert len(no_sleep) == 1
+
+    def test_non_retryable_error_is_raised_immediately(self, no_sleep):
+        manager = LLMManager()
+        client = _FlakyClient(failures=1, error=KeyError("bug"))
+        manager._clients["mistral"] = client
+
+        with pytest.raises(KeyError):
+            asyncio.run(manager.call("mistral", []))
+        assert client.api_calls == 1
+        assert no_sleep == []
+
+    def test_gives_up_after_max_retries(self, no_sleep):
+        manager = LLMManager()
+        client = _FlakyClient(failures=99, error=TimeoutError())
+        manager._clients["mistral"] = client
+
+        with pytest.raises(TimeoutError):
+            asyncio.run(manager.call("mistral", []))
+        assert client.api_calls == manager._max_attempts
+
+    def test_call_resolves_provider_once(self):
+        manager = LLMManager()
+        client = _FakeClient()
+        manager._clients["mistral"] = client
+
+        messages = [{"role": "user", "content": "Bonjour"}]
+        asyncio.run(manager.call("Mistral", messages))
+        asyncio.run(manager.call("Mistral", messages))
+
+        assert client.api_calls == 2
+        assert list(manager._provider_ctx) == ["Mistral"]
+        assert manager._provider_ctx["Mistral"][0] is client
+
+    def test_batch_call_keeps_order_and_isolates_errors(self):
+        manager = LLMManager()
+        manager._clients["mistral"] = _FakeClient()
+        requests = [
+            {"provider": "mistral", "messages": [], "_eleve_id": "ELEVE_001"},
+            {"provider": "inconnu", "messages": []},
+            {"provider": "mistral", "messages": [], "model": "mistral-large-latest"},
+        ]
+
+        results = asyncio.run(manager.batch_call(requests, max_concurrent=2))
+
+        assert [r.get("model") for r in results] == [
+            "mistral-large-latest",
+            None,
+            "mistral-large-latest",
+        ]
+        assert results[1]["error_type"] == "ValueError"
+        assert "provider" in requests[0]  # requêtes de l'appelant non modifiées
+
+    def test_batch_call_accepts_batch_requests(self):
+        manager = LLMManager()
+        manager._clients["mistral"] = _FakeClient()
+        requests = [
+            BatchRequest("mistral", [], kwargs={"temperature": 0.0}),
+            BatchRequest.from_dict(
+                {"provider": "mistral", "messages": [], "_eleve_id": "ELEVE_001"}
+            ),
+        ]
+
+        results = asyncio.run(manager.batch_call(requests))
+
+        assert [r["content"] for r in results] == ["{}", "{}"]
+        assert requests[1].kwargs == {}
+
+    def test_json_parsing_first_attempt(self):
+        manager = LLMManager()
+        manager._clients["mistral"] = _ScriptedClient(['```json\n{"ok": true}\n```'])
+
+        parsed, meta = asyncio.run(manager.call_with_json_parsing("mistral", []))
+
+        assert parsed == {"ok": True}
+        assert meta["retry_count"] == 1
+        assert meta["input_tokens"] == 10
+        assert meta["output_tokens"] == 2
+
+    def test_json_parsing_retries_invalid_json(self):
+        manager = LLMManager()
+        client = _ScriptedClient(['{"ok": tr', '{"ok": true}'])
+        manager._clients["mistral"] = client
+
+        parsed, meta = asyncio.run(manager.call_with_json_parsing("mistral", []))
+
+        assert parsed == {"ok": True}
+        assert meta["retry_count"] == 2
+        assert client.api_calls == 2
+
+    def test_json_parsing_gives_up(self):
+        manager = LLMManager()
+        manager._clients["mistral"] = _ScriptedClient(["pas du json"] * 2)
+
+        with pytest.raises(RuntimeError, match="JSON parsing failed"):
+            asyncio.run(manager.call_with_json_parsing("mistral", [], max_retries=2))
+
+    def test_json_error_context_points_into_extracted_json(self, caplog):
+        manager = LLMManager()
+        raw = 'Voici la synthèse demandée :\n```json\n{"ok": true, "x": ERREUR}\n```'
+        manager._clients["mistral"] = _ScriptedClient([raw])
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(manager.call_with_json_parsing("mistral", [], max_retries=1))
+
+        (record,) = [r for r in caplog.records if "Contexte (±200" in r.message]
+        # Contexte pris dans le JSON extrait (pos = offset dans ce JSON)
+        assert '>>> {"ok": true, "x": ERREUR} <<<' in record.message
+        assert "Voici la synthèse demandée" in record.message  # réponse brute
+
+    def test_unknown_provider_raises(self):
+        manager = LLMManager()
+        with pytest.raises(ValueError, match="non implémenté"):
+            asyncio.run(manager.call("inconnu", []))
+
+
+class TestGroupGeneration:
+    """Génération batch groupée (plusieurs élèves par appel LLM)."""
+
+    def _generator(self, contents: list[str]) -> tuple[SyntheseGenerator, _FakeClient]:
+        manager = LLMManager()
+        client = _ScriptedClient(contents)
+        manager._clients["mistral"] = client
+        return SyntheseGenerator("mistral", llm_manager=manager), client
+
+    def test_group_one_call_per_group(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "synthese_group_size", 2)
+        group = '{"syntheses": [{"synthese_texte": "A"}, {"synthese_texte": "B"}]}'
+        generator, client = self._generator([group, '{"synthese_texte": "C"}'])
+        eleves = [EleveExtraction(eleve_id=f"ELEVE_00{i}") for i in range(1, 4)]
+
+        results = asyncio.run(generator.generate_batch_async(eleves))
+
+        assert [r.synthese.synthese_texte for r in results] == ["A", "B", "C"]
+        assert client.api_calls == 2
+        assert results[0].metadata["tokens_input"] == 5
+
+    def test_invalid_group_falls_back_per_eleve(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "synthese_group_size", 2)
+        generator, client = self._generator(
+            [
+                '{"syntheses": [{"synthese_texte": "A"}]}',
+                '{"synthese_texte": "A"}',
+                '{"synthese_texte": "B"}',
+            ]
+        )
+        eleves = [EleveExtraction(eleve_id=f"ELEVE_00{i}") for i in range(1, 3)]
+
+        results = asyncio.run(generator.generate_batch_async(eleves))
+
+        assert [r.synthese.synthese_texte for r in results] == ["A", "B"]
+        assert client.api_calls == 3
+
+
+class TestSetExemples:
+    def test_unchanged_exemples_keep_prompt_builder(self):
+        generator = SyntheseGenerator("mistral", llm_manager=LLMManager())
+        exemple = EleveGroundTruth(eleve_id="ELEVE_001", synthese_ground_truth="Bien.")
+
+        generator.set_exemples([exemple])
+        builder = generator._prompt_builder
+        generator.set_exemples([exemple.model_copy()])
+        assert generator._prompt_builder is builder
+
+        generator.set_exemples([])
+        assert generator._prompt_builder is not builder
+
+
+class TestAnthropicPromptCache:
+    def test_prefix_marked_for_cache(self):
+        from src.llm.clients.anthropic import AnthropicClient
+
+        client = AnthropicClient(api_key="test")
+        messages = [
+            {"role": "system", "content": "S"},
+            {"role": "user", "content": "exemple"},
+            {"role": "assistant", "content": "réponse"},
+            {"role": "user", "content": "élève"},
+        ]
+
+        system, others = client._prepare_messages(messages)
+
+        assert system[0]["cache_control"] == {"type": "ephemeral"}
+        assert others[1]["content"][0]["text"] == "réponse"
+        assert "cache_control" in others[1]["content"][0]
+        assert others[2] == messages[3]
+        assert messages[2]["content"] == "réponse"  # entrée non modifiée
+
+    def test_cache_tokens_are_reported_and_priced_separately(self):
+        from types import SimpleNamespace
+
+        from src.llm.clients.anthropic import AnthropicClient
+
+        client = AnthropicClient(api_key="test", model="claude-haiku-4-5")
+
+        async def _create(**kwargs):
+            return SimpleNamespace(
+                content=[SimpleNamespace(text="{}")],
+                stop_reason="end_turn",
+                model="claude-haiku-4-5-20251001",
+                usage=SimpleNamespace(
+                    input_tokens=100_000,
+                    output_tokens=10_000,
+                    cache_read_input_tokens=800_000,
+                    cache_creation_input_tokens=200_000,
+                ),
+            )
+
+        client._client = SimpleNamespace(messages=SimpleNamespace(create=_create))
+
+        result = asyncio.run(client.call([{"role": "user", "content": "élève"}]))
+
+        assert result["prompt_tokens"] == 100_000
+        assert result["total_tokens"] == 110_000
+        assert result["cache_read_tokens"] == 800_000
+        assert result["cache_write_tokens"] == 200_000
+        # Haiku 4.5 à 1 $/5 $ : 0.1 + 0.8 × 0.1 + 0.2 × 1.25 + 0.05
+        assert result["cost_usd"] == pytest.approx(0.48)
+
+
+class TestMetricsCollector:
+    @pytest.fixture()
+    def collector(self):
+        return metrics_collector
+
+    def test_export_and_summary(self, collector):
+        collector.collect(
+            LLMCallMetrics(
+                provider="mistral",
+                model="mistral-small-latest",
+                prompt_tokens=100,
+                completion_tokens=20,
+                total_tokens=120,
+                latency_ms=150.0,
+                success=True,
+                cost_usd=0.001,
+            )
+        )
+        collector.collect(
+            LLMCallMetrics(
+                provider="mistral",
+                model="mistral-small-latest",
+                latency_ms=50.0,
+                success=False,
+                error_type="TimeoutError",
+            )
+        )
+
+        collector.export_to_duckdb()
+        summary = collector.get_summary()
+
+        assert collector._metrics == []
+        assert summary["mistral"]["total_calls"] == 2
+        assert summary["mistral"]["successful_calls"] == 1
+        assert summary["mistral"]["error_rate"] == 50
+        assert summary["mistral"]["total_tokens"] == 120
+        assert summary["mistral"]["avg_latency_ms"] == 100
+        assert summary["mistral"]["total_cost_usd"] == 0.001
+
+    def test_collect_flushes_on_buffer_size(self, collector, monkeypatch):
+        monkeypatch.setattr(get_settings(), "metrics_flush_rows", 2)
+        metric = LLMCallMetrics(provider="mistral", model="m", success=True)
+
+        collector.collect(metric)
+        assert len(collector._metrics) == 1
+
+        collector.collect(metric)
+        assert collector._metrics == []
+        assert collector.get_summary()["mistral"]["total_calls"] == 2
+
+    def test_collect_flushes_in_thread_inside_event_loop(self, collector, monkeypatch):
+        monkeypatch.setattr(get_settings(), "metrics_flush_rows", 1)
+
+        async def _collect_and_wait():
+            collector.collect(
+                LLMCallMetrics(provider="mistral", model="m", success=True)
+            )
+            assert collector._flush_pending
+            while collector._flush_pending:
+                await asyncio.sleep(0.01)
+
+        asyncio.run(_collect_and_wait())
+        assert collector.get_summary()["mistral"]["total_calls"] == 1
+
+    def test_close_drains_never_exported_buffer(self, collector):
+        metric = LLMCallMetrics(provider="mistral", model="m", success=True)
+        collector.collect(metric)
+        collector.collect(metric)
+
+        collector.close()
+
+        assert collector._metrics == []
+        assert collector.get_summary()["mistral"]["total_calls"] == 2
+
+    def test_summary_is_cached_until_next_export(self, collector):
+        metric = LLMCallMetrics(provider="mistral", model="m", success=True)
+        collector.collect(metric)
+        collector.export_to_duckdb()
+        first = collector.get_summary()
+
+        assert collector.get_summary() is first
+
+        collector.collect(metric)
+        collector.export_to_duckdb()
+        assert collector.get_summary()["mistral"]["total_calls"] == 2
+
+    def test_summary_arrow(self, collector):
+        pytest.importorskip("pyarrow")
+        collector.collect(LLMCallMetrics(provider="mistral", model="m", success=True))
+        collector.export_to_duckdb()
+
+        table = collector.get_summary_arrow()
+
+        assert table.column("provider").to_pylist() == ["mistral"]
+        assert table.column("total_calls").to_pylist() == [1]
+
+    def test_cleanup_older_than(self, collector):
+        now = datetime.now(UTC)
+        for age in (0, 10, 40):
+            collector.collect(
+                LLMCallMetrics(
+                    timestamp=now - timedelta(days=age),
+                    provider="mistral",
+                    model="mistral-small-latest",
+                    success=True,
+                )
+            )
+        collector.export_to_duckdb()
+
+        assert collector.cleanup_older_than(30) == 1
+        assert collector.get_summary()["mistral"]["total_calls"] == 2
+
+
+class TestPricingCalculator:
+    @pytest.mark.parametrize(
+        ("provider", "model", "expected"),
+        [
+            ("anthropic", "claude-haiku-4-5-20251001", (1.00, 5.00)),
+            ("anthropic", "claude-haiku-4-5", (1.00, 5.00)),
+            ("openai", "gpt-5-mini-2025-08-07", (0.25, 2.00)),
+            ("mistral", "mistral-small-latest", (0.50, 1.50)),
+            ("mistral", "inconnu", None),
+        ],
+    )
+    def test_find_price(self, provider, model, expected):
+        calc = PricingCalculator(provider, get_settings().get_pricing(provider))
+        assert calc._find_price(model) == expected
+
+    def test_price_is_resolved_once(self, monkeypatch):
+        calc = PricingCalculator("mistral", get_settings().mistral_pricing)
+        calls = []
+        resolve = calc._resolve_price
+        monkeypatch.setattr(
+            calc, "_resolve_price", lambda m: calls.append(m) or resolve(m)
+        )
+
+        assert calc.calculate("mistral-small-latest", 1_000_000, 0) == 0.5
+        assert calc.calculate("mistral-small-2501", 0, 1_000_000) == 0.0
+        assert calc.calculate("mistral-small-2501", 0, 1_000_000) == 0.0
+        assert calls == ["mistral-small-2501"]  # noms exacts pré-indexés
+
+
+class TestSimpleRateLimiter:
+    @pytest.fixture()
+    def clock(self, monkeypatch):
+        """Horloge simulée : l'attente du rate limiter avance le temps."""
+        state = {"now": 1_000_000_000_000, "waits": []}
+
+        async def _wait_for(aw, timeout):
+            aw.close()
+            state["waits"].append(timeout)
+            state["now"] += round(timeout * 1e9)
+            raise TimeoutError
+
+        monkeypatch.setattr(
+            "src.llm.rate_limiter.time.monotonic_ns", lambda: state["now"]
+        )
+        monkeypatch.setattr("src.llm.rate_limiter.asyncio.wait_for", _wait_for)
+        return state
+
+    def test_admits_up_to_rpm_then_waits_for_window(self, clock):
+        limiter = SimpleRateLimiter(rpm=2, verbose=False)
+
+        async def _run():
+            await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+
+        asyncio.run(_run())
+
+        assert len(clock["waits"]) == 2
+        assert list(limiter.requests) == [1_120_200_000_000]
+
+    def test_usage(self, clock):
+        limiter = SimpleRateLimiter(rpm=4, verbose=False)
+        asyncio.run(limiter.acquire())
+        clock["now"] += 61_000_000_000
+        asyncio.run(limiter.acquire())
+
+        usage = limiter.get_current_usage()
+        assert usage["current_requests"] == 1
+        assert usage["available_slots"] == 3
+
+
+class TestExtractJsonStr:
+    @pytest.mark.parametrize(
+        "content",
+        [
+            '{"a": 1}',
+            '  {"a": 1}\n',
+            'Voici :\n```json\n{"a": 1}\n```\nFin.',
+            '```\n{"a": 1}\n```',
+            '```json\n{"a": 1}',  # bloc non fermé (réponse tronquée)
+            '```text\nnote\n```\n```json\n{"a": 1}\n```',  # ```json prioritaire
+        ],
+    )
+    def test_extracts_json(self, content):
+        assert _extract_json_str(content) == '{"a": 1}'
@@ -10,6 +10,10 @@ from src.document.pseudonymization import (
     pseudonymize,
     regex_pass,
 )
+from src.services.synthese_service import (
+    _re_pseudonymize_text,
+    get_fewshot_generator,
+)
 
 ELEVE = "ELEVE_001"
 
@@ -224,3 +228,103 @@ class TestPseudonymize:
         """'noté' must NOT match 'Noé' (lowercase + different word)."""
         result = pseudonymize("Il a noté ses devoirs.", "Petit", "Noé", ELEVE)
         assert "noté" in result
+
+
+# =============================================================================
+# _re_pseudonymize_text (exemples few-shot)
+# =============================================================================
+
+
+class TestRePseudonymizeText:
+    MAPPINGS = [
+        {"eleve_id": "ELEVE_001", "nom_original": "Dupont", "prenom_original": "Marie"},
+        {"eleve_id": "ELEVE_002", "nom_original": "Martin", "prenom_original": "Lucas"},
+    ]
+
+    def test_full_names_both_orders(self):
+        texte = "Marie Dupont progresse. DUPONT  MARIE aussi, comme Martin Lucas."
+        assert _re_pseudonymize_text(texte, self.MAPPINGS) == (
+            "ELEVE_001 progresse. ELEVE_001 aussi, comme ELEVE_002."
+        )
+
+    def test_single_names(self):
+        texte = "marie aide Lucas ; Dupont est absent."
+        assert _re_pseudonymize_text(texte, self.MAPPINGS) == (
+            "ELEVE_001 aide ELEVE_002 ; ELEVE_001 est absent."
+        )
+
+    def test_word_boundaries(self):
+        texte = "Mariette et Martine ne sont pas concernées."
+        assert _re_pseudonymize_text(texte, self.MAPPINGS) == texte
+
+    def test_full_name_wins_over_other_student_name(self):
+        mappings = [
+            {
+                "eleve_id": "ELEVE_001",
+                "nom_original": "Martin",
+                "prenom_original": None,
+            },
+            {
+                "eleve_id": "ELEVE_002",
+                "nom_original": "Petit",
+                "prenom_original": "Martin",
+            },
+        ]
+        assert _re_pseudonymize_text("Martin Petit et Martin.", mappings) == (
+            "ELEVE_002 et ELEVE_001."
+        )
+
+    def test_text_without_names_is_unchanged(self):
+        texte = "Un trimestre sérieux et régulier."
+        assert _re_pseudonymize_text(texte, self.MAPPINGS) == texte
+
+    def test_prefilter_keeps_ignorecase_equivalents(self):
+        """Le pré-filtre ne doit pas écarter ce que re.IGNORECASE reconnaît."""
+        mappings = [
+            {"eleve_id": "ELEVE_001", "nom_original": "Kass", "prenom_original": None}
+        ]
+        # K (signe Kelvin) et ſ (s long) sont équivalents à k et s pour re
+        assert _re_pseudonymize_text("\u212aaſs.", mappings) == "ELEVE_001."
+
+    def test_casefold_changing_length_falls_back(self):
+        """ "ß" -> "ss" décale les offsets : repli sur la regex IGNORECASE."""
+        texte = "Große progression, DUPONT Marie."
+        assert _re_pseudonymize_text(texte, self.MAPPINGS) == (
+            "Große progression, ELEVE_001."
+        )
+
+    def test_no_mappings(self):
+        assert _re_pseudonymize_text("Marie Dupont", []) == "Marie Dupont"
+
+
+class TestFewshotGenerator:
+    class _Repo:
+        def __init__(self, texte):
+            self.texte = texte
+
+        def get_fewshot_examples(self, classe_id, trimestre):
+            return [{"eleve_id": "ELEVE_001", "synthese_texte": self.texte}]
+
+    class _Generator:
+        exemples = None
+
+        def set_exemples(self, exemples):
+            self.exemples = exemples
+
+    def _run(self, repo, pseudonymizer):
+        generator = self._Generator()
+        get_fewshot_generator("5A", 1, "mistral", None, repo, pseudonymizer, generator)
+        return generator.exemples
+
+    def test_examples_reused_until_data_changes(self, pseudonymizer):
+        pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+        repo = self._Repo("Marie progresse.")
+
+        first = self._run(repo, pseudonymizer)
+        assert first[0].synthese_ground_truth == "ELEVE_001 progresse."
+        assert self._run(repo, pseudonymizer) is first
+
+        repo.texte = "Marie doit persévérer."
+        changed = self._run(repo, pseudonymizer)
+        assert changed is not first
+        assert changed[0].synthese_ground_truth == "ELEVE_001 doit persévérer."
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from src.core.exceptions import PrivacyError
@@ -70,6 +72,63 @@ class TestCreateEleveId:
         nums = [int(e.replace("ELEVE_", "")) for e in [eid1, eid2, eid3]]
         assert nums[0] < nums[1] < nums[2]
 
+    def test_concurrent_duplicate_returns_existing_id(self, pseudonymizer):
+        """Insertion concurrente du même élève : pas de doublon, ID existant."""
+        eid = pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+        again = pseudonymizer._generate_eleve_id_atomic("5A", "DUPONT", "marie")
+        assert again == eid
+        assert len(pseudonymizer.list_mappings("5A")) == 1
+
+    def test_ids_are_not_reused_after_clear(self, pseudonymizer):
+        eid = pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+        pseudonymizer.clear_mappings()
+        assert pseudonymizer.create_eleve_id("Martin", "Lucas", "5A") != eid
+
+    def test_concurrent_threads(self, pseudonymizer):
+        """Créations et lectures concurrentes : un ID unique par élève."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            ids = list(
+                pool.map(
+                    lambda i: pseudonymizer.create_eleve_id(f"Nom{i % 20}", "P", "5A"),
+                    range(200),
+                )
+            )
+        assert len(set(ids)) == 20
+        assert len(pseudonymizer.list_mappings("5A")) == 20
+
+
+class TestCreateEleveIds:
+    def test_bulk_matches_single_creation(self, pseudonymizer):
+        ids = pseudonymizer.create_eleve_ids(
+            [("Dupont", "Marie", "5A"), ("Martin", None, "5A"), ("Petit", "Emma", "5B")]
+        )
+        assert ids == ["ELEVE_001", "ELEVE_002", "ELEVE_003"]
+        assert pseudonymizer.create_eleve_id("DUPONT", "marie", "5A") == ids[0]
+        assert pseudonymizer.create_eleve_id("Martin", None, "5A") == ids[1]
+        assert pseudonymizer.depseudonymize(ids[2])["nom_original"] == "Petit"
+
+    def test_reuses_existing_and_duplicate_students(self, pseudonymizer):
+        eid = pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+        ids = pseudonymizer.create_eleve_ids(
+            [
+                ("Martin", "Lucas", "5A"),
+                ("dupont", "MARIE", "5A"),
+                ("Martin", "Lucas", "5A"),
+            ]
+        )
+        assert ids[1] == eid
+        assert ids[0] == ids[2] != eid
+        assert len(pseudonymizer.list_mappings("5A")) == 2
+        # Le compteur continue après les IDs réservés en bloc
+        assert pseudonymizer.create_eleve_id("Petit", "Emma", "5A") == "ELEVE_003"
+
+    def test_empty_nom_raises(self, pseudonymizer):
+        with pytest.raises(PrivacyError, match="nom is required"):
+            pseudonymizer.create_eleve_ids(
+                [("Dupont", "Marie", "5A"), ("", None, "5A")]
+            )
+        assert pseudonymizer.list_mappings() == []
+
 
 # =============================================================================
 # Dépseudonymisation
@@ -106,6 +165,25 @@ class TestDepseudonymize:
         assert "Marie" in result
         assert "ELEVE_002" in result  # Not resolved (belongs to 5B)
 
+    def test_depseudonymize_text_without_pseudonym_skips_mappings(
+        self, pseudonymizer, monkeypatch
+    ):
+        pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+
+        def _fail():
+            raise AssertionError("mappings should not be loaded")
+
+        monkeypatch.setattr(pseudonymizer, "_get_cache", _fail)
+        text = "Bon trimestre dans l'ensemble."
+        assert pseudonymizer.depseudonymize_text(text) == text
+
+    def test_depseudonymize_text_matches_whole_ids_only(self, pseudonymizer):
+        """ELEVE_001 ne doit pas être remplacé à l'intérieur de ELEVE_0012."""
+        pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+        text = "ELEVE_001 et ELEVE_0012, pas XELEVE_001."
+        result = pseudonymizer.depseudonymize_text(text, classe_id="5A")
+        assert result == "Marie et ELEVE_0012, pas XELEVE_001."
+
 
 # =============================================================================
 # Suppression de mappings
@@ -145,3 +223,40 @@ class TestClearMappings:
         mappings_a = pseudonymizer.list_mappings(classe_id="5A")
         assert len(mappings_a) == 1
         assert mappings_a[0]["nom_original"] == "Dupont"
+
+    def test_get_mappings_by_id(self, pseudonymizer):
+        eid = pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+        eid_none = pseudonymizer.create_eleve_id("Martin", None, "5A")
+        pseudonymizer.create_eleve_id("Petit", "Emma", "5B")
+        assert pseudonymizer.get_mappings_by_id("5A") == {
+            eid: ("Dupont", "Marie"),
+            eid_none: ("Martin", None),
+        }
+        assert pseudonymizer.get_mappings_by_id("6C") == {}
+
+
+class TestMappingCache:
+    def test_reads_reflect_writes(self, pseudonymizer):
+        eid = pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+        assert pseudonymizer.depseudonymize(eid)["nom_original"] == "Dupont"
+
+        eid2 = pseudonymizer.create_eleve_id("Martin", "Lucas", "5A")
+        assert [m["eleve_id"] for m in pseudonymizer.list_mappings("5A")] == [eid, eid2]
+
+        pseudonymizer.clear_mapping_for_eleve(eid)
+        assert pseudonymizer.depseudonymize(eid) is None
+        assert pseudonymizer.depseudonymize_text(f"{eid2} et {eid}", "5A") == (
+            f"Lucas et {eid}"
+        )
+
+    def test_reads_are_served_from_memory(self, pseudonymizer, monkeypatch):
+        pseudonymizer.create_eleve_id("Dupont", "Marie", "5A")
+        pseudonymizer.list_mappings()  # charge le cache
+
+        def _no_db():
+            raise AssertionError("lecture DuckDB inattendue")
+
+        monkeypatch.setattr(pseudonymizer, "_get_connection", _no_db)
+        assert len(pseudonymizer.list_mappings("5A")) == 1
+        assert pseudonymizer.depseudonymize("ELEVE_001") is not None
+        assert pseudonymizer.depseudonymize_text("ELEVE_001", "5A") == "Marie"